@@ -1,6 +1,28 @@
+import sys
+from pathlib import Path
+
+import json
+
 import streamlit as st
 import pandas as pd
-from src.analysis.stats import get_top_offensive_players, plot_top_players_bar
+from st_aggrid import AgGrid, GridOptionsBuilder
+
+ROOT = Path(__file__).parents[1] # repo root
+sys.path.insert(0, str(ROOT / "src"))
+
+from utils import profiling
+from analysis.scoring import RULESETS, load_rules
+from analysis.stats import (
+    EXPLORER_SORT_COLUMNS, available_positions, available_seasons, available_teams, cache_stats,
+    catalog_summary, count_players, db_generation, get_leaderboard, get_player_page, get_player_seasons,
+    get_top_offensive_players, headshot_paths, leaderboard_columns, plot_top_players_bar, similar_players,
+)
+
+# NFL_PROFILE=1 streamlit run app/streamlit_app.py -> Spans nach profile.jsonl
+profiling.configure_from_env()
+
+# So oft fragt die App nach einer neuen Ingest-Generation (etl/watch.py lädt im Hintergrund)
+RELOAD_SECONDS = 5
 
 # --- SEITEN-KONFIGURATION ---
 st.set_page_config(page_title="NFL Stats Dashboard", layout="wide")
@@ -12,14 +34,44 @@ st.markdown("Analysiere die Top-Performer der NFL Saison.")
 st.sidebar.header("Einstellungen & Filter")
 
 # 1. Saison & Top N (Standard)
-selected_season = st.sidebar.selectbox("Saison", [2023, 2022, 2021], index=0)
+# Saisons kommen aus dem Katalog, den der Ingest pflegt
+season_options = available_seasons() or [2023]
+# Mehrere Saisons: Karriere-Summen über einen Bereich statt einer einzelnen Saison
+multi_season = st.sidebar.toggle("Mehrere Saisons", value=False, disabled=len(season_options) < 2)
+if multi_season:
+    first_season, last_season = st.sidebar.select_slider(
+        "Saisons", options=sorted(season_options), value=(min(season_options), max(season_options))
+    )
+    selected_season = last_season
+else:
+    selected_season = st.sidebar.selectbox("Saison", season_options, index=0)
 top_n = st.sidebar.slider("Anzahl Spieler", 5, 50, 10)
 
+# Rangliste nach Yards, TDs oder Fantasy-Punkten (Regelwerk wählbar, auch eigenes JSON)
+sort_labels = {"yards": "Yards", "td": "Touchdowns", "fantasy_points": "Fantasy-Punkte"}
+sort_by = st.sidebar.radio("Sortieren nach", list(sort_labels), format_func=sort_labels.get, horizontal=True)
+scoring = None
+if sort_by == "fantasy_points":
+    ruleset = st.sidebar.selectbox("Regelwerk", list(RULESETS) + ["eigenes"], index=list(RULESETS).index("ppr"))
+    scoring = ruleset
+    if ruleset == "eigenes":
+        custom_rules = st.sidebar.text_area(
+            "Regeln (JSON: Spalte -> Punkte)", json.dumps(RULESETS["ppr"], indent=1), height=220,
+        )
+        try:
+            scoring = load_rules(custom_rules)
+        except ValueError as e:
+            st.sidebar.error(f"Ungültige Regeln, nutze ppr: {e}")
+            scoring = "ppr"
+
 st.sidebar.divider()
 
 # 2. Positions-Filter
 # Wir definieren die gängigen Offensiv-Positionen
 pos_options = ["QB", "RB", "WR", "TE"]
+season_positions = available_positions(None if multi_season else selected_season)
+if season_positions:
+    pos_options = [p for p in pos_options if p in season_positions] or pos_options
 selected_pos = st.sidebar.multiselect(
     "Positionen auswählen", 
     options=pos_options, 
@@ -27,13 +79,8 @@ selected_pos = st.sidebar.multiselect(
 )
 
 # 3. Team-Filter
-# Wir holen uns erst einmal alle Daten kurz ohne Team-Filter, 
-# um eine Liste aller verfügbaren Teams für das Dropdown zu bekommen
-df_all_teams = get_top_offensive_players(season=selected_season, top_n=1000)
-if not df_all_teams.empty:
-    team_list = sorted(df_all_teams['team'].unique().tolist())
-else:
-    team_list = []
+# Die Team-Liste kommt direkt aus dem Katalog (eine winzige Query)
+team_list = available_teams(None if multi_season else selected_season)
 
 selected_teams = st.sidebar.multiselect(
     "Teams auswählen", 
@@ -41,62 +88,228 @@ selected_teams = st.sidebar.multiselect(
     default=team_list
 )
 
-# --- DATEN LADEN (mit allen Filtern) ---
-df_top = get_top_offensive_players(
-    season=selected_season, 
-    top_n=top_n,
-    positions=selected_pos,
-    teams=selected_teams
-)
-
 # --- DASHBOARD LAYOUT ---
 
-if df_top.empty:
-    st.warning("Keine Daten für diese Auswahl gefunden. Probiere andere Filter!")
+if multi_season:
+    # 📈 MEHRERE SAISONS: ein gruppierter Query über (player_id, season), Leaderboard daraus
+    stat_options = leaderboard_columns() or ["yards"]
+    col_stat, col_rate = st.columns([2, 1])
+    with col_stat:
+        stat = st.selectbox("Statistik", stat_options, index=stat_options.index("yards") if "yards" in stat_options else 0)
+    with col_rate:
+        per_game = st.checkbox("Pro Spiel", value=False, disabled=stat == "games")
+    per_game = per_game and stat != "games"
+    stat_key = f"{stat}_per_game" if per_game else stat
+
+    df_top = get_leaderboard(
+        first_season, last_season, stat=stat, top_n=top_n, per_game=per_game,
+        positions=selected_pos, teams=selected_teams,
+    )
+    if df_top.empty:
+        st.warning("Keine Daten für diese Auswahl gefunden. Probiere andere Filter!")
+    else:
+        col_chart, col_table = st.columns([2, 1])
+        with col_chart:
+            st.subheader(f"Top {top_n} Spieler {first_season}–{last_season} nach {stat_key}")
+            fig = plot_top_players_bar(df_top, y=stat_key)
+            if fig:
+                st.plotly_chart(fig, use_container_width=True)
+        with col_table:
+            st.subheader("Karriere-Summen")
+            display_cols = ["full_name", "team", "position", "seasons", "games", stat_key]
+            st.dataframe(df_top[list(dict.fromkeys(display_cols))], height=400, use_container_width=True)
+
+        # Verlauf pro Saison für die Top-Spieler (gleicher gecachter Query)
+        st.subheader("Verlauf pro Saison")
+        seasons_df = get_player_seasons(first_season, last_season, positions=selected_pos, teams=selected_teams)
+        names = dict(zip(df_top["player_id"], df_top["full_name"]))
+        trend = seasons_df[seasons_df["player_id"].isin(names)]
+        trend = trend.assign(player=trend["player_id"].map(names)).pivot_table(
+            index="season", columns="player", values=stat_key, aggfunc="sum",
+        )
+        st.line_chart(trend)
 else:
-    # 🏆 TOP PERFORMER CARD (Die "Helden"-Sektion)
-    top_player = df_top.iloc[0]
+    # --- DATEN LADEN (mit allen Filtern) ---
+    df_top = get_top_offensive_players(
+        season=selected_season, 
+        top_n=top_n,
+        positions=selected_pos,
+        teams=selected_teams,
+        sort_by=sort_by,
+        scoring=scoring,
+    )
+
+    if df_top.empty:
+        st.warning("Keine Daten für diese Auswahl gefunden. Probiere andere Filter!")
+    else:
+        # 🏆 TOP PERFORMER CARD (Die "Helden"-Sektion)
+        top_player = df_top.iloc[0]
+        # Headshots der ganzen Top-N auf einmal: eine Query + lokaler Bild-Cache
+        player_ids = df_top["player_id"].astype(str).tolist()
+        cards = headshot_paths(player_ids, size="card")
+        thumbs = headshot_paths(player_ids, size="thumb")
     
-    with st.expander("⭐ Top Performer Details", expanded=True):
-        col1, col2, col3 = st.columns([1, 2, 2])
+        with st.expander("⭐ Top Performer Details", expanded=True):
+            col1, col2, col3 = st.columns([1, 2, 2])
         
-        with col1:
-            # Bild-Logik mit Sicherheits-Check
-            img_url = top_player.get('headshot_url')
-            if isinstance(img_url, str) and len(img_url) > 10:
-                st.image(img_url, width=150)
-            else:
-                st.image("https://via.placeholder.com/150", caption="Kein Bild verfügbar")
+            with col1:
+                # Bild kommt aus dem lokalen Cache (kein Download pro Rerun)
+                img_path = cards.get(str(top_player['player_id']))
+                if img_path is not None:
+                    st.image(str(img_path), width=150)
+                else:
+                    st.image("https://via.placeholder.com/150", caption="Kein Bild verfügbar")
         
-        with col2:
-            st.subheader(top_player['full_name'])
-            st.metric("Yards", f"{int(top_player['yards']):,}")
-            st.write(f"**Team:** {top_player['team']} | **Pos:** {top_player['position']}")
+            with col2:
+                st.subheader(top_player['full_name'])
+                st.metric("Yards", f"{int(top_player['yards']):,}")
+                st.write(f"**Team:** {top_player['team']} | **Pos:** {top_player['position']}")
             
-        with col3:
-            st.subheader("Stats")
-            st.metric("Touchdowns", int(top_player['td']))
+            with col3:
+                st.subheader("Stats")
+                st.metric("Touchdowns", int(top_player['td']))
+
+        # Mini-Headshots der Top-N
+        gallery = [(thumbs[pid], name) for pid, name in zip(player_ids, df_top["full_name"]) if thumbs.get(pid)]
+        if gallery:
+            st.image([str(p) for p, _ in gallery], caption=[str(n) for _, n in gallery], width=64)
 
-    st.divider()
+        st.divider()
 
-    # 📊 GRAFIK-SEKTION
-    col_chart, col_table = st.columns([2, 1])
+        # 📊 GRAFIK-SEKTION
+        col_chart, col_table = st.columns([2, 1])
     
-    with col_chart:
-        st.subheader(f"Top {top_n} Spieler nach Yards")
-        fig = plot_top_players_bar(df_top)
-        if fig:
-            st.plotly_chart(fig, use_container_width=True)
-
-    with col_table:
-        st.subheader("Daten-Tabelle")
-        # Wir zeigen nur die wichtigsten Spalten in der Tabelle an
-        display_cols = ['full_name', 'team', 'position', 'yards', 'td']
-        st.dataframe(
-            df_top[display_cols], 
-            height=400,
-            use_container_width=True
+        with col_chart:
+            st.subheader(f"Top {top_n} Spieler nach {sort_labels[sort_by]}")
+            fig = plot_top_players_bar(df_top, y=sort_by)
+            if fig:
+                st.plotly_chart(fig, use_container_width=True)
+
+        with col_table:
+            st.subheader("Daten-Tabelle")
+            # Wir zeigen nur die wichtigsten Spalten in der Tabelle an
+            display_cols = ['full_name', 'team', 'position', 'yards', 'td']
+            if 'fantasy_points' in df_top.columns:
+                display_cols.append('fantasy_points')
+            st.dataframe(
+                df_top[display_cols], 
+                height=400,
+                use_container_width=True
+            )
+
+        st.divider()
+
+        # 🔎 ÄHNLICHE SPIELER ("Spieler wie X")
+        st.subheader("Ähnliche Spieler")
+        names = dict(zip(df_top["player_id"].astype(str), df_top["full_name"]))
+        col_pick, col_metric, col_k = st.columns([2, 1, 1])
+        with col_pick:
+            picked = st.selectbox("Spieler", list(names), format_func=lambda pid: names.get(pid, pid))
+        with col_metric:
+            metric = st.radio("Metrik", ["cosine", "euclidean"], horizontal=True)
+        with col_k:
+            k = st.slider("Anzahl", 3, 25, 10)
+        same_position = st.checkbox("Nur gleiche Position", value=True)
+        picked_position = df_top.loc[df_top["player_id"].astype(str) == picked, "position"].iloc[0]
+
+        df_similar = similar_players(
+            picked, season=selected_season, k=k, metric=metric,
+            positions=[picked_position] if same_position and pd.notna(picked_position) else None,
         )
+        if df_similar.empty:
+            st.info("Kein Ähnlichkeits-Index gefunden - einmal ingest.py laufen lassen.")
+        else:
+            score_label = "Ähnlichkeit" if metric == "cosine" else "Distanz"
+            st.dataframe(
+                df_similar[["full_name", "team", "position", "season", "score"]].rename(columns={"score": score_label}),
+                use_container_width=True,
+            )
+
+st.divider()
+
+# 🗂️ SPIELER-EXPLORER (alle Spieler-Saisons, seitenweise aus SQLite)
+# Sortieren/Filtern passiert in der DB (Keyset-Pagination), ins Grid kommt nur die aktuelle Seite.
+st.subheader("Spieler-Explorer")
+col_season, col_sort, col_dir, col_size, col_name = st.columns([1, 1, 1, 1, 2])
+with col_season:
+    explorer_season = st.selectbox("Saison ", ["Alle"] + season_options, index=1 if season_options else 0)
+with col_sort:
+    sort_col = st.selectbox("Sortieren nach", list(EXPLORER_SORT_COLUMNS))
+with col_dir:
+    descending = st.radio("Richtung", ["absteigend", "aufsteigend"], horizontal=True) == "absteigend"
+with col_size:
+    page_size = st.selectbox("Zeilen pro Seite", [25, 50, 100, 200], index=1)
+with col_name:
+    name_query = st.text_input("Name enthält", "")
+
+explorer_filters = dict(
+    season=None if explorer_season == "Alle" else explorer_season,
+    positions=selected_pos, teams=selected_teams, name=name_query.strip() or None,
+)
+# Cursor-Stack: Schlüssel der bisherigen Seiten, damit "Zurück" ohne OFFSET geht.
+# Neue Filter/Sortierung -> wieder bei Seite 1 anfangen.
+explorer_state = (sort_col, descending, page_size, tuple(sorted(explorer_filters.items(), key=str)))
+if st.session_state.get("explorer_state") != explorer_state:
+    st.session_state["explorer_state"] = explorer_state
+    st.session_state["explorer_cursors"] = [None]
+cursors = st.session_state["explorer_cursors"]
+
+page, next_after = get_player_page(
+    sort=sort_col, descending=descending, after=cursors[-1], page_size=page_size, **explorer_filters,
+)
+total = count_players(**explorer_filters)
+
+if page.empty:
+    st.info("Keine Spieler für diese Filter gefunden.")
+else:
+    gb = GridOptionsBuilder.from_dataframe(page)
+    # Sortierung/Filter macht der Server - im Grid würden sie nur die eine Seite sortieren
+    gb.configure_default_column(sortable=False, filter=False, resizable=True)
+    gb.configure_column("player_id", hide=True)
+    AgGrid(page, gridOptions=gb.build(), height=400, key="player_explorer")
+
+col_prev, col_info, col_next = st.columns([1, 2, 1])
+with col_prev:
+    if st.button("← Zurück", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+with col_info:
+    pages = max(1, -(-total // page_size))
+    st.caption(f"Seite {len(cursors)} von {pages} ({total:,} Spieler-Saisons)")
+with col_next:
+    if st.button("Weiter →", disabled=next_after is None):
+        cursors.append(next_after)
+        st.rerun()
 
 # Footer
-st.sidebar.info(f"Datenstand: {len(df_top)} Spieler geladen.")
\ No newline at end of file
+st.sidebar.info(f"Datenstand: {len(df_top)} Spieler geladen.")
+summary = catalog_summary()
+if not summary.empty:
+    current = summary[summary["season"] == selected_season]
+    if not current.empty and pd.notna(current["ingested_at"].iloc[0]):
+        st.sidebar.caption(f"Letzter Ingest {selected_season}: {current['ingested_at'].iloc[0]}")
+
+
+@st.fragment(run_every=RELOAD_SECONDS)
+def watch_generation():
+    """
+    Läuft alle RELOAD_SECONDS für sich allein (nicht die ganze Seite): hat ein
+    Ingest die Generation erhöht, wird die Seite neu aufgebaut. Die Caches
+    sind pro Saison versioniert - neu gerechnet wird nur, was sich geändert hat.
+    """
+    generation = db_generation()
+    seen = st.session_state.setdefault("db_generation", generation)
+    if generation != seen:
+        st.session_state["db_generation"] = generation
+        st.toast("Neue Daten geladen")
+        st.rerun(scope="app")
+    st.caption(f"DB-Generation: {generation if generation is not None else '-'}")
+
+
+with st.sidebar:
+    watch_generation()
+cache = cache_stats()
+st.sidebar.caption(
+    f"Query-Cache: {cache['hits']} Treffer / {cache['misses']} Misses "
+    f"({cache['entries']} Einträge, {cache['bytes'] / 1024:.0f} KB)"
+)
\ No newline at end of file
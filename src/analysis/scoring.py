@@ -0,0 +1,117 @@
+"""
+src/analysis/scoring.py
+
+Fantasy-Punkte aus den normalisierten Gamelog-Spalten.
+
+Ein Regelwerk ist ein Dict Spalte -> Punkte pro Einheit, z.B.
+{"passing_yards": 0.04, "passing_tds": 4, "receptions": 1, ...}. Eingebaut sind
+"standard", "half_ppr" und "ppr"; eigene Regelwerke kommen als Dict, JSON-String
+oder Pfad zu einer JSON-Datei.
+
+Gerechnet wird ohne apply: die Stat-Spalten als Matrix X (Zeilen x Spalten),
+alle Regelwerke als Gewichtsmatrix W (Spalten x Regelwerke) -> Punkte = X @ W,
+ein einziges Matrixprodukt für beliebig viele Spieler-Wochen und Regelwerke.
+"""
+
+from pathlib import Path
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+from utils.schema import STAT_COLUMNS
+
+_STANDARD = {
+    "passing_yards": 0.04,
+    "passing_tds": 4,
+    "interceptions": -2,
+    "rushing_yards": 0.1,
+    "rushing_tds": 6,
+    "receptions": 0,
+    "receiving_yards": 0.1,
+    "receiving_tds": 6,
+    "fumbles_lost": -2,
+}
+
+RULESETS = {
+    "standard": _STANDARD,
+    "half_ppr": {**_STANDARD, "receptions": 0.5},
+    "ppr": {**_STANDARD, "receptions": 1},
+}
+DEFAULT_RULESET = "ppr"
+
+
+def load_rules(spec=DEFAULT_RULESET, columns=STAT_COLUMNS) -> dict:
+    """
+    Regelwerk aus einem Namen (RULESETS), einem Dict, einem JSON-String oder
+    einer JSON-Datei. Gibt {spalte: float} zurück; ValueError bei Unsinn,
+    auch bei Spalten außerhalb von `columns` - ein Tippfehler würde sonst
+    still mit 0 Punkten gewertet (stat_matrix füllt fehlende Spalten mit 0).
+    """
+    if isinstance(spec, dict):
+        rules = spec
+    elif isinstance(spec, str) and spec in RULESETS:
+        rules = RULESETS[spec]
+    elif isinstance(spec, str) and spec.lstrip().startswith("{"):
+        rules = json.loads(spec)
+    elif isinstance(spec, (str, Path)) and Path(spec).is_file():
+        rules = json.loads(Path(spec).read_text())
+    else:
+        raise ValueError(f"Unknown scoring rules: {spec!r} (expected one of {list(RULESETS)}, a dict or JSON)")
+
+    if not isinstance(rules, dict) or not rules:
+        raise ValueError("Scoring rules must be a non-empty JSON object of column -> points")
+    result = {}
+    for col, points in rules.items():
+        if not isinstance(col, str) or col not in columns:
+            raise ValueError(f"Unknown stat column in scoring rules: {col!r} (expected one of {list(columns)})")
+        if isinstance(points, bool) or not isinstance(points, (int, float)):
+            raise ValueError(f"Points for {col!r} must be a number, got {points!r}")
+        result[col] = float(points)
+    return result
+
+
+def rules_key(rules: dict) -> str:
+    """Kurzer, stabiler Hash eines Regelwerks (Schlüssel im Punkte-Cache der DB)."""
+    canonical = json.dumps(sorted(rules.items()), separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+def weight_matrix(rulesets: dict):
+    """(spalten, W) mit W[i, j] = Punkte pro Einheit von spalten[i] im Regelwerk j."""
+    columns = sorted({c for rules in rulesets.values() for c in rules})
+    W = np.array([[rules.get(c, 0.0) for rules in rulesets.values()] for c in columns], dtype=np.float64)
+    return columns, W.reshape(len(columns), len(rulesets))
+
+
+def stat_matrix(gamelogs: pd.DataFrame, columns) -> np.ndarray:
+    """Die Spalten als float64-Matrix (fehlende Spalten/Werte = 0)."""
+    frame = gamelogs.reindex(columns=columns, fill_value=0)
+    for col in columns:
+        if not pd.api.types.is_numeric_dtype(frame[col]):
+            frame[col] = pd.to_numeric(frame[col], errors="coerce")
+    return frame.to_numpy(dtype=np.float64, na_value=0.0)
+
+
+def score(gamelogs: pd.DataFrame, rulesets: dict) -> pd.DataFrame:
+    """
+    Punkte pro Zeile für jedes Regelwerk (eine Spalte pro Name in `rulesets`).
+    Spalten, die in `gamelogs` fehlen, zählen als 0.
+    """
+    columns, W = weight_matrix(rulesets)
+    return pd.DataFrame(stat_matrix(gamelogs, columns) @ W, columns=list(rulesets), index=gamelogs.index)
+
+
+def points_by_player(gamelogs: pd.DataFrame, rulesets: dict) -> pd.DataFrame:
+    """
+    Saison-Punkte pro Spieler: player_id, games und eine Spalte pro Regelwerk.
+    Summiert wird per bincount über die faktorisierten player_ids statt groupby.
+    """
+    columns, W = weight_matrix(rulesets)
+    points = stat_matrix(gamelogs, columns) @ W
+    codes, players = pd.factorize(gamelogs["player_id"].astype(str), sort=False)
+    result = pd.DataFrame({"player_id": players, "games": np.bincount(codes, minlength=len(players))})
+    for j, name in enumerate(rulesets):
+        result[name] = np.bincount(codes, weights=points[:, j], minlength=len(players))
+    return result
@@ -0,0 +1,168 @@
+"""
+src/analysis/similarity.py
+
+"Spieler wie X": Nächste-Nachbarn-Suche über Saison-Stat-Vektoren.
+
+Beim Ingest wird aus gamelogs (+ players für die Position) pro
+(season, player_id) ein Feature-Vektor gebaut - Spiele plus Schnitt pro
+Spiel jeder Stat-Spalte -, spaltenweise z-standardisiert und als .npy-Dateien
+unter db/similarity/ abgelegt:
+
+    features.npy   float32 (n, d)   z-standardisierte Features
+    norms.npy      float32 (n,)     Zeilen-Normen (für Cosine/Euklid)
+    player_id.npy  str     (n,)
+    season.npy     int16   (n,)
+    position.npy   str     (n,)
+    meta.json      Feature-Namen, Mittelwerte, Standardabweichungen
+
+Abfragen laden die Dateien mit mmap_mode="r" (nur die benötigten Seiten
+landen im Speicher) und sind ein Matrix-Vektor-Produkt plus argpartition.
+"""
+
+from pathlib import Path
+import json
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+
+METRICS = ("cosine", "euclidean")
+ARRAYS = ("features", "norms", "player_id", "season", "position")
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def season_features(conn, stat_cols) -> pd.DataFrame:
+    """Ein Zeile pro (season, player_id): games + <stat>_per_game, dazu die Position."""
+    g_cols = [r[1] for r in conn.execute("PRAGMA table_info(gamelogs)")]
+    p_cols = [r[1] for r in conn.execute("PRAGMA table_info(players)")]
+    stat_cols = [c for c in stat_cols if c in g_cols]
+    if not {"season", "player_id"} <= set(g_cols) or not stat_cols:
+        return pd.DataFrame()
+
+    sums = ", ".join(f"SUM(COALESCE(g.{_quote(c)}, 0)) * 1.0 / COUNT(*) AS {_quote(c + '_per_game')}"
+                     for c in stat_cols)
+    has_position = {"season", "player_id", "position"} <= set(p_cols)
+    position = "p.position" if has_position else "NULL"
+    join = ("LEFT JOIN players p ON p.season = g.season AND p.player_id = g.player_id"
+            if has_position else "")
+    return pd.read_sql(
+        f"""SELECT g.season AS season, CAST(g.player_id AS TEXT) AS player_id,
+                   {position} AS position, COUNT(*) AS games, {sums}
+            FROM gamelogs g {join}
+            WHERE g.player_id IS NOT NULL
+            GROUP BY g.season, g.player_id
+            ORDER BY g.season, g.player_id""",
+        conn,
+    )
+
+
+def _save(path: Path, arr):
+    # über ein Datei-Handle, sonst hängt np.save ".npy" an
+    with open(path, "wb") as f:
+        np.save(f, arr)
+
+
+def build_index(conn, out_dir: Path, stat_cols) -> int:
+    """
+    Baut den Index komplett neu und ersetzt `out_dir` erst am Ende (neuer
+    Ordner + rename), sodass Leser nie eine halbe Version sehen.
+    Gibt die Anzahl Zeilen zurück (0 = nichts gebaut).
+    """
+    df = season_features(conn, stat_cols)
+    if df.empty:
+        return 0
+    feature_names = ["games"] + [c for c in df.columns if c.endswith("_per_game")]
+    X = df[feature_names].to_numpy(dtype=np.float64)
+    mean = X.mean(axis=0)
+    std = X.std(axis=0)
+    std[std == 0] = 1.0
+    X = ((X - mean) / std).astype(np.float32)
+
+    out_dir = Path(out_dir)
+    tmp = out_dir.with_name(f".{out_dir.name}.{uuid.uuid4().hex}")
+    tmp.mkdir(parents=True)
+    try:
+        _save(tmp / "features.npy", X)
+        _save(tmp / "norms.npy", np.linalg.norm(X, axis=1).astype(np.float32))
+        _save(tmp / "player_id.npy", df["player_id"].astype(str).to_numpy(dtype=str))
+        _save(tmp / "season.npy", df["season"].to_numpy(dtype=np.int16))
+        _save(tmp / "position.npy", df["position"].fillna("").astype(str).to_numpy(dtype=str))
+        (tmp / "meta.json").write_text(json.dumps({
+            "features": feature_names,
+            "mean": mean.tolist(),
+            "std": std.tolist(),
+            "rows": len(df),
+        }, indent=2))
+
+        # eindeutiger Name: ein Rest eines abgebrochenen Laufs blockiert das rename nie
+        old = out_dir.with_name(f".{out_dir.name}.old-{uuid.uuid4().hex}")
+        if out_dir.exists():
+            out_dir.rename(old)
+        tmp.rename(out_dir)
+        shutil.rmtree(old, ignore_errors=True)
+        for leftover in out_dir.parent.glob(f".{out_dir.name}.old*"):
+            shutil.rmtree(leftover, ignore_errors=True)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return len(df)
+
+
+class SimilarityIndex:
+    """Die memory-mapped Arrays eines Index-Ordners."""
+
+    def __init__(self, index_dir: Path):
+        index_dir = Path(index_dir)
+        self.meta = json.loads((index_dir / "meta.json").read_text())
+        for name in ARRAYS:
+            setattr(self, name, np.load(index_dir / f"{name}.npy", mmap_mode="r"))
+
+    def __len__(self):
+        return len(self.player_id)
+
+    def row(self, player_id, season=None):
+        """Zeile eines Spielers (ohne Saison: seine letzte). None, wenn unbekannt."""
+        rows = np.flatnonzero(self.player_id == str(player_id))
+        if season is not None:
+            rows = rows[self.season[rows] == int(season)]
+        if rows.size == 0:
+            return None
+        return int(rows[np.argmax(self.season[rows])])
+
+    def query(self, row, k=10, metric="cosine", positions=None, seasons=None):
+        """
+        Top-k Nachbarn einer Zeile: ein Matrix-Vektor-Produkt über alle Zeilen,
+        Filter als Maske, argpartition statt vollständiger Sortierung.
+        Gibt (zeilen, scores) zurück - Cosine: Ähnlichkeit (größer = näher),
+        Euklid: Distanz (kleiner = näher).
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric!r} (expected one of {METRICS})")
+        q = np.asarray(self.features[row], dtype=np.float32)
+        dots = self.features @ q
+        if metric == "cosine":
+            denom = self.norms * max(float(np.linalg.norm(q)), 1e-12)
+            scores = dots / np.maximum(denom, 1e-12)
+            rank = -scores
+        else:
+            sq = np.maximum(self.norms.astype(np.float64) ** 2 - 2 * dots + float(q @ q), 0.0)
+            scores = np.sqrt(sq)
+            rank = scores.copy()
+
+        mask = np.ones(len(self), dtype=bool)
+        mask[row] = False
+        if positions:
+            mask &= np.isin(self.position, list(positions))
+        if seasons:
+            mask &= np.isin(self.season, [int(s) for s in seasons])
+        rank = np.where(mask, rank, np.inf)
+
+        k = min(int(k), int(mask.sum()))
+        if k <= 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        top = np.argpartition(rank, k - 1)[:k]
+        top = top[np.argsort(rank[top], kind="stable")]
+        return top, scores[top]
@@ -1,39 +1,322 @@
-import sqlite3
+import sys
 import pandas as pd
 from pathlib import Path
-import plotly.express as px
+
+ROOT = Path(__file__).parents[2] # repo root
+sys.path.insert(0, str(ROOT / "src"))
+
+from analysis import scoring as fantasy
+from analysis import similarity
+from utils import profiling
+from utils.cache import QueryCache, cached
+from utils.db import get_pool
+from utils.images import ImageCache
+from utils import io as store
+from utils.schema import STAT_COLUMNS, apply_schema
 
 
 DB_PATH = Path("db/nfl.db")
 
+# Ein Cache für alle Query-Ergebnisse dieses Prozesses (z.B. alle Streamlit-Sessions)
+QUERY_CACHE = QueryCache(maxsize=256, ttl=600, max_bytes=128 * 1024 * 1024)
+
+TOTALS_TABLE = "player_season_totals"
+CATALOG_TABLE = "catalog"
+# Generation pro Saison (pflegt etl/ingest.bump_generation) -> saisonbezogene Cache-Schlüssel
+SEASON_GENERATIONS_TABLE = "season_generations"
+
+# Sortierung der Top-Spieler: Summen aus SQL oder Fantasy-Punkte (analysis.scoring)
+TOP_SORT_COLUMNS = ("yards", "td", "fantasy_points")
+# Vom Ingest vorberechnete Saison-Punkte pro Regelwerk (Schlüssel: scoring.rules_key)
+FANTASY_TABLE = "fantasy_points"
+
+HEADSHOT_QUERY = "SELECT player_id, headshot_url FROM players WHERE player_id IN ({marks})"
+HEADSHOT_PLACEHOLDER = "https://via.placeholder.com/150"
+# Thumbnails der Headshots auf der Platte (neben der DB), LRU bis 64 MB
+IMAGE_CACHE = ImageCache(DB_PATH.parent / "headshots")
+
+# Vom Ingest gebauter, memory-mapped Feature-Index für "Spieler wie X"
+SIMILARITY_DIR = DB_PATH.parent / "similarity"
+_similarity_index = {}  # (ordner, mtime von meta.json) -> SimilarityIndex
+
+# Spieler-Explorer: erlaubte Sortierspalten -> SQL-Ausdruck (nie Nutzereingaben ins SQL)
+EXPLORER_SORT_COLUMNS = {
+    "yards": "t.yards",
+    "td": "t.td",
+    "games": "t.games",
+    "full_name": "COALESCE(p.full_name, '')",
+}
+EXPLORER_COLUMNS = ["season", "player_id", "full_name", "team", "position", "games", "yards", "td",
+                    "yards_rank", "position_rank"]
+
+# Wochen-Auswertung: kumulierte Summen, gleitender Schnitt über die letzten
+# ROLLING_WEEKS Spiele und Veränderung zur Vorwoche, pro Spieler und Saison
+WEEKLY_TABLE = "weekly_stats"
+WEEKLY_DIGESTS_TABLE = "weekly_digests"
+ROLLING_WEEKS = 4
+
 def check_columns():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("PRAGMA table_info(players)")
-    cols = cursor.fetchall()
-    print("Spalten in der Tabelle 'players':", [c[1] for c in cols])
-    conn.close()
+    print("Spalten in der Tabelle 'players':", get_table_columns("players"))
+
+def db_generation(seasons=None):
+    """
+    Versions-Stempel der DB für Cache-Schlüssel: die Ingest-Generation
+    (PRAGMA user_version, wird von ingest.py hochgezählt). None ohne DB.
+    Mit `seasons` (eine Saison oder mehrere) nur die Generationen dieser
+    Saisons aus season_generations - ein Ingest von 2024 lässt die Caches von
+    2023 stehen. seasons=None oder eine None-Saison (= alle) -> globale Generation.
+    """
+    if not DB_PATH.exists():
+        return None
+    if seasons is not None and not isinstance(seasons, (list, tuple, set, range)):
+        seasons = [seasons]
+    with get_pool(DB_PATH).connection() as conn:
+        if seasons is None or None in seasons or not _has_table(conn, SEASON_GENERATIONS_TABLE):
+            return conn.execute("PRAGMA user_version").fetchone()[0]
+        seasons = sorted({int(s) for s in seasons})
+        placeholders = ", ".join("?" * len(seasons))
+        return tuple(conn.execute(
+            f"SELECT season, generation FROM {SEASON_GENERATIONS_TABLE} WHERE season IN ({placeholders}) ORDER BY season",
+            seasons,
+        ).fetchall())
 
-def get_data_from_db(query):
+def cache_version(seasons=None):
+    """
+    Versions-Stempel für @cached: welche DB-Datei (Pfad, inode, mtime) und
+    deren Generation. Eine neu angelegte DB am selben Pfad fängt wieder bei
+    Generation 0 an und bekommt evtl. die alte inode wieder - die mtime
+    unterscheidet sie trotzdem; ebenso trifft eine andere DB (z.B. ein
+    umgebogenes DB_PATH in Tests) keine alten Einträge. Mit WAL ändert sich
+    die Hauptdatei nur beim Checkpoint eines Schreibers, also nach Ingests.
+    """
+    try:
+        st = DB_PATH.stat()
+    except FileNotFoundError:
+        return None
+    identity = (str(DB_PATH.resolve()), st.st_ino, st.st_mtime_ns)
+    return identity, db_generation(seasons)
+
+def _has_table(conn, name) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone() is not None
+
+def _season_range(arguments):
+    """Cache-Scope von get_player_seasons: alle Saisons des Bereichs."""
+    first, last = arguments["first_season"], arguments["last_season"]
+    last = first if last is None else last
+    return range(min(first, last), max(first, last) + 1)
+
+def cache_stats():
+    """Hit/Miss-Zähler des Query-Caches (z.B. für die Sidebar)."""
+    return QUERY_CACHE.stats()
+
+def get_data_from_db(query, params=None):
     """
     Diese Funktion verbindet sich mit der Datenbank, führt einen 
     Befehl (Query) aus und gibt das Ergebnis als Pandas DataFrame zurück.
+    Werte werden als `params` gebunden, nie in den SQL-String formatiert.
+    Die Verbindung kommt aus dem Nur-Lese-Pool (utils.db): kein Connect pro
+    Query, und gleiches SQL wird aus dem Statement-Cache der Verbindung genommen.
     """
     if not DB_PATH.exists():
         print("Fehler: Datenbank nicht gefunden! Hast du ingest.py schon ausgeführt?")
         return pd.DataFrame() # returns empty df
     
-    conn = sqlite3.connect(DB_PATH)
-    # pd.read_sql macht die ganze Arbeit: Verbindung öffnen, Daten holen, Tabelle erstellen
-    df = pd.read_sql(query, conn)
-    conn.close()
+    with profiling.span("stats.sql", kind="sql", query=query[:80]) as sp:
+        with get_pool(DB_PATH).connection() as conn:
+            # pd.read_sql macht die ganze Arbeit: Daten holen, Tabelle erstellen
+            df = pd.read_sql(query, conn, params=params)
+        sp.rows_out = len(df)
     return df
 
-def get_top_offensive_players(season=2023, top_n=10, positions=None, teams=None):
+def get_table_columns(table):
+    """Gibt die Spaltennamen einer Tabelle zurück (leere Liste, falls sie fehlt)."""
+    info = get_data_from_db("SELECT name FROM pragma_table_info(?)", [table])
+    if info.empty:
+        return []
+    return info["name"].tolist()
+
+def _quote(col):
+    return '"' + str(col).replace('"', '""') + '"'
+
+def build_top_players_query(season, top_n=10, positions=None, teams=None,
+                            player_cols=None, gamelog_cols=None, from_totals=False, order_by="yards"):
+    """
+    Baut EIN parametrisiertes SQL-Statement für die Top-Spieler:
+    Filter auf Saison/Position/Team, GROUP BY player_id, Join auf players,
+    ORDER BY <order_by> DESC LIMIT ? (ohne LIMIT bei top_n=None).
+    Gibt (sql, params) zurück.
+
+    `player_cols` / `gamelog_cols` sind die tatsächlichen Spalten der Tabellen;
+    fehlende yards/td werden als 0 summiert, `season` in players (falls
+    vorhanden) wird mitgejoint, damit Spieler pro Saison nur einmal auftauchen.
+    Mit `from_totals=True` wird statt der Aggregation über gamelogs die
+    materialisierte Tabelle player_season_totals gelesen.
+    """
+    if order_by not in ("yards", "td"):
+        raise ValueError(f"Unknown order_by: {order_by!r} (expected 'yards' or 'td')")
+    player_cols = list(player_cols or [])
+    gamelog_cols = list(gamelog_cols or [])
+
+    select_players = [f"p.{_quote(c)}" for c in player_cols if c not in ("player_id", "yards", "td")]
+    select_cols = ["s.player_id", "s.yards", "s.td"] + select_players
+
+    if from_totals:
+        source = f"{TOTALS_TABLE} s"
+        filter_alias = "s"
+        params = []
+        where = ["s.season = ?"]
+        params.append(int(season))
+    else:
+        sums = []
+        for col in ["yards", "td"]:
+            if col in gamelog_cols:
+                sums.append(f"SUM(COALESCE(g.{_quote(col)}, 0)) AS {col}")
+            else:
+                sums.append(f"0 AS {col}")
+        source = (
+            "(SELECT g.player_id AS player_id, " + ", ".join(sums) + " "
+            "FROM gamelogs g WHERE g.season = ? GROUP BY g.player_id) s"
+        )
+        filter_alias = "p"
+        params = [int(season)]
+        where = []
+
+    join_on = "p.player_id = s.player_id"
+    if "season" in player_cols:
+        join_on += " AND p.season = ?"
+        params.append(int(season))
+
+    # Position/Team stehen in player_season_totals denormalisiert -> dort filtern (Index)
+    if positions and "position" in player_cols:
+        where.append(f"{filter_alias}.position IN ({', '.join('?' * len(positions))})")
+        params.extend(positions)
+    if teams and "team" in player_cols:
+        where.append(f"{filter_alias}.team IN ({', '.join('?' * len(teams))})")
+        params.extend(teams)
+
+    sql = (
+        f"SELECT {', '.join(select_cols)} "
+        f"FROM {source} JOIN players p ON {join_on}"
+        + (f" WHERE {' AND '.join(where)}" if where else "")
+        + f" ORDER BY s.{order_by} DESC"
+    )
+    if top_n is not None:
+        sql += " LIMIT ?"
+        params.append(int(top_n))
+    return sql, params
+
+def _is_sql_compatible(player_cols, gamelog_cols):
+    """Prüft, ob die Tabellen sauber genug für den SQL-Pfad sind."""
+    for cols in [player_cols, gamelog_cols]:
+        if not cols or "player_id" not in cols or "0" in cols:
+            return False
+    return "season" in gamelog_cols
+
+@cached(QUERY_CACHE, version=cache_version, scope="season")
+@profiling.profiled("stats.top_players", kind="stage")
+def get_top_offensive_players(season=2023, top_n=10, positions=None, teams=None, backend="sqlite",
+                              sort_by="yards", scoring=None):
     """
     Holt Spieler- und Statistiken-Daten, bereinigt sie und filtert nach 
     Saison, Position und Team.
+    Filter, Aggregation und Top-N laufen direkt in SQLite, sodass nur die
+    Top-N Zeilen die Datenbank verlassen. Gibt es die vom Ingest gepflegte
+    Tabelle player_season_totals, wird direkt daraus gelesen. Alte, seltsam
+    geformte Tabellen (z.B. Header als Zeile '0') laufen über den pandas-Pfad.
+    Mit backend="parquet" wird stattdessen der partitionierte Parquet-Store
+    (utils.io) gescannt, ganz ohne SQLite.
+    sort_by: "yards", "td" oder "fantasy_points". Mit `scoring` (Regelwerk,
+    siehe analysis.scoring.load_rules; Standard bei sort_by="fantasy_points":
+    "ppr") bekommt das Ergebnis eine Spalte fantasy_points.
+    """
+    if sort_by not in TOP_SORT_COLUMNS:
+        raise ValueError(f"Unknown sort_by: {sort_by!r} (expected one of {TOP_SORT_COLUMNS})")
+    if sort_by == "fantasy_points" or scoring is not None:
+        return _top_offensive_players_fantasy(season, top_n, positions, teams, backend, sort_by,
+                                              scoring or fantasy.DEFAULT_RULESET)
+    return _top_offensive_players(season, top_n, positions, teams, backend, sort_by)
+
+def _top_offensive_players_fantasy(season, top_n, positions, teams, backend, sort_by, scoring):
+    """Alle gefilterten Spieler der Saison + ihre Fantasy-Punkte, dann sortieren und Top-N."""
+    with profiling.span("stats.fantasy_rank", kind="pandas") as sp:
+        order = "yards" if sort_by == "fantasy_points" else sort_by
+        candidates = _top_offensive_players(season, None, positions, teams, backend, order)
+        if candidates.empty:
+            return candidates
+        points = get_fantasy_points(season, scoring)[["player_id", "fantasy_points"]]
+        sp.rows_in = len(candidates)
+        top = candidates.assign(player_id=candidates["player_id"].astype(str)).merge(points, on="player_id", how="left")
+        top["fantasy_points"] = top["fantasy_points"].fillna(0.0)
+        top = top.sort_values([sort_by, "player_id"], ascending=[False, True], kind="stable")
+        if top_n is not None:
+            top = top.head(int(top_n))
+        return top.reset_index(drop=True)
+
+def _top_offensive_players(season, top_n, positions, teams, backend, sort_by):
+    """Top-N nach yards/td (top_n=None: alle gefilterten Spieler)."""
+    if backend == "parquet":
+        return _top_offensive_players_store(season, top_n, positions, teams, sort_by)
+    if backend != "sqlite":
+        raise ValueError(f"Unknown backend: {backend!r} (expected 'sqlite' or 'parquet')")
+
+    if not DB_PATH.exists():
+        return pd.DataFrame()
+
+    player_cols = get_table_columns("players")
+    gamelog_cols = get_table_columns("gamelogs")
+
+    if not _is_sql_compatible(player_cols, gamelog_cols):
+        return _top_offensive_players_pandas(season, top_n, positions, teams, sort_by)
+
+    sql, params = build_top_players_query(
+        season, top_n, positions, teams,
+        player_cols=player_cols, gamelog_cols=gamelog_cols,
+        from_totals=bool(get_table_columns(TOTALS_TABLE)), order_by=sort_by,
+    )
+    top = get_data_from_db(sql, params)
+    with profiling.span("stats.apply_schema", kind="pandas") as sp:
+        sp.rows_in = len(top)
+        return apply_schema(top, "player_season_totals", "players")
+
+@profiling.profiled("stats.top_players_store", kind="io")
+def _top_offensive_players_store(season=2023, top_n=10, positions=None, teams=None, sort_by="yards"):
+    """
+    Top-N direkt aus dem Parquet-Store: gelesen werden nur player_id/yards/td
+    der einen Saison (Projektion + Partition-Pruning), aggregiert in Arrow.
     """
+    gamelog_cols = store.dataset_columns("gamelogs")
+    player_cols = store.dataset_columns("players")
+    if "player_id" not in gamelog_cols or "player_id" not in player_cols:
+        return pd.DataFrame()
+
+    stats_cols = [c for c in ["yards", "td"] if c in gamelog_cols]
+    gamelogs = store.read_dataset(
+        "gamelogs", columns=["player_id"] + stats_cols, where={"season": int(season)}
+    )
+    totals = gamelogs.group_by("player_id").aggregate([(c, "sum") for c in stats_cols])
+    totals = totals.rename_columns([c.removesuffix("_sum") for c in totals.column_names])
+
+    where = {"season": int(season)}
+    if positions and "position" in player_cols:
+        where["position"] = list(positions)
+    if teams and "team" in player_cols:
+        where["team"] = list(teams)
+    players = store.read_dataset("players", where=where)
+    players = players.drop_columns([c for c in ["yards", "td"] if c in players.column_names])
+
+    combined = totals.join(players, "player_id", join_type="inner").to_pandas()
+    for col in ["yards", "td"]:
+        if col not in combined.columns:
+            combined[col] = 0
+    rest = [c for c in combined.columns if c not in ("player_id", "yards", "td")]
+    top = combined[["player_id", "yards", "td"] + rest].sort_values(sort_by, ascending=False)
+    if top_n is not None:
+        top = top.head(top_n)
+    return apply_schema(top.reset_index(drop=True), "player_season_totals", "players")
+
+@profiling.profiled("stats.top_players_pandas", kind="pandas")
+def _top_offensive_players_pandas(season=2023, top_n=10, positions=None, teams=None, sort_by="yards"):
+    """Fallback: lädt beide Tabellen komplett und rechnet in pandas."""
     players = get_data_from_db("SELECT * FROM players")
     gamelogs = get_data_from_db("SELECT * FROM gamelogs")
 
@@ -93,19 +376,595 @@ def get_top_offensive_players(season=2023, top_n=10, positions=None, teams=None)
     combined = player_stats.merge(players, on="player_id", how="inner")
     
     # Sortieren und Top N zurückgeben
-    return combined.sort_values(by="yards", ascending=False).head(top_n)
+    top = combined.sort_values(by=sort_by, ascending=False)
+    if top_n is not None:
+        top = top.head(top_n)
+    return apply_schema(top, "player_season_totals", "players")
+
+def _explorer_filters(season=None, positions=None, teams=None, name=None):
+    """WHERE-Teile + Parameter für den Explorer (Saison/Position/Team/Namenssuche)."""
+    where, params = [], []
+    if season is not None:
+        where.append("t.season = ?")
+        params.append(int(season))
+    if positions:
+        where.append(f"t.position IN ({', '.join('?' * len(positions))})")
+        params.extend(positions)
+    if teams:
+        where.append(f"t.team IN ({', '.join('?' * len(teams))})")
+        params.extend(teams)
+    if name:
+        where.append("p.full_name LIKE ?")
+        params.append(f"%{name}%")
+    return where, params
+
+def build_player_page_query(sort="yards", descending=True, after=None, page_size=50,
+                            season=None, positions=None, teams=None, name=None):
+    """
+    Keyset-Pagination über player_season_totals: statt OFFSET (liest alle
+    übersprungenen Zeilen) setzt die nächste Seite hinter dem Schlüssel der
+    letzten Zeile an - `after` = (sortierwert, season, player_id).
+    Sortiert wird nach (sort, season, player_id), damit der Schlüssel eindeutig
+    ist; mit Saison-Filter deckt ein Index (season, sort, player_id) das ORDER BY ab.
+    Gibt (sql, params) zurück; es wird eine Zeile mehr geholt als page_size,
+    um zu wissen, ob es eine nächste Seite gibt.
+    """
+    if sort not in EXPLORER_SORT_COLUMNS:
+        raise ValueError(f"Unknown sort column: {sort!r} (expected one of {list(EXPLORER_SORT_COLUMNS)})")
+    key = EXPLORER_SORT_COLUMNS[sort]
+    direction = "DESC" if descending else "ASC"
+
+    where, params = _explorer_filters(season, positions, teams, name)
+    if after is not None:
+        where.append(f"({key}, t.season, t.player_id) {'<' if descending else '>'} (?, ?, ?)")
+        params.extend(after)
+
+    select = ", ".join(
+        "p.full_name" if c == "full_name" else f"t.{c}" for c in EXPLORER_COLUMNS
+    )
+    sql = (
+        f"SELECT {select}, {key} AS sort_key FROM {TOTALS_TABLE} t "
+        "LEFT JOIN players p ON p.season = t.season AND p.player_id = t.player_id"
+        + (f" WHERE {' AND '.join(where)}" if where else "")
+        + f" ORDER BY {key} {direction}, t.season {direction}, t.player_id {direction} LIMIT ?"
+    )
+    params.append(int(page_size) + 1)
+    return sql, params
+
+@cached(QUERY_CACHE, version=cache_version, scope="season")
+def get_player_page(sort="yards", descending=True, after=None, page_size=50,
+                    season=None, positions=None, teams=None, name=None):
+    """
+    Eine Seite des Spieler-Explorers (eine Zeile pro Spieler-Saison).
+    Gibt (df, next_after) zurück: df hat höchstens page_size Zeilen,
+    next_after ist der Schlüssel für die nächste Seite (None = letzte Seite).
+    """
+    if not get_table_columns(TOTALS_TABLE):
+        return pd.DataFrame(columns=EXPLORER_COLUMNS), None
+    sql, params = build_player_page_query(sort, descending, after, page_size, season, positions, teams, name)
+    page = get_data_from_db(sql, params)
+    next_after = None
+    if len(page) > page_size:
+        page = page.iloc[:page_size]
+        # numpy-Skalare -> Python-Werte, sonst kann sqlite3 sie nicht binden
+        last = page[["sort_key", "season", "player_id"]].iloc[-1]
+        next_after = tuple(v.item() if hasattr(v, "item") else v for v in last)
+    return page.drop(columns="sort_key").reset_index(drop=True), next_after
+
+@cached(QUERY_CACHE, version=cache_version, scope="season")
+def count_players(season=None, positions=None, teams=None, name=None):
+    """Anzahl Spieler-Saisons für die Explorer-Filter (für "Seite x von y")."""
+    if not get_table_columns(TOTALS_TABLE):
+        return 0
+    where, params = _explorer_filters(season, positions, teams, name)
+    join = "LEFT JOIN players p ON p.season = t.season AND p.player_id = t.player_id " if name else ""
+    sql = (f"SELECT COUNT(*) AS n FROM {TOTALS_TABLE} t {join}"
+           + (f"WHERE {' AND '.join(where)}" if where else ""))
+    return int(get_data_from_db(sql, params)["n"].iloc[0])
+
+def leaderboard_columns():
+    """Stat-Spalten, nach denen Leaderboards sortieren dürfen (games + STAT_COLUMNS in gamelogs)."""
+    gamelog_cols = get_table_columns("gamelogs")
+    return ["games"] + [c for c in STAT_COLUMNS if c in gamelog_cols]
+
+def build_player_seasons_query(first_season, last_season, stat_cols, player_cols=None,
+                               positions=None, teams=None):
+    """
+    EIN gruppiertes Statement über gamelogs für einen Saison-Bereich:
+    pro (player_id, season) Spiele und Summen der `stat_cols`, dazu per
+    Window-Funktion die Karriere-Summen (über die gewählten Saisons) jedes
+    Spielers. Position/Team/Name kommen aus players der jeweiligen Saison.
+    Gibt (sql, params) zurück.
+    """
+    player_cols = list(player_cols or [])
+    sums = ", ".join(f"SUM(COALESCE(g.{_quote(c)}, 0)) AS {_quote(c)}" for c in stat_cols)
+    career = ", ".join(
+        f"SUM({_quote(c)}) OVER w AS {_quote('career_' + c)}" for c in ["games"] + list(stat_cols)
+    )
+    has_roster = {"season", "player_id"} <= set(player_cols)
+    info = [c for c in ["full_name", "team", "position"] if has_roster and c in player_cols]
+    select_info = "".join(f", p.{c}" for c in info)
+    join = "LEFT JOIN players p ON p.season = s.season AND p.player_id = s.player_id" if has_roster else ""
+
+    params = [int(first_season), int(last_season)]
+    where = []
+    if positions and "position" in info:
+        where.append(f"p.position IN ({', '.join('?' * len(positions))})")
+        params.extend(positions)
+    if teams and "team" in info:
+        where.append(f"p.team IN ({', '.join('?' * len(teams))})")
+        params.extend(teams)
+
+    sql = (
+        f"WITH s AS (SELECT g.season AS season, g.player_id AS player_id, COUNT(*) AS games, {sums} "
+        "FROM gamelogs g WHERE g.season BETWEEN ? AND ? GROUP BY g.season, g.player_id) "
+        f"SELECT s.*{select_info}, {career} FROM s {join}"
+        + (f" WHERE {' AND '.join(where)}" if where else "")
+        + " WINDOW w AS (PARTITION BY s.player_id) ORDER BY s.player_id, s.season"
+    )
+    return sql, params
+
+@cached(QUERY_CACHE, version=cache_version, scope=_season_range)
+@profiling.profiled("stats.player_seasons", kind="stage")
+def get_player_seasons(first_season, last_season=None, stat_cols=None, positions=None, teams=None):
+    """
+    Spieler-Saisons von first_season bis last_season (inklusive) in einem Durchgang:
+    eine Zeile pro (player_id, season) mit games, den Stat-Spalten und
+    <stat>_per_game, plus career_games / career_<stat> / career_<stat>_per_game
+    über alle gewählten Saisons. `stat_cols` (Standard: alle STAT_COLUMNS in
+    gamelogs) muss aus leaderboard_columns() kommen, sonst ValueError.
+    """
+    last_season = first_season if last_season is None else last_season
+    if first_season > last_season:
+        first_season, last_season = last_season, first_season
+    if not DB_PATH.exists():
+        return pd.DataFrame()
+    allowed = leaderboard_columns()
+    stat_cols = [c for c in (stat_cols or allowed) if c != "games"]
+    unknown = [c for c in stat_cols if c not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown stat column(s): {unknown} (expected some of {allowed})")
+    if "season" not in get_table_columns("gamelogs"):
+        return pd.DataFrame()
 
-def plot_top_players_bar(topn_df):
-    """Erstellt das Balkendiagramm mit Plotly."""
+    sql, params = build_player_seasons_query(
+        first_season, last_season, stat_cols, get_table_columns("players"), positions, teams,
+    )
+    df = get_data_from_db(sql, params)
+    with profiling.span("stats.per_game", kind="pandas") as sp:
+        sp.rows_in = len(df)
+        for prefix in ("", "career_"):
+            games = df[f"{prefix}games"].where(df[f"{prefix}games"] > 0)
+            for c in stat_cols:
+                df[f"{prefix}{c}_per_game"] = df[f"{prefix}{c}"] / games
+    return df
+
+def career_totals(player_seasons):
+    """Eine Zeile pro Spieler aus get_player_seasons (Name/Team/Position der letzten Saison)."""
+    if player_seasons.empty:
+        return player_seasons
+    career_cols = [c for c in player_seasons.columns if c.startswith("career_")]
+    info = [c for c in ["full_name", "team", "position"] if c in player_seasons.columns]
+    last = player_seasons.sort_values("season").groupby("player_id", as_index=False).last()
+    seasons = player_seasons.groupby("player_id")["season"].agg(first_season="min", last_season="max", seasons="nunique")
+    result = last[["player_id"] + info + career_cols].merge(seasons, on="player_id")
+    return result.rename(columns={c: c[len("career_"):] for c in career_cols})
+
+def get_leaderboard(first_season, last_season=None, stat="yards", top_n=10, per_game=False,
+                    positions=None, teams=None, min_games=1):
+    """
+    Karriere-Leaderboard über einen Saison-Bereich, sortiert nach einer
+    beliebigen Stat-Spalte aus leaderboard_columns() (oder ihrem Schnitt pro
+    Spiel mit per_game=True). Baut auf dem gecachten get_player_seasons auf,
+    ein Wechsel von Stat/Top-N geht also nicht noch einmal an die DB.
+    """
+    allowed = leaderboard_columns()
+    if stat not in allowed:
+        raise ValueError(f"Unknown stat column: {stat!r} (expected one of {allowed})")
+    if per_game and stat == "games":
+        raise ValueError("games per game is always 1; pick another stat for per_game=True")
+    seasons = get_player_seasons(first_season, last_season, positions=positions, teams=teams)
+    careers = career_totals(seasons)
+    if careers.empty:
+        return careers
+    careers = careers[careers["games"] >= min_games]
+    key = f"{stat}_per_game" if per_game else stat
+    return careers.sort_values([key, "player_id"], ascending=[False, True]).head(int(top_n)).reset_index(drop=True)
+
+def _fantasy_rulesets(rulesets=None):
+    """{rules_key: regeln} für die Regelwerke, die der Ingest vorberechnet (Standard: alle eingebauten)."""
+    rules = [fantasy.load_rules(r) for r in (rulesets or fantasy.RULESETS)]
+    return {fantasy.rules_key(r): r for r in rules}
+
+def _gamelog_order(gamelog_cols):
+    """
+    Feste Reihenfolge für die Gamelogs der Punkte-Summen: bincount summiert in
+    Lese-Reihenfolge, und die hinge sonst vom Query-Plan bzw. der rowid ab.
+    """
+    return "ORDER BY player_id, week" if "week" in gamelog_cols else "ORDER BY player_id"
+
+def refresh_fantasy_points(conn, season, rulesets=None):
+    """
+    Berechnet die Saison-Punkte aller Spieler für die Regelwerke neu (vom
+    Ingest aufgerufen): ein Read der Gamelogs, ein Matrixprodukt für alle
+    Regelwerke, dann delete+insert der Saison. Gibt die Zeilenzahl zurück.
+    """
+    g_cols = [r[1] for r in conn.execute("PRAGMA table_info(gamelogs)")]
+    if not {"season", "player_id"} <= set(g_cols):
+        return 0
+    rulesets = _fantasy_rulesets(rulesets)
+    wanted = sorted({c for rules in rulesets.values() for c in rules if c in g_cols})
+    cols = ", ".join(_quote(c) for c in ["player_id"] + wanted)
+
+    with profiling.span("stats.fantasy_points", kind="pandas", season=season) as sp:
+        gamelogs = pd.read_sql(
+            f"SELECT {cols} FROM gamelogs WHERE season = ? AND player_id IS NOT NULL {_gamelog_order(g_cols)}",
+            conn, params=(int(season),),
+        )
+        sp.rows_in = len(gamelogs)
+        points = fantasy.points_by_player(gamelogs, rulesets)
+        long = points.melt(id_vars=["player_id", "games"], var_name="ruleset", value_name="points")
+        sp.rows_out = len(long)
+
+    conn.execute(
+        f"""CREATE TABLE IF NOT EXISTS {FANTASY_TABLE} (
+            season INTEGER NOT NULL, ruleset TEXT NOT NULL, player_id TEXT NOT NULL,
+            games INTEGER, points REAL,
+            PRIMARY KEY (season, ruleset, player_id)
+        )"""
+    )
+    conn.execute(f"DELETE FROM {FANTASY_TABLE} WHERE season = ?", (int(season),))
+    conn.executemany(
+        f"INSERT INTO {FANTASY_TABLE} (season, ruleset, player_id, games, points) VALUES (?, ?, ?, ?, ?)",
+        ((int(season), r, p, int(g), float(v)) for p, g, r, v in long[["player_id", "games", "ruleset", "points"]].itertuples(index=False)),
+    )
+    return len(long)
+
+@cached(QUERY_CACHE, version=cache_version, scope="season")
+def get_fantasy_points(season, scoring=fantasy.DEFAULT_RULESET):
+    """
+    Saison-Punkte pro Spieler (player_id, games, fantasy_points) für ein
+    Regelwerk. Eingebaute/vom Ingest vorberechnete kommen aus der DB, alle
+    anderen werden aus den Gamelogs gerechnet (und hier im Query-Cache gehalten).
+    """
+    rules = fantasy.load_rules(scoring)
+    key = fantasy.rules_key(rules)
+    columns = ["player_id", "games", "fantasy_points"]
+    if get_table_columns(FANTASY_TABLE):
+        stored = get_data_from_db(
+            f"SELECT player_id, games, points AS fantasy_points FROM {FANTASY_TABLE} WHERE season = ? AND ruleset = ?",
+            [int(season), key],
+        )
+        if not stored.empty:
+            return stored
+
+    gamelog_cols = get_table_columns("gamelogs")
+    if not {"season", "player_id"} <= set(gamelog_cols):
+        return pd.DataFrame(columns=columns)
+    wanted = [c for c in rules if c in gamelog_cols]
+    cols = ", ".join(_quote(c) for c in ["player_id"] + wanted)
+    gamelogs = get_data_from_db(
+        f"SELECT {cols} FROM gamelogs WHERE season = ? AND player_id IS NOT NULL {_gamelog_order(gamelog_cols)}",
+        [int(season)],
+    )
+    with profiling.span("stats.fantasy_points", kind="pandas", season=season) as sp:
+        sp.rows_in = len(gamelogs)
+        points = fantasy.points_by_player(gamelogs, {key: rules})
+    return points.rename(columns={key: "fantasy_points"})[columns]
+
+def weekly_columns(stat_cols, window=ROLLING_WEEKS):
+    """Ergebnis-Spalten von compute_weekly_stats (ohne season/week/player_id)."""
+    cols = ["games"]
+    for c in stat_cols:
+        cols += [c, f"{c}_cum", f"{c}_roll{window}", f"{c}_delta"]
+    return cols
+
+def compute_weekly_stats(gamelogs, stat_cols, window=ROLLING_WEEKS, seed=None):
+    """
+    Vektorisierte Wochen-Auswertung über nach (player_id, season, week)
+    sortierte Zeilen - nur groupby cumsum/shift/diff, keine Python-Schleife
+    pro Spieler:
+    - games:        Spiele bis einschließlich dieser Woche
+    - <stat>_cum:   Summe bis einschließlich dieser Woche
+    - <stat>_rollN: Schnitt der letzten N Spiele (weniger am Saisonanfang)
+    - <stat>_delta: Differenz zum vorherigen Spiel (NaN beim ersten)
+
+    `seed` (optional, pro season/player_id: games + <stat>_cum) ist der Stand
+    VOR der ersten Zeile eines Spielers in `gamelogs`. Damit lässt sich ab
+    einer beliebigen Woche weiterrechnen, solange die letzten N-1 Spiele davor
+    als Kontext mitgegeben werden.
+    """
+    keys = ["player_id", "season"]
+    df = gamelogs.sort_values(keys + ["week"], kind="stable").reset_index(drop=True)
+    if seed is not None and not seed.empty:
+        seed = seed.rename(columns={c: f"{c}__seed" for c in seed.columns if c not in keys})
+        df = df.merge(seed, on=keys, how="left")
+
+    def seeded(col):
+        name = f"{col}__seed"
+        return df[name].fillna(0).astype("int64") if name in df.columns else 0
+
+    g = df.groupby(keys, sort=False)
+    out = df[["season", "week", "player_id"]].copy()
+    local_games = g.cumcount() + 1
+    out["games"] = local_games + seeded("games")
+
+    for c in stat_cols:
+        values = df[c].fillna(0).astype("int64")
+        local_cum = values.groupby([df["player_id"], df["season"]], sort=False).cumsum()
+        seed_cum = seeded(f"{c}_cum")
+        # Summe der letzten `window` Zeilen = cum - cum von vor `window` Zeilen
+        before = local_cum.groupby([df["player_id"], df["season"]], sort=False).shift(window).fillna(0)
+        out[c] = values
+        out[f"{c}_cum"] = local_cum + seed_cum
+        out[f"{c}_roll{window}"] = (local_cum - before) / local_games.clip(upper=window)
+        out[f"{c}_delta"] = values.groupby([df["player_id"], df["season"]], sort=False).diff()
+    return out
+
+def week_digests(gamelogs, stat_cols):
+    """Pro Woche ein Hash über player_id + Stats (Reihenfolge egal) und die Zeilenzahl."""
+    if gamelogs.empty:
+        return {}
+    hashes = pd.util.hash_pandas_object(gamelogs[["player_id"] + stat_cols], index=False)
+    grouped = hashes.groupby(gamelogs["week"].to_numpy())
+    sums, counts = grouped.sum(), grouped.size()
+    return {int(w): (f"{int(sums[w]) & (2**64 - 1):016x}", int(counts[w])) for w in sums.index}
+
+def _ensure_weekly_tables(conn, stat_cols, window):
+    """Legt die Tabellen an; passen die Spalten nicht mehr (neue Stats, anderes N), neu."""
+    wanted = ["season", "week", "player_id"] + weekly_columns(stat_cols, window)
+    current = [r[1] for r in conn.execute(f"PRAGMA table_info({WEEKLY_TABLE})")]
+    if current == wanted:
+        return False
+    conn.execute(f"DROP TABLE IF EXISTS {WEEKLY_TABLE}")
+    conn.execute(f"DROP TABLE IF EXISTS {WEEKLY_DIGESTS_TABLE}")
+    cols = ", ".join(
+        f"{_quote(c)} {'REAL' if c.endswith((f'_roll{window}', '_delta')) else 'INTEGER'}"
+        for c in wanted if c not in ("season", "week", "player_id")
+    )
+    conn.execute(
+        f"CREATE TABLE {WEEKLY_TABLE} (season INTEGER NOT NULL, week INTEGER NOT NULL, "
+        f"player_id TEXT NOT NULL, {cols}, PRIMARY KEY (season, player_id, week))"
+    )
+    conn.execute(f"CREATE INDEX idx_weekly_season_week ON {WEEKLY_TABLE} (season, week)")
+    conn.execute(
+        f"CREATE TABLE {WEEKLY_DIGESTS_TABLE} (season INTEGER NOT NULL, week INTEGER NOT NULL, "
+        "digest TEXT, n_rows INTEGER, PRIMARY KEY (season, week))"
+    )
+    return True
+
+def _refresh_weekly_season(conn, season, stat_cols, window):
+    cols = ", ".join(_quote(c) for c in ["player_id", "week"] + stat_cols)
+    gamelogs = pd.read_sql(
+        f"SELECT {cols} FROM gamelogs WHERE season = ? AND player_id IS NOT NULL",
+        conn, params=(int(season),),
+    )
+    gamelogs["season"] = int(season)
+    gamelogs["player_id"] = gamelogs["player_id"].astype(str)
+
+    new = week_digests(gamelogs, stat_cols)
+    old = {
+        int(w): (d, n) for w, d, n in conn.execute(
+            f"SELECT week, digest, n_rows FROM {WEEKLY_DIGESTS_TABLE} WHERE season = ?", (int(season),)
+        )
+    }
+    changed = [w for w in set(new) | set(old) if new.get(w) != old.get(w)]
+    if not changed:
+        return None
+    first = min(changed)
+
+    # Kontext: die letzten window-1 Spiele vor `first` (für Rolling/Delta) ...
+    before = gamelogs[gamelogs["week"] < first]
+    context = before.sort_values("week").groupby("player_id", sort=False).tail(window - 1)
+    # ... und der gespeicherte Stand nach dem letzten Spiel vor `first`
+    seed = pd.read_sql(
+        f"""SELECT w.* FROM {WEEKLY_TABLE} w
+        JOIN (SELECT player_id, MAX(week) AS week FROM {WEEKLY_TABLE}
+              WHERE season = ? AND week < ? GROUP BY player_id) last
+          ON last.player_id = w.player_id AND last.week = w.week
+        WHERE w.season = ?""",
+        conn, params=(int(season), first, int(season)),
+    )
+    if not seed.empty:
+        # Stand VOR dem ersten Kontext-Spiel = letzter Stand minus Kontext
+        ctx = context.groupby("player_id")[stat_cols].sum()
+        ctx["games"] = context.groupby("player_id").size()
+        seed = seed.set_index("player_id")[["games"] + [f"{c}_cum" for c in stat_cols]]
+        ctx = ctx.reindex(seed.index).fillna(0)
+        seed["games"] -= ctx["games"]
+        for c in stat_cols:
+            seed[f"{c}_cum"] -= ctx[c]
+        seed = seed.reset_index()
+        seed["season"] = int(season)
+
+    frame = pd.concat([context, gamelogs[gamelogs["week"] >= first]], ignore_index=True)
+    result = compute_weekly_stats(frame, stat_cols, window, seed=seed)
+    result = result[result["week"] >= first]
+
+    conn.execute(f"DELETE FROM {WEEKLY_TABLE} WHERE season = ? AND week >= ?", (int(season), first))
+    names = list(result.columns)
+    conn.executemany(
+        f"INSERT INTO {WEEKLY_TABLE} ({', '.join(_quote(c) for c in names)}) "
+        f"VALUES ({', '.join('?' * len(names))})",
+        result.astype(object).where(result.notna(), None).itertuples(index=False, name=None),
+    )
+    conn.execute(f"DELETE FROM {WEEKLY_DIGESTS_TABLE} WHERE season = ?", (int(season),))
+    conn.executemany(
+        f"INSERT INTO {WEEKLY_DIGESTS_TABLE} (season, week, digest, n_rows) VALUES (?, ?, ?, ?)",
+        [(int(season), w, d, n) for w, (d, n) in new.items()],
+    )
+    return first
+
+def refresh_weekly_stats(conn, season, stat_cols=None, window=ROLLING_WEEKS):
+    """
+    Schreibt weekly_stats für eine Saison fort (aufgerufen vom Ingest, in
+    dessen Transaktion; committet nicht). Über Hash-Digests pro Woche wird die
+    erste geänderte Woche gefunden; nur ab dort wird neu gerechnet und
+    geschrieben, ältere Wochen und andere Saisons bleiben unberührt. Beim
+    ersten Anlegen (oder geänderten Stat-Spalten) werden alle Saisons nachgezogen.
+    Gibt {saison: erste neu berechnete Woche} zurück (leer, wenn nichts zu tun war).
+    """
+    g_cols = [r[1] for r in conn.execute("PRAGMA table_info(gamelogs)")]
+    if not {"season", "week", "player_id"} <= set(g_cols):
+        return {}
+    stat_cols = [c for c in (stat_cols or STAT_COLUMNS) if c in g_cols]
+
+    seasons = [int(season)]
+    if _ensure_weekly_tables(conn, stat_cols, window):
+        seasons = [r[0] for r in conn.execute("SELECT DISTINCT season FROM gamelogs ORDER BY season")]
+
+    refreshed = {}
+    for weekly_season in seasons:
+        with profiling.span("stats.weekly", kind="pandas", season=weekly_season) as sp:
+            first = _refresh_weekly_season(conn, weekly_season, stat_cols, window)
+            sp.attrs["first_week"] = first
+        if first is not None:
+            refreshed[weekly_season] = first
+    return refreshed
+
+@cached(QUERY_CACHE, version=cache_version, scope="season")
+def get_weekly_stats(season, player_ids=None, weeks=None):
+    """Wochen-Auswertung einer Saison (optional nur einige Spieler/Wochen)."""
+    if not get_table_columns(WEEKLY_TABLE):
+        return pd.DataFrame()
+    sql = f"SELECT * FROM {WEEKLY_TABLE} WHERE season = ?"
+    params = [int(season)]
+    if player_ids:
+        sql += f" AND player_id IN ({', '.join('?' * len(player_ids))})"
+        params.extend(str(p) for p in player_ids)
+    if weeks:
+        sql += f" AND week IN ({', '.join('?' * len(weeks))})"
+        params.extend(int(w) for w in weeks)
+    return get_data_from_db(sql + " ORDER BY player_id, week", params)
+
+def build_similarity_index(conn, stat_cols=None, out_dir=None):
+    """Baut db/similarity/ aus der DB neu (vom Ingest aufgerufen). Gibt die Zeilenzahl zurück."""
+    with profiling.span("stats.similarity_build", kind="pandas") as sp:
+        rows = similarity.build_index(conn, out_dir or SIMILARITY_DIR, stat_cols or STAT_COLUMNS)
+        sp.rows_out = rows
+    return rows
+
+def load_similarity_index():
+    """Der aktuelle Index (memory-mapped, pro Version nur einmal geöffnet) oder None."""
+    meta = SIMILARITY_DIR / "meta.json"
+    if not meta.exists():
+        return None
+    key = (SIMILARITY_DIR, meta.stat().st_mtime_ns)
+    if key not in _similarity_index:
+        _similarity_index.clear()
+        _similarity_index[key] = similarity.SimilarityIndex(SIMILARITY_DIR)
+    return _similarity_index[key]
+
+@cached(QUERY_CACHE, version=cache_version)
+def similar_players(player_id, season=None, k=10, metric="cosine", positions=None, seasons=None):
+    """
+    Die k Spieler-Saisons, deren Stat-Profil (Spiele + Schnitt pro Spiel) dem
+    von `player_id` in `season` (Standard: seine letzte Saison) am nächsten ist.
+    - metric: "cosine" (score = Ähnlichkeit) oder "euclidean" (score = Distanz)
+    - positions / seasons: nur Nachbarn mit diesen Positionen / aus diesen Saisons
+    Spalten: player_id, season, position, score, full_name, team.
+    """
+    index = load_similarity_index()
+    columns = ["player_id", "season", "position", "score", "full_name", "team"]
+    if index is None:
+        return pd.DataFrame(columns=columns)
+    row = index.row(player_id, season)
+    if row is None:
+        return pd.DataFrame(columns=columns)
+
+    with profiling.span("stats.similarity_query", kind="pandas", metric=metric) as sp:
+        rows, scores = index.query(row, k, metric, positions, seasons)
+        sp.rows_in, sp.rows_out = len(index), len(rows)
+    result = pd.DataFrame({
+        "player_id": index.player_id[rows].astype(str),
+        "season": index.season[rows].astype(int),
+        "position": index.position[rows].astype(str),
+        "score": scores.astype(float),
+    })
+    if result.empty:
+        return result.reindex(columns=columns)
+
+    # Namen/Teams in EINER Query nachladen
+    player_cols = get_table_columns("players")
+    wanted = [c for c in ["full_name", "team"] if c in player_cols]
+    if wanted and "season" in player_cols:
+        ids = result["player_id"].unique().tolist()
+        names = get_data_from_db(
+            f"SELECT CAST(player_id AS TEXT) AS player_id, season, {', '.join(wanted)} FROM players "
+            f"WHERE player_id IN ({', '.join('?' * len(ids))})",
+            ids,
+        )
+        result = result.merge(names, on=["player_id", "season"], how="left")
+    return result.reindex(columns=columns)
+
+@cached(QUERY_CACHE, version=cache_version)
+def get_catalog():
+    """
+    Der komplette Katalog (saison, team, position, n_players, n_gamelogs,
+    ingested_at) - eine winzige Tabelle, die der Ingest pflegt. Ohne Katalog
+    (alte DB) wird er aus players abgeleitet, dann ohne Gamelog-Zahlen.
+    """
+    columns = ["season", "team", "position", "n_players", "n_gamelogs", "ingested_at"]
+    if get_table_columns(CATALOG_TABLE):
+        return get_data_from_db(f"SELECT {', '.join(columns)} FROM {CATALOG_TABLE}")
+
+    player_cols = get_table_columns("players")
+    if not {"season", "team", "position"} <= set(player_cols):
+        return pd.DataFrame(columns=columns)
+    return get_data_from_db(
+        "SELECT season, team, position, COUNT(*) AS n_players, "
+        "NULL AS n_gamelogs, NULL AS ingested_at "
+        "FROM players GROUP BY season, team, position"
+    )
+
+def available_seasons():
+    """Alle Saisons in der DB, neueste zuerst."""
+    catalog = get_catalog()
+    if catalog.empty:
+        return []
+    return sorted(catalog["season"].dropna().astype(int).unique().tolist(), reverse=True)
+
+def available_teams(season=None):
+    """Teams (optional nur einer Saison), alphabetisch."""
+    catalog = get_catalog()
+    if season is not None:
+        catalog = catalog[catalog["season"] == int(season)]
+    return sorted(catalog["team"].dropna().unique().tolist())
+
+def available_positions(season=None):
+    """Positionen (optional nur einer Saison), alphabetisch."""
+    catalog = get_catalog()
+    if season is not None:
+        catalog = catalog[catalog["season"] == int(season)]
+    return sorted(catalog["position"].dropna().unique().tolist())
+
+def catalog_summary():
+    """Pro Saison: Anzahl Spieler, Gamelog-Zeilen und letzter Ingest."""
+    catalog = get_catalog()
+    if catalog.empty:
+        return pd.DataFrame(columns=["season", "n_players", "n_gamelogs", "ingested_at"])
+    return (
+        catalog.groupby("season", as_index=False)
+        .agg(n_players=("n_players", "sum"), n_gamelogs=("n_gamelogs", "sum"), ingested_at=("ingested_at", "max"))
+        .sort_values("season", ascending=False)
+        .reset_index(drop=True)
+    )
+
+@profiling.profiled("stats.plot", kind="pandas")
+def plot_top_players_bar(topn_df, y="yards"):
+    """Erstellt das Balkendiagramm mit Plotly (Balkenhöhe: Spalte `y`)."""
     if topn_df is None or topn_df.empty:
         return None
-        
+
+    # plotly erst hier laden: wer nur Daten will (Ingest, CLI, Tests), zahlt den Import nicht
+    import plotly.express as px
+
     fig = px.bar(
         topn_df, 
         x="full_name", 
-        y="yards", 
+        y=y, 
         color="team", 
-        title="Top Players by Yards"
+        title=f"Top Players by {y.replace('_', ' ').title()}"
         # Wir entfernen template="plotly_dark" oder ersetzen es durch "none"
     )
     
@@ -118,10 +977,28 @@ def plot_top_players_bar(topn_df):
     )
     return fig
 
+@cached(QUERY_CACHE, version=cache_version)
+def get_player_headshots(player_ids):
+    """Headshot-URLs vieler Spieler in EINER Query: {player_id: url} (ohne Spieler ohne Bild)."""
+    ids = [str(p) for p in dict.fromkeys(player_ids)]
+    if not ids or "headshot_url" not in get_table_columns("players"):
+        return {}
+    df = get_data_from_db(HEADSHOT_QUERY.format(marks=", ".join("?" * len(ids))), ids)
+    df = df[df["headshot_url"].notna() & (df["headshot_url"] != "")]
+    # mehrere Saisons pro Spieler haben (praktisch) dieselbe URL -> eine reicht
+    return dict(zip(df["player_id"].astype(str), df["headshot_url"]))
+
 def get_player_headshot(player_id):
     """Holt die Headshot-URL für einen bestimmten Spieler aus der DB."""
-    query = f"SELECT headshot_url FROM players WHERE player_id = '{player_id}'"
-    df = get_data_from_db(query)
-    if not df.empty and df['headshot_url'].iloc[0]:
-        return df['headshot_url'].iloc[0]
-    return "https://via.placeholder.com/150" # Fallback, falls kein Bild da ist
\ No newline at end of file
+    return get_player_headshots([player_id]).get(str(player_id), HEADSHOT_PLACEHOLDER)
+
+def headshot_paths(player_ids, size="card"):
+    """
+    Lokale Thumbnails für mehrere Spieler: eine IN-Query für die URLs, dann
+    lädt der Bild-Cache nur die fehlenden (parallel). {player_id: Pfad oder None}
+    """
+    urls = get_player_headshots(list(player_ids))
+    with profiling.span("stats.headshots", kind="io", size=size) as sp:
+        paths = IMAGE_CACHE.prefetch(urls.values(), size=size)
+        sp.rows_in = len(urls)
+    return {str(pid): paths.get(urls.get(str(pid))) for pid in player_ids}
\ No newline at end of file
@@ -0,0 +1,291 @@
+"""
+src/bench/harness.py
+
+Benchmark der ganzen Pipeline auf synthetischen Daten (siehe bench/synthetic.py).
+
+Stufen (jede in einem eigenen, frischen Prozess -> saubere Peak-RSS-Werte):
+- fetch      : fetch_concurrent gegen das FakeBackend (schreibt raw/*.parquet)
+- ingest     : ingest_season für alle Saisons (raw -> db/nfl.db); mit --ingest-jobs N
+               ingest_seasons (N Parse-Prozesse, ein Schreiber) inkl. parse_s/write_s
+- top_players: get_top_offensive_players ohne Cache, alle Saisons x Positionen
+- dashboard  : der Datenpfad der Streamlit-App (Filter, Tabelle, Chart, Cache warm)
+- pbp        : fetch_pbp gegen das FakeBackend (~50k Plays x ~370 Spalten pro Saison)
+- startup    : Startzeit von `cli.py --help`, `ingest.py --help` und den Imports der
+               Streamlit-App (je bestes von --startup-repeats frischen Interpretern)
+
+Pro Stufe werden Wall-Time, Peak-RSS und rows/sec gemessen und als JSON
+gespeichert. Mit --baseline wird gegen einen früheren Lauf verglichen; alles,
+was um mehr als --tolerance langsamer/größer ist, gilt als Regression.
+
+Beispiele:
+    python src/bench/harness.py --seasons 1 --save bench_baseline.json
+    python src/bench/harness.py --seasons 1 --baseline bench_baseline.json --check
+    python src/bench/harness.py --seasons 25 --players-per-team 53 --stages ingest top_players
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import logging
+import multiprocessing
+import os
+from pathlib import Path
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = Path(__file__).parents[2] # repo root
+sys.path.insert(0, str(ROOT / "src"))
+
+STAGES = ["fetch", "ingest", "top_players", "dashboard", "pbp", "startup"]
+# Stufen, die vorher gelaufen sein müssen (fetch -> raw/, ingest -> db/)
+REQUIRES = {"ingest": ["fetch"], "top_players": ["fetch", "ingest"], "dashboard": ["fetch", "ingest"]}
+LAST_SEASON = 2024
+DEFAULT_TOLERANCE = 0.25
+# Metriken, bei denen "mehr" schlechter ist
+REGRESSION_METRICS = ("wall_s", "peak_rss_mb")
+# Kommandos für die startup-Stufe: name -> argv (ohne Interpreter)
+STARTUP_COMMANDS = {
+    "cli_help": [str(ROOT / "src" / "fetchers" / "cli.py"), "--help"],
+    "ingest_help": [str(ROOT / "src" / "etl" / "ingest.py"), "--help"],
+    # alles, was app/streamlit_app.py beim Start importiert
+    "app_import": ["-c", f"import sys; sys.path.insert(0, {str(ROOT / 'src')!r}); "
+                         "import streamlit, st_aggrid, analysis.stats"],
+}
+
+
+def _peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KiB, macOS: Bytes
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _stage_fetch(cfg):
+    from bench.synthetic import FakeBackend
+    from fetchers import nflreadpy_fetch
+
+    backend = FakeBackend(seed=cfg["seed"], players_per_team=cfg["players_per_team"], latency=cfg["latency"])
+    summary = nflreadpy_fetch.fetch_concurrent(
+        seasons=cfg["seasons"], jobs=cfg["jobs"], rate=0, force=True, mods={"nflreadpy": backend},
+    )
+    return sum(r["rows"] for r in summary)
+
+
+def _stage_ingest(cfg):
+    from etl import ingest
+
+    if cfg["ingest_jobs"] > 1:
+        summary = ingest.ingest_seasons(cfg["seasons"], jobs=cfg["ingest_jobs"], force=True)
+        failed = [r for r in summary if "error" in r]
+        if failed:
+            raise RuntimeError(f"Parallel ingest failed: {failed}")
+        return {
+            "rows": sum(r["rows"] for r in summary),
+            "parse_s": round(sum(r["parse_s"] for r in summary), 3),
+            "write_s": round(sum(r["write_s"] for r in summary), 3),
+        }
+
+    from analysis import stats
+
+    for season in cfg["seasons"]:
+        ingest.ingest_season(season, force=True)
+    # Zeilen aus der DB zählen (COUNT über den Index), nicht die Rohdateien erneut lesen
+    return sum(_table_rows(stats, table, season) for season in cfg["seasons"] for table in ("players", "gamelogs"))
+
+
+def _table_rows(stats, table, season) -> int:
+    df = stats.get_data_from_db(f"SELECT COUNT(*) AS n FROM {table} WHERE season = ?", (season,))
+    return int(df["n"].iloc[0])
+
+
+def _gamelog_rows(stats, season) -> int:
+    return _table_rows(stats, "gamelogs", season)
+
+
+def _stage_top_players(cfg):
+    from analysis import stats
+
+    # rows = ausgewertete Gamelog-Zeilen, nicht die paar Zeilen der Top-N-Liste
+    rows = 0
+    for season in cfg["seasons"]:
+        n = _gamelog_rows(stats, season)
+        for positions in (None, ["QB"], ["RB", "WR", "TE"]):
+            stats.QUERY_CACHE.clear()
+            stats.get_top_offensive_players(season, top_n=cfg["top_n"], positions=positions)
+            rows += n
+    return rows
+
+
+def _stage_dashboard(cfg):
+    from analysis import stats
+
+    rows = sum(_gamelog_rows(stats, season) for season in cfg["seasons"])
+    stats.QUERY_CACHE.clear()
+    # zweimal: erster Durchlauf kalt, zweiter wie ein Streamlit-Rerun (Cache warm)
+    for _ in range(2):
+        seasons = stats.available_seasons()
+        stats.catalog_summary()
+        for season in seasons:
+            positions = stats.available_positions(season)
+            stats.available_teams(season)
+            df = stats.get_top_offensive_players(season, top_n=cfg["top_n"], positions=positions or None)
+            stats.plot_top_players_bar(df)
+    return rows
+
+
+def _stage_pbp(cfg):
+    from bench.synthetic import FakeBackend
+    from fetchers import nflreadpy_fetch
+
+    backend = FakeBackend(seed=cfg["seed"], pbp_extra_columns=cfg["pbp_extra_columns"])
+    summary = nflreadpy_fetch.fetch_pbp(seasons=cfg["seasons"], force=True, mods={"nflreadpy": backend})
+    return sum(r["rows"] for r in summary)
+
+
+def _stage_startup(cfg):
+    """Bestes von N Läufen pro Kommando, jeweils in einem frischen Interpreter."""
+    timings = {}
+    for name, argv in STARTUP_COMMANDS.items():
+        best = None
+        for _ in range(cfg["startup_repeats"]):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, *argv], check=True, stdout=subprocess.DEVNULL)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        timings[f"{name}_s"] = round(best, 4)
+    return {"rows": len(timings), **timings}
+
+
+STAGE_FUNCS = {
+    "fetch": _stage_fetch,
+    "ingest": _stage_ingest,
+    "top_players": _stage_top_players,
+    "dashboard": _stage_dashboard,
+    "pbp": _stage_pbp,
+    "startup": _stage_startup,
+}
+
+
+def _run_stage(stage: str, cfg: dict, workdir: str) -> dict:
+    """Läuft im Kindprozess: alle Pfade (raw/, db/) relativ zu `workdir`."""
+    os.chdir(workdir)
+    logging.disable(logging.INFO)
+    start = time.perf_counter()
+    rows = STAGE_FUNCS[stage](cfg)
+    wall = time.perf_counter() - start
+    # Stufen dürfen statt der Zeilenzahl ein Dict mit "rows" + eigenen Metriken liefern
+    extra = rows if isinstance(rows, dict) else {"rows": rows}
+    rows = extra.pop("rows")
+    return {
+        "wall_s": round(wall, 4),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "rows": int(rows),
+        "rows_per_s": round(rows / wall, 1) if wall else 0.0,
+        **extra,
+    }
+
+
+def run(stages=STAGES, seasons=1, players_per_team=53, seed=0, jobs=4, latency=0.0,
+        top_n=10, pbp_extra_columns=350, startup_repeats=5, workdir=None, ingest_jobs=1) -> dict:
+    """Führt die Stufen nacheinander aus und gibt {"config": ..., "stages": {...}} zurück."""
+    cfg = {
+        "seasons": list(range(LAST_SEASON - seasons + 1, LAST_SEASON + 1)),
+        "players_per_team": players_per_team,
+        "seed": seed,
+        "jobs": jobs,
+        "ingest_jobs": ingest_jobs,
+        "latency": latency,
+        "top_n": top_n,
+        "pbp_extra_columns": pbp_extra_columns,
+        "startup_repeats": startup_repeats,
+    }
+    needed = [s for s in STAGES if s in stages or any(s in REQUIRES.get(t, []) for t in stages)]
+    tmp = tempfile.TemporaryDirectory(prefix="nfl-bench-") if workdir is None else None
+    workdir = str(workdir or tmp.name)
+
+    results = {}
+    ctx = multiprocessing.get_context("spawn")
+    try:
+        for stage in needed:
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                result = pool.submit(_run_stage, stage, cfg, workdir).result()
+            if stage in stages:
+                results[stage] = result
+                logging.info("%-12s %8.3fs %8.1f MB %10d rows %12.1f rows/s", stage,
+                             result["wall_s"], result["peak_rss_mb"], result["rows"], result["rows_per_s"])
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+    return {
+        "config": {**cfg, "seasons": seasons},
+        "env": {"python": platform.python_version(), "platform": platform.platform()},
+        "stages": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> list:
+    """Liste der Regressionen: (stage, metric, baseline, current, ratio)."""
+    if baseline.get("config") != current.get("config"):
+        logging.warning("Baseline was recorded with a different config: %s", baseline.get("config"))
+    regressions = []
+    for stage, result in current["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if not base:
+            continue
+        for metric in REGRESSION_METRICS:
+            if not base.get(metric):
+                continue
+            ratio = result[metric] / base[metric]
+            if ratio > 1 + tolerance:
+                regressions.append((stage, metric, base[metric], result[metric], round(ratio, 2)))
+    return regressions
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    p = argparse.ArgumentParser(description="Benchmark fetch/ingest/stats on synthetic data")
+    p.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    p.add_argument("--seasons", type=int, default=1, help="Anzahl Saisons (1..25), endend mit %d" % LAST_SEASON)
+    p.add_argument("--players-per-team", type=int, default=53)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--jobs", "-j", type=int, default=4, help="Parallele Fetch-Jobs")
+    p.add_argument("--ingest-jobs", type=int, default=1, help="Parse-Prozesse in der ingest-Stufe")
+    p.add_argument("--latency", type=float, default=0.0, help="Simulierte Backend-Latenz pro Aufruf (s)")
+    p.add_argument("--pbp-extra-columns", type=int, default=350, help="Zusätzliche Play-by-Play-Spalten")
+    p.add_argument("--startup-repeats", type=int, default=5, help="Läufe pro Kommando in der startup-Stufe")
+    p.add_argument("--workdir", type=Path, help="Arbeitsordner behalten statt Temp-Ordner")
+    p.add_argument("--save", type=Path, help="Ergebnis als JSON-Baseline speichern")
+    p.add_argument("--baseline", type=Path, help="Gegen diese Baseline vergleichen")
+    p.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                   help="Erlaubte Verschlechterung, z.B. 0.25 = 25%%")
+    p.add_argument("--check", action="store_true", help="Exit-Code 1 bei Regressionen")
+    args = p.parse_args()
+
+    if args.workdir:
+        args.workdir.mkdir(parents=True, exist_ok=True)
+    result = run(args.stages, args.seasons, args.players_per_team, args.seed, args.jobs,
+                 args.latency, pbp_extra_columns=args.pbp_extra_columns,
+                 startup_repeats=args.startup_repeats, workdir=args.workdir.resolve() if args.workdir else None,
+                 ingest_jobs=args.ingest_jobs)
+    print(json.dumps(result, indent=2))
+
+    if args.save:
+        args.save.write_text(json.dumps(result, indent=2))
+        logging.info("Baseline written to %s", args.save)
+
+    if args.baseline:
+        regressions = compare(result, json.loads(args.baseline.read_text()), args.tolerance)
+        for stage, metric, base, cur, ratio in regressions:
+            logging.warning("REGRESSION %s.%s: %s -> %s (x%s)", stage, metric, base, cur, ratio)
+        if not regressions:
+            logging.info("No regressions against %s (tolerance %.0f%%)", args.baseline, args.tolerance * 100)
+        if regressions and args.check:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
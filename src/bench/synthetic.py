@@ -0,0 +1,254 @@
+"""
+src/bench/synthetic.py
+
+Reproduzierbarer (seeded) Generator für realistische Test-Daten in beliebiger Größe.
+
+- generate_rosters(season)   -> Roster wie nflreadpy (32 Teams x ~53 Spieler)
+- generate_gamelogs(season)  -> wöchentliche Stats wie nfl_data_py.import_weekly_data
+- iter_pbp(season)           -> synthetisches Play-by-Play in Chunks (~50k Plays/Saison)
+- FakeBackend                -> tut so, als wäre es `nflreadpy` (für Fetcher/Benchmarks)
+
+Spieler haben über Saisons hinweg stabile IDs, Karrieren und Teamwechsel,
+damit Multi-Season-Auswertungen sinnvolle Daten sehen.
+"""
+
+import numpy as np
+import pandas as pd
+
+TEAMS = [
+    "ARI", "ATL", "BAL", "BUF", "CAR", "CHI", "CIN", "CLE", "DAL", "DEN", "DET", "GB",
+    "HOU", "IND", "JAX", "KC", "LAC", "LAR", "LV", "MIA", "MIN", "NE", "NO", "NYG",
+    "NYJ", "PHI", "PIT", "SEA", "SF", "TB", "TEN", "WAS",
+]
+# grobe Roster-Verteilung einer NFL-Mannschaft
+POSITIONS = ["QB", "RB", "WR", "TE", "OL", "DL", "LB", "DB", "K", "P"]
+POSITION_WEIGHTS = [0.05, 0.08, 0.12, 0.06, 0.17, 0.17, 0.13, 0.18, 0.02, 0.02]
+OFFENSE = {"QB", "RB", "WR", "TE"}
+
+FIRST_SEASON, LAST_SEASON = 1995, 2030
+MEAN_CAREER = 4.0
+FIRST_NAMES = ["Aaron", "Ben", "Cole", "Dak", "Eli", "Fred", "Gus", "Hank", "Ike", "Jalen",
+               "Kyle", "Lamar", "Matt", "Nick", "Odell", "Pat", "Russ", "Sam", "Tom", "Zach"]
+LAST_NAMES = ["Allen", "Brown", "Carter", "Davis", "Evans", "Foster", "Green", "Hill", "Irving",
+              "Jones", "King", "Lewis", "Moore", "Nelson", "Owens", "Parker", "Reed", "Smith",
+              "Taylor", "Walker"]
+
+REGULAR_WEEKS = 18
+PLAYS_PER_GAME = 180
+
+
+def _pool(seed: int, players_per_team: int) -> pd.DataFrame:
+    """Alle Spieler, die je existieren (Identität, Position, Karriere, Start-Team)."""
+    per_season = players_per_team * len(TEAMS)
+    n = int(per_season * (LAST_SEASON - FIRST_SEASON + 1) / MEAN_CAREER)
+    rng = np.random.default_rng(seed)
+
+    debut = rng.integers(FIRST_SEASON - 6, LAST_SEASON + 1, n)
+    career = rng.geometric(1 / MEAN_CAREER, n)
+    first = rng.integers(0, len(FIRST_NAMES), n)
+    last = rng.integers(0, len(LAST_NAMES), n)
+    return pd.DataFrame({
+        "player_id": [f"00-{i:07d}" for i in range(n)],
+        "first_name": np.array(FIRST_NAMES)[first],
+        "last_name": np.array(LAST_NAMES)[last],
+        "position": rng.choice(POSITIONS, size=n, p=POSITION_WEIGHTS),
+        "debut": debut,
+        "final": debut + career - 1,
+        "base_team": rng.integers(0, len(TEAMS), n),
+        "tenure": rng.integers(2, 7, n),
+        "birth_year": debut - rng.integers(21, 24, n),
+        "weight": rng.normal(240, 35, n).round().astype(int),
+        "skill": rng.lognormal(0, 0.35, n),
+    })
+
+
+_POOLS = {}
+
+def _cached_pool(seed: int, players_per_team: int) -> pd.DataFrame:
+    key = (seed, players_per_team)
+    if key not in _POOLS:
+        _POOLS[key] = _pool(seed, players_per_team)
+    return _POOLS[key]
+
+
+def generate_rosters(season: int, seed: int = 0, players_per_team: int = 53) -> pd.DataFrame:
+    """Roster einer Saison (Spalten wie nflreadpy.load_rosters)."""
+    pool = _cached_pool(seed, players_per_team)
+    active = pool[(pool["debut"] <= season) & (pool["final"] >= season)]
+    team_idx = (active["base_team"] + (season - active["debut"]) // active["tenure"]) % len(TEAMS)
+    rng = np.random.default_rng([seed, season])
+
+    return pd.DataFrame({
+        "season": season,
+        "team": np.array(TEAMS)[team_idx.to_numpy()],
+        "position": active["position"].to_numpy(),
+        "status": rng.choice(["ACT", "RES", "INA"], size=len(active), p=[0.85, 0.1, 0.05]),
+        "full_name": (active["first_name"] + " " + active["last_name"]).to_numpy(),
+        "first_name": active["first_name"].to_numpy(),
+        "last_name": active["last_name"].to_numpy(),
+        "birth_date": pd.to_datetime(active["birth_year"].astype(str) + "-06-15").dt.date.to_numpy(),
+        "weight": active["weight"].to_numpy(),
+        "gsis_id": active["player_id"].to_numpy(),
+        "years_exp": (season - active["debut"]).to_numpy(),
+        "headshot_url": ("https://example.invalid/headshots/" + active["player_id"] + ".png").to_numpy(),
+    })
+
+
+# Mittelwerte pro Position und Spiel: (passing_yards, rushing_yards, receiving_yards, targets)
+_STAT_MEANS = {
+    "QB": (235.0, 15.0, 0.0, 0.0),
+    "RB": (0.0, 55.0, 18.0, 3.0),
+    "WR": (0.0, 2.0, 52.0, 7.0),
+    "TE": (0.0, 0.5, 32.0, 5.0),
+}
+
+
+def generate_gamelogs(season: int, seed: int = 0, players_per_team: int = 53,
+                      weeks: int = REGULAR_WEEKS) -> pd.DataFrame:
+    """Wöchentliche Stats einer Saison (Spalten wie nfl_data_py.import_weekly_data)."""
+    roster = generate_rosters(season, seed, players_per_team)
+    roster = roster[roster["position"].isin(OFFENSE)].reset_index(drop=True)
+    pool = _cached_pool(seed, players_per_team).set_index("player_id")
+    skill = pool.loc[roster["gsis_id"], "skill"].to_numpy()
+    rng = np.random.default_rng([seed, season, 1])
+
+    n_players = len(roster)
+    week = np.tile(np.arange(1, weeks + 1), n_players)
+    idx = np.repeat(np.arange(n_players), weeks)
+    played = rng.random(len(idx)) < 0.82
+    week, idx = week[played], idx[played]
+    n = len(idx)
+
+    means = np.array([_STAT_MEANS[p] for p in roster["position"]])[idx] * skill[idx, None]
+    noisy = np.clip(rng.normal(means, means * 0.45 + 1e-9), 0, None).round().astype(int)
+    passing_yards, rushing_yards, receiving_yards, targets = noisy.T
+    receptions = rng.binomial(targets, 0.65)
+    passing_tds = rng.poisson(passing_yards / 140)
+    rushing_tds = rng.poisson(rushing_yards / 110)
+    receiving_tds = rng.poisson(receiving_yards / 120)
+
+    df = pd.DataFrame({
+        "player_id": roster["gsis_id"].to_numpy()[idx],
+        "player_name": roster["full_name"].to_numpy()[idx],
+        "position": roster["position"].to_numpy()[idx],
+        "recent_team": roster["team"].to_numpy()[idx],
+        "season": season,
+        "week": week,
+        "season_type": "REG",
+        "completions": (passing_yards / 11.5).round().astype(int),
+        "attempts": (passing_yards / 7.2).round().astype(int),
+        "passing_yards": passing_yards,
+        "passing_tds": passing_tds,
+        "interceptions": rng.poisson(np.where(passing_yards > 0, 0.8, 0.0)),
+        "carries": (rushing_yards / 4.3).round().astype(int),
+        "rushing_yards": rushing_yards,
+        "rushing_tds": rushing_tds,
+        "receptions": receptions,
+        "targets": targets,
+        "receiving_yards": receiving_yards,
+        "receiving_tds": receiving_tds,
+        "fumbles_lost": rng.binomial(1, 0.03, n),
+    })
+    # die generischen Spalten, mit denen stats.py rechnet
+    df["yards"] = df["passing_yards"] + df["rushing_yards"] + df["receiving_yards"]
+    df["td"] = df["passing_tds"] + df["rushing_tds"] + df["receiving_tds"]
+    return df
+
+
+def iter_pbp(season: int, seed: int = 0, games: int = 272, plays_per_game: int = PLAYS_PER_GAME,
+             extra_columns: int = 0, chunk_games: int = 16):
+    """
+    Synthetisches Play-by-Play in Chunks zu `chunk_games` Spielen (Speicher bleibt
+    klein, egal wie viele Spiele). `extra_columns` hängt Float-Spalten an, um die
+    Breite der echten Daten (~370 Spalten) nachzubilden.
+    """
+    rng = np.random.default_rng([seed, season, 2])
+    play_types = np.array(["pass", "run", "punt", "field_goal", "kickoff", "no_play"])
+    for start in range(0, games, chunk_games):
+        n_games = min(chunk_games, games - start)
+        n = n_games * plays_per_game
+        game_no = np.repeat(np.arange(start, start + n_games), plays_per_game)
+        home = rng.integers(0, len(TEAMS), n_games)
+        away = (home + rng.integers(1, len(TEAMS), n_games)) % len(TEAMS)
+        play_type = rng.choice(play_types, size=n, p=[0.55, 0.3, 0.04, 0.03, 0.05, 0.03])
+        chunk = pd.DataFrame({
+            "play_id": np.tile(np.arange(1, plays_per_game + 1), n_games),
+            "game_id": [f"{season}_{g // 16 + 1:02d}_{g:04d}" for g in game_no],
+            "season": season,
+            "week": game_no // 16 + 1,
+            "home_team": np.array(TEAMS)[np.repeat(home, plays_per_game)],
+            "away_team": np.array(TEAMS)[np.repeat(away, plays_per_game)],
+            "posteam": np.array(TEAMS)[np.where(rng.random(n) < 0.5, np.repeat(home, plays_per_game),
+                                                np.repeat(away, plays_per_game))],
+            "qtr": np.minimum(np.tile(np.arange(plays_per_game), n_games) * 4 // plays_per_game + 1, 4),
+            "down": rng.integers(1, 5, n),
+            "ydstogo": rng.integers(1, 21, n),
+            "yardline_100": rng.integers(1, 100, n),
+            "play_type": play_type,
+            "yards_gained": np.where(play_type == "pass", rng.normal(6.5, 9, n),
+                                     np.where(play_type == "run", rng.normal(4.3, 5, n), 0)).round(),
+            "epa": rng.normal(0, 1.3, n),
+            "wp": rng.random(n),
+            "passer_player_id": np.where(play_type == "pass", "00-" + pd.Series(rng.integers(0, 9999999, n)).astype(str).str.zfill(7), None),
+            "touchdown": rng.binomial(1, 0.035, n),
+            "interception": np.where(play_type == "pass", rng.binomial(1, 0.025, n), 0),
+        })
+        if extra_columns:
+            extra = rng.random((n, extra_columns), dtype=np.float32)
+            extra = pd.DataFrame(extra, columns=[f"extra_{i}" for i in range(extra_columns)])
+            chunk = pd.concat([chunk, extra], axis=1)
+        yield chunk
+
+
+def generate_pbp(season: int, **kwargs) -> pd.DataFrame:
+    """Wie iter_pbp, aber als ein DataFrame (nur für kleine Mengen gedacht)."""
+    return pd.concat(iter_pbp(season, **kwargs), ignore_index=True)
+
+
+class _Tidy:
+    def __init__(self, backend):
+        self._backend = backend
+
+    def read_rosters(self, season):
+        return self._backend.load_rosters(season)
+
+    def read_gamelogs(self, season):
+        return self._backend.load_gamelogs(season)
+
+
+class FakeBackend:
+    """
+    Steht für das `nflreadpy`-Modul: liefert synthetische Daten über dieselben
+    Aufrufmuster, die die Fetcher probieren (tidy.read_rosters, load_rosters,
+    load_pbp, ...).
+    `latency` simuliert Netzwerk-Wartezeit pro Aufruf.
+
+        fetch_concurrent(seasons=[2023], mods={"nflreadpy": FakeBackend()})
+    """
+
+    def __init__(self, seed: int = 0, players_per_team: int = 53, weeks: int = REGULAR_WEEKS,
+                 latency: float = 0.0, pbp_extra_columns: int = 0):
+        self.seed = seed
+        self.players_per_team = players_per_team
+        self.weeks = weeks
+        self.latency = latency
+        self.pbp_extra_columns = pbp_extra_columns
+        self.tidy = _Tidy(self)
+
+    def _wait(self):
+        if self.latency:
+            import time
+            time.sleep(self.latency)
+
+    def load_rosters(self, season):
+        self._wait()
+        return generate_rosters(season, self.seed, self.players_per_team)
+
+    def load_gamelogs(self, season):
+        self._wait()
+        return generate_gamelogs(season, self.seed, self.players_per_team, self.weeks)
+
+    def load_pbp(self, season):
+        # Generator: die Fetcher sehen die Saison nur Chunk für Chunk
+        self._wait()
+        return iter_pbp(season, self.seed, extra_columns=self.pbp_extra_columns)
@@ -0,0 +1,123 @@
+"""
+src/etl/doctor.py
+
+Kleiner "DB-Doktor" für die SQLite-Datenbank.
+
+- listet fehlende bzw. veraltete Indexe aus `ingest.INDEXES`
+- prüft, ob ANALYZE-Statistiken (sqlite_stat1) vorhanden sind
+- zeigt `EXPLAIN QUERY PLAN` für die Queries, die stats.py absetzt
+
+CLI: `python src/etl/doctor.py [--db db/nfl.db] [--season 2023] [--fix]`
+"""
+
+import argparse
+import sqlite3
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parents[2] # repo root
+sys.path.insert(0, str(ROOT / "src"))
+
+from etl.ingest import DB_PATH, INDEXES, analyze, ensure_indexes, index_columns
+from analysis.stats import HEADSHOT_QUERY, TOTALS_TABLE, build_top_players_query
+
+
+def _columns(conn, table):
+    return [row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')]
+
+def check_indexes(conn):
+    """Gibt pro Index (name, tabelle, gewünschte spalten, status) zurück."""
+    report = []
+    for name, (table, key_cols, _) in INDEXES.items():
+        wanted = index_columns(conn, name)
+        current = [row[2] for row in conn.execute(f'PRAGMA index_info("{name}")')]
+        if not wanted:
+            status = "n/a (columns missing)"
+        elif not current:
+            status = "MISSING"
+        elif current != wanted:
+            status = f"OUTDATED (has {current})"
+        else:
+            status = "ok"
+        report.append((name, table, wanted or key_cols, status))
+    return report
+
+def has_statistics(conn):
+    row = conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name='sqlite_stat1'"
+    ).fetchone()
+    return bool(row[0])
+
+def stats_queries(conn, season):
+    """Die Queries aus stats.py, mit Beispielparametern für den Planer."""
+    players = _columns(conn, "players")
+    gamelogs = _columns(conn, "gamelogs")
+    top_sql, top_params = build_top_players_query(
+        season, 10, positions=["QB", "WR"], teams=["KC"],
+        player_cols=players, gamelog_cols=gamelogs,
+    )
+    queries = {
+        "get_top_offensive_players": (top_sql, top_params),
+        "get_player_headshots": (HEADSHOT_QUERY.format(marks="?, ?"), ["00-0000000", "00-0000001"]),
+    }
+    if _columns(conn, TOTALS_TABLE):
+        queries["get_top_offensive_players (totals)"] = build_top_players_query(
+            season, 10, positions=["QB", "WR"], teams=["KC"],
+            player_cols=players, gamelog_cols=gamelogs, from_totals=True,
+        )
+    return queries
+
+def query_plans(conn, season):
+    plans = {}
+    for name, (sql, params) in stats_queries(conn, season).items():
+        try:
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+            plans[name] = [row[3] for row in rows]
+        except sqlite3.Error as e:
+            plans[name] = [f"error: {e}"]
+    return plans
+
+def main(args):
+    db_path = Path(args.db)
+    if not db_path.exists():
+        print(f"Datenbank nicht gefunden: {db_path}")
+        return 1
+
+    conn = sqlite3.connect(db_path)
+    try:
+        if args.fix:
+            with conn:
+                ensure_indexes(conn)
+            analyze(conn)
+
+        print("== Indexe ==")
+        problems = 0
+        for name, table, cols, status in check_indexes(conn):
+            print(f"  {status:<10} {name} ON {table}({', '.join(cols)})")
+            problems += status in ("MISSING",) or status.startswith("OUTDATED")
+
+        print("== Statistiken ==")
+        if has_statistics(conn):
+            print("  ok         sqlite_stat1 vorhanden")
+        else:
+            print("  MISSING    keine ANALYZE-Statistiken (ingest oder --fix ausführen)")
+            problems += 1
+
+        print(f"== Query-Pläne (season={args.season}) ==")
+        for name, steps in query_plans(conn, args.season).items():
+            print(f"  {name}:")
+            for step in steps:
+                print(f"    {step}")
+    finally:
+        conn.close()
+
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report missing indexes and query plans for the sqlite db")
+    parser.add_argument("--db", default=str(DB_PATH), help="Path to the sqlite database")
+    parser.add_argument("--season", type=int, default=2023, help="Season used for the example query plans")
+    parser.add_argument("--fix", action="store_true", help="Create missing indexes and run ANALYZE first")
+    args = parser.parse_args()
+    sys.exit(main(args))
@@ -0,0 +1,133 @@
+"""
+src/etl/export.py
+
+Schreibt Query-Ergebnisse und materialisierte Tabellen aus db/nfl.db als
+Arrow-Snapshots (utils/snapshots.py), damit Notebooks und Dienste sie per
+memory_map laden statt jedes Mal SQLite -> pandas zu bezahlen.
+
+- SNAPSHOTS: Name -> Funktion(saison) -> DataFrame; SEASONLESS ohne Saison
+- Jeder Snapshot trägt die DB-Generation, aus der er entstand (bei
+  Saison-Snapshots die Generation dieser Saison, siehe stats.db_generation).
+  refresh() schreibt nur Snapshots neu, deren Generation nicht mehr passt -
+  nach einem Ingest von 2024 also nur die 2024er und die saisonlosen.
+
+    python src/etl/export.py                      # alle veralteten Snapshots
+    python src/etl/export.py -s 2023 -n leaderboard gamelogs --force
+"""
+
+from pathlib import Path
+import json
+import logging
+import sys
+import time
+
+ROOT = Path(__file__).parents[2] # repo root
+sys.path.insert(0, str(ROOT / "src"))
+
+import pandas as pd
+
+from analysis import stats
+from utils import profiling
+from utils import snapshots
+from utils.schema import apply_schema
+
+logger = logging.getLogger("export")
+
+
+def _table(table_name: str):
+    """Eine Saison einer DB-Tabelle 1:1 (mit den kompakten dtypes aus utils.schema)."""
+    def load(season):
+        if "season" not in stats.get_table_columns(table_name):
+            return pd.DataFrame()
+        df = stats.get_data_from_db(f"SELECT * FROM {table_name} WHERE season = ?", [int(season)])
+        return apply_schema(df, table_name)
+    return load
+
+
+def _leaderboard(season):
+    """Alle Spieler der Saison wie in der App (nach Yards) plus Fantasy-Punkte im Standard-Regelwerk."""
+    df = stats.get_top_offensive_players(season, top_n=None)
+    if df.empty or not stats.get_table_columns(stats.FANTASY_TABLE):
+        return df
+    points = stats.get_fantasy_points(season)[["player_id", "fantasy_points"]]
+    df = df.assign(player_id=df["player_id"].astype(str)).merge(points, on="player_id", how="left")
+    df["fantasy_points"] = df["fantasy_points"].fillna(0.0)
+    return df
+
+
+SNAPSHOTS = {
+    "leaderboard": _leaderboard,
+    "gamelogs": _table("gamelogs"),
+    "players": _table("players"),
+    "player_season_totals": _table(stats.TOTALS_TABLE),
+    "weekly_stats": _table(stats.WEEKLY_TABLE),
+    "fantasy_points": _table(stats.FANTASY_TABLE),
+}
+SEASONLESS = {
+    "catalog": stats.get_catalog,
+}
+
+
+def _stamp(season=None) -> str:
+    """Generation als vergleichbarer String (int global, Tupel pro Saison)."""
+    return json.dumps(stats.db_generation(season))
+
+
+def is_fresh(name: str, season: int = None) -> bool:
+    """True, wenn der Snapshot existiert und aus der aktuellen Generation stammt."""
+    meta = snapshots.snapshot_metadata(name, season)
+    return meta is not None and meta.get("generation") == _stamp(season)
+
+
+def export_snapshot(name: str, season: int = None) -> dict:
+    """Einen Snapshot neu schreiben; gibt {name, season, rows, bytes, seconds} zurück."""
+    start = time.perf_counter()
+    with profiling.span("export.snapshot", kind="io", snapshot=name, season=season) as sp:
+        generation = _stamp(season)  # vor dem Lesen: ein paralleler Ingest macht ihn höchstens zu alt
+        df = SEASONLESS[name]() if season is None else SNAPSHOTS[name](season)
+        path = snapshots.write_snapshot(df, name, season, metadata={"generation": generation})
+        sp.rows_out, sp.bytes_written = len(df), path.stat().st_size
+    return {"name": name, "season": season, "rows": len(df), "bytes": path.stat().st_size,
+            "seconds": round(time.perf_counter() - start, 4)}
+
+
+def refresh(seasons=None, names=None, force: bool = False) -> list:
+    """
+    Schreibt alle veralteten (oder mit force alle) Snapshots neu.
+    seasons: Standard alle Saisons im Katalog; names: Standard alle aus
+    SNAPSHOTS + SEASONLESS. Gibt die Zusammenfassung der geschriebenen zurück.
+    """
+    if not stats.DB_PATH.exists():
+        raise FileNotFoundError(f"No database at {stats.DB_PATH} - run the ingest first")
+    names = list(names or [*SNAPSHOTS, *SEASONLESS])
+    unknown = [n for n in names if n not in SNAPSHOTS and n not in SEASONLESS]
+    if unknown:
+        raise ValueError(f"Unknown snapshot(s): {unknown} (expected {[*SNAPSHOTS, *SEASONLESS]})")
+    seasons = stats.available_seasons() if seasons is None else [int(s) for s in seasons]
+
+    jobs = [(n, None) for n in names if n in SEASONLESS]
+    jobs += [(n, s) for n in names if n in SNAPSHOTS for s in seasons]
+    written = []
+    for name, season in jobs:
+        if not force and is_fresh(name, season):
+            continue
+        written.append(export_snapshot(name, season))
+        logger.info(f"Exported {name}" + (f" {season}" if season is not None else "")
+                    + f": {written[-1]['rows']} rows, {written[-1]['bytes'] / 1024:.0f} KB")
+    logger.info(f"{len(written)} of {len(jobs)} snapshot(s) refreshed")
+    return written
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export stats queries and tables as memory-mappable Arrow snapshots")
+    parser.add_argument("--seasons", "-s", type=int, nargs="+", help="Seasons to export (default: all in the catalog)")
+    parser.add_argument("--names", "-n", nargs="+", choices=[*SNAPSHOTS, *SEASONLESS], help="Snapshots to export")
+    parser.add_argument("--force", "-f", action="store_true", help="Rewrite snapshots even if they are current")
+    profiling.add_profile_args(parser)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    profiling.configure_from_args(args)
+
+    refresh(args.seasons, args.names, args.force)
@@ -1,16 +1,142 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+import multiprocessing
 import sqlite3
+import sys
+import tempfile
 import pandas as pd
 import logging
+import time
+from datetime import datetime, timezone
+
+ROOT = Path(__file__).parents[2] # repo root
+sys.path.insert(0, str(ROOT / "src"))
+
+from contextlib import nullcontext
+from analysis.stats import build_similarity_index, refresh_fantasy_points, refresh_weekly_stats
+from utils import profiling
+from utils.io import PartitionStage, PartitionWriter, write_partition
+from utils.manifest import Manifest
+from utils.schema import STAT_COLUMNS, apply_schema, memory_report
 
 RAW_DIR = Path("raw")
 DB_DIR = Path("db")
-DB_DIR.mkdir(parents=True, exist_ok=True)
 DB_PATH = DB_DIR / "nfl.db"
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger("ingest")
 
+# Primärschlüssel pro Tabelle: jede Saison ist eine eigene Partition,
+# die beim Re-Ingest ersetzt wird, ohne andere Saisons anzufassen.
+TABLE_KEYS = {
+    "players": ["season", "player_id"],
+    "gamelogs": ["season", "week", "player_id"],
+}
+
+# Indexe für die Queries aus stats.py: name -> (tabelle, schlüssel, zusatzspalten).
+# Die Zusatzspalten machen den Index "covering" für die Saison-Aggregation der
+# Top-N-Query und von player_season_totals (beide lesen nur yards/td), sodass sie
+# die Tabelle selbst gar nicht lesen müssen. Fehlende Zusatzspalten werden weggelassen.
+INDEXES = {
+    "idx_gamelogs_season_player": ("gamelogs", ["season", "player_id"], ["yards", "td"]),
+    "idx_players_player": ("players", ["player_id"], []),
+    "idx_players_team_position": ("players", ["team", "position"], []),
+}
+
+# Materialisierte Saison-Summen pro Spieler (+ Ränge), damit Leaderboards
+# Index-Lookups statt Aggregationen über alle Spiel-Zeilen sind.
+TOTALS_TABLE = "player_season_totals"
+
+# Katalog für die Dashboard-Filter: pro (saison, team, position) ein paar Zähler.
+# Die Sidebar braucht damit nur eine winzige Query statt eines Full-Loads.
+CATALOG_TABLE = "catalog"
+CATALOG_DDL = [
+    f"""CREATE TABLE IF NOT EXISTS {CATALOG_TABLE} (
+        season INTEGER NOT NULL,
+        team TEXT,
+        position TEXT,
+        n_players INTEGER,
+        n_gamelogs INTEGER,
+        ingested_at TEXT
+    )""",
+    f"CREATE INDEX IF NOT EXISTS idx_catalog_season ON {CATALOG_TABLE} (season)",
+]
+
+# Pragmas für die Schreib-Verbindung: WAL (Leser blockieren nicht hinter dem
+# Ingest), synchronous=NORMAL (reicht mit WAL), ~64 MB Page-Cache.
+WRITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,
+    "temp_store": "MEMORY",
+}
+DEFAULT_BATCH_SIZE = 50_000
+
+# Welche Rohdatei mit welcher Prüfsumme zuletzt geladen wurde -> unveränderte überspringen
+INGEST_FILES_DDL = """CREATE TABLE IF NOT EXISTS ingest_files (
+    file TEXT PRIMARY KEY,
+    season INTEGER,
+    sha256 TEXT,
+    ingested_at TEXT
+)"""
+# Ingest-Generation, mit der eine Saison zuletzt geschrieben wurde -> Caches
+# einer Saison verfallen nur, wenn sich genau diese Saison ändert
+SEASON_GENERATIONS_TABLE = "season_generations"
+SEASON_GENERATIONS_DDL = f"""CREATE TABLE IF NOT EXISTS {SEASON_GENERATIONS_TABLE} (
+    season INTEGER PRIMARY KEY,
+    generation INTEGER NOT NULL,
+    updated_at TEXT
+)"""
+TOTALS_DDL = [
+    f"""CREATE TABLE IF NOT EXISTS {TOTALS_TABLE} (
+        season INTEGER NOT NULL,
+        player_id,
+        position TEXT,
+        team TEXT,
+        games INTEGER,
+        yards INTEGER,
+        td INTEGER,
+        yards_rank INTEGER,
+        position_rank INTEGER,
+        PRIMARY KEY (season, player_id)
+    )""",
+    f"CREATE INDEX IF NOT EXISTS idx_totals_season_yards ON {TOTALS_TABLE} (season, yards DESC)",
+    f"CREATE INDEX IF NOT EXISTS idx_totals_season_position_rank ON {TOTALS_TABLE} (season, position, position_rank)",
+    # Keyset-Pagination im Spieler-Explorer: ORDER BY <stat>, season, player_id pro Saison
+    f"CREATE INDEX IF NOT EXISTS idx_totals_page_yards ON {TOTALS_TABLE} (season, yards, player_id)",
+    f"CREATE INDEX IF NOT EXISTS idx_totals_page_td ON {TOTALS_TABLE} (season, td, player_id)",
+    f"CREATE INDEX IF NOT EXISTS idx_totals_page_games ON {TOTALS_TABLE} (season, games, player_id)",
+]
+
+def connect(db_path: Path = None) -> sqlite3.Connection:
+    """Öffnet die DB zum Schreiben mit den WRITE_PRAGMAS (legt db/ bei Bedarf an)."""
+    db_path = Path(db_path or DB_PATH)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    for name, value in WRITE_PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+def _repair_players_header(df: pd.DataFrame) -> pd.DataFrame:
+    # Falls der Header schon als Zahlen (0, 1, 2) da ist oder Bernard in der ersten Zeile steht
+    if isinstance(df.columns[0], int) or str(df.columns[0]) == '0' or (len(df.columns) > 6 and "Bernard" in str(df.columns[6])):
+        # Wir definieren die wichtigsten Spalten, die wir für dein Dashboard brauchen
+        # Die Reihenfolge entspricht exakt deiner CSV/Screenshots
+        new_cols = [
+            "season", "team", "position", "pos_detail", "depth", "status", 
+            "full_name", "first_name", "last_name", "birth_date", "height", 
+            "weight", "college", "player_id", "gsis_id", "espn_id", 
+            "sportradar_id", "yahoo_id", "rotowire_id", "pff_id", "pfr_id", 
+            "fantasy_data_id", "sleeper_id", "years_exp", "headshot_url", "is_active"
+        ]
+        
+        # Wir füllen den Rest mit "extra", falls die Datei mehr Spalten hat
+        if len(df.columns) > len(new_cols):
+            new_cols += [f"extra_{i}" for i in range(len(df.columns) - len(new_cols))]
+        
+        df.columns = new_cols[:len(df.columns)]
+        
+    return df
+
 def _safe_read(path: Path) -> pd.DataFrame:
     if not path.exists():
         raise FileNotFoundError(path)
@@ -19,40 +145,44 @@ def _safe_read(path: Path) -> pd.DataFrame:
     if "players" in path.name.lower():
         logger.info(f"Erzwinge Header-Struktur für {path.name}...")
         df = pd.read_parquet(path) if path.suffix == ".parquet" else pd.read_csv(path, header=None)
-        
-        # Falls der Header schon als Zahlen (0, 1, 2) da ist oder Bernard in der ersten Zeile steht
-        if isinstance(df.columns[0], int) or str(df.columns[0]) == '0' or "Bernard" in str(df.columns[6]):
-            # Wir definieren die wichtigsten Spalten, die wir für dein Dashboard brauchen
-            # Die Reihenfolge entspricht exakt deiner CSV/Screenshots
-            new_cols = [
-                "season", "team", "position", "pos_detail", "depth", "status", 
-                "full_name", "first_name", "last_name", "birth_date", "height", 
-                "weight", "college", "player_id", "gsis_id", "espn_id", 
-                "sportradar_id", "yahoo_id", "rotowire_id", "pff_id", "pfr_id", 
-                "fantasy_data_id", "sleeper_id", "years_exp", "headshot_url", "is_active"
-            ]
-            
-            # Wir füllen den Rest mit "extra", falls die Datei mehr Spalten hat
-            if len(df.columns) > len(new_cols):
-                new_cols += [f"extra_{i}" for i in range(len(df.columns) - len(new_cols))]
-            
-            df.columns = new_cols[:len(df.columns)]
-            
-        return df
+        return _repair_players_header(df)
 
     # Normales Laden für Gamelogs (die scheinen ja zu funktionieren)
     return pd.read_parquet(path) if path.suffix == ".parquet" else pd.read_csv(path)
+
+def _iter_batches(path: Path, batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Wie _safe_read, liefert die Datei aber in DataFrames zu je `batch_size`
+    Zeilen (Parquet: pyarrow record batches, CSV: chunks), damit nie die
+    ganze Datei im Speicher liegt.
+    """
+    if not path.exists():
+        raise FileNotFoundError(path)
+    is_players = "players" in path.name.lower()
+
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        batches = (b.to_pandas() for b in pq.ParquetFile(path).iter_batches(batch_size=batch_size))
+    else:
+        batches = pd.read_csv(path, header=None if is_players else "infer", chunksize=batch_size)
+
+    for df in batches:
+        yield _repair_players_header(df) if is_players else df
     
-def normalize_players(df: pd.DataFrame) -> pd.DataFrame:
+def normalize_players(df: pd.DataFrame, season: int = None) -> pd.DataFrame:
     df = df.copy()
     # vereinheitliche Spaltennamen
     df.columns = [str(c).strip() for c in df.columns]
     # mögliche Spaltenumbennenungen (falls API unterschiedliche Namen nutzt)
     rename_map = {}
 
-    for candidate in ["player_id", "id", "playerID"]:
-        if candidate in df.columns and "player_id" not in df.columns:
-            rename_map[candidate] = "player_id"
+    # nflverse/nflreadpy-Roster haben gsis_id statt player_id (wie die Gamelogs)
+    if "player_id" not in df.columns:
+        for candidate in ["gsis_id", "id", "playerID"]:
+            if candidate in df.columns:
+                rename_map[candidate] = "player_id"
+                break
         
     if "full_name" not in df.columns:
         for c in ["fullName", "name"]:
@@ -63,10 +193,13 @@ def normalize_players(df: pd.DataFrame) -> pd.DataFrame:
     # falls birthdate vorhanden -> parse
     if "birthdate" in df.columns:
         df["birthdate"] = pd.to_datetime(df["birthdate"], errors="coerce").dt.date
+    # Demo-/Alt-Dateien haben keine season-Spalte -> aus dem Dateinamen übernehmen
+    if season is not None and "season" not in df.columns:
+        df["season"] = season
     
     return df
 
-def normalize_gamelogs(df: pd.DataFrame) -> pd.DataFrame:
+def normalize_gamelogs(df: pd.DataFrame, season: int = None) -> pd.DataFrame:
     df = df.copy()
     df.columns = [str(c).strip() for c in df.columns]
     rename_map = {}
@@ -87,54 +220,617 @@ def normalize_gamelogs(df: pd.DataFrame) -> pd.DataFrame:
     
     df = df.rename(columns=rename_map)
     # numeric coercion for common stat cols
-    for col in ["yards", "rushing_yards", "passing_yards", "td", "touchdowns", "week"]:
+    for col in STAT_COLUMNS + ["week"]:
         if col in df.columns:
             df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype(int)
+
+    if season is not None and "season" not in df.columns:
+        df["season"] = season
+    # Saison-Summen ohne Wochen-Spalte landen in Woche 0
+    if "week" not in df.columns:
+        df["week"] = 0
     
     return df
 
-def upsert_table(df: pd.DataFrame, table_name: str, conn: sqlite3.Connection, if_exists="replace"):
-    # 'replace' sorgt dafür, dass die alte (kaputte) Struktur gelöscht wird
-    df.to_sql(table_name, conn, if_exists=if_exists, index=False)
-    logger.info(f"Wrote {len(df)} rows into table '{table_name}'")
+def _quote(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
 
-def ingest_season(season: int):
-    conn = sqlite3.connect(DB_PATH)
+def _table_columns(conn: sqlite3.Connection, table_name: str) -> list:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({_quote(table_name)})")]
 
-    try:
-        # players
-        p_path = RAW_DIR / f"players_{season}.parquet"
-        if not p_path.exists():
-            # try csv fallback
-            p_path = p_path.with_suffix(".csv")
-        
-        if p_path.exists():
-            players = _safe_read(p_path)
-            players = normalize_players(players)
-            upsert_table(players, "players", conn)
-        else:
-            logger.warning(f"No players file for season {season}: {p_path}")
-        
-        # gamelogs
-        g_path = RAW_DIR / f"gamelogs_{season}.parquet"
-        if not g_path.exists():
-            g_path = g_path.with_suffix(".csv")
-        if g_path.exists():
-            gamelogs = _safe_read(g_path)
-            gamelogs = normalize_gamelogs(gamelogs)
-            upsert_table(gamelogs, "gamelogs", conn)
+def _table_keys(conn: sqlite3.Connection, table_name: str) -> list:
+    rows = conn.execute(f"PRAGMA table_info({_quote(table_name)})").fetchall()
+    return [r[1] for r in sorted(rows, key=lambda r: r[5]) if r[5] > 0]
+
+def _create_table(df: pd.DataFrame, table_name: str, conn: sqlite3.Connection, keys: list):
+    ddl = pd.io.sql.get_schema(df, table_name, keys=keys, con=conn)
+    conn.execute(ddl.replace("CREATE TABLE", "CREATE TABLE IF NOT EXISTS", 1))
+
+def _prepare_table(df: pd.DataFrame, table_name: str, conn: sqlite3.Connection, keys: list):
+    """
+    Legt die Tabelle mit Primärschlüssel an bzw. ergänzt neue Spalten.
+    Alte Tabellen ohne Schlüssel (früher per to_sql(replace) geschrieben)
+    werden einmalig migriert; ihre Zeilen bleiben erhalten, soweit sie die
+    Schlüsselspalten haben.
+    """
+    existing = _table_columns(conn, table_name)
+    if not existing:
+        _create_table(df, table_name, conn, keys)
+        return
+
+    if _table_keys(conn, table_name) != keys:
+        logger.info(f"Migrating legacy table '{table_name}' to primary key {keys}")
+        legacy = f"{table_name}_legacy"
+        conn.execute(f"DROP TABLE IF EXISTS {_quote(legacy)}")
+        conn.execute(f"ALTER TABLE {_quote(table_name)} RENAME TO {_quote(legacy)}")
+        _create_table(df, table_name, conn, keys)
+        new_cols = _table_columns(conn, table_name)
+        for col in existing:
+            if col not in new_cols:
+                conn.execute(f"ALTER TABLE {_quote(table_name)} ADD COLUMN {_quote(col)}")
+        if all(k in existing for k in keys):
+            cols = ", ".join(_quote(c) for c in existing)
+            conn.execute(
+                f"INSERT OR REPLACE INTO {_quote(table_name)} ({cols}) "
+                f"SELECT {cols} FROM {_quote(legacy)} "
+                f"WHERE {' AND '.join(f'{_quote(k)} IS NOT NULL' for k in keys)}"
+            )
         else:
-            logger.warning(f"No gamelogs file for season {season}: {g_path}")
+            logger.warning(f"Legacy table '{table_name}' has no {keys} columns; dropping its rows")
+        conn.execute(f"DROP TABLE {_quote(legacy)}")
+        existing = _table_columns(conn, table_name)
+
+    for col in df.columns:
+        if col not in existing:
+            conn.execute(f"ALTER TABLE {_quote(table_name)} ADD COLUMN {_quote(col)}")
+
+def index_columns(conn: sqlite3.Connection, name: str) -> list:
+    """Gewünschte Spalten eines Index aus INDEXES (leer, wenn Schlüsselspalten fehlen)."""
+    table, key_cols, include_cols = INDEXES[name]
+    existing = _table_columns(conn, table)
+    if not all(c in existing for c in key_cols):
+        return []
+    return key_cols + [c for c in include_cols if c in existing]
+
+def ensure_indexes(conn: sqlite3.Connection):
+    """Legt fehlende Indexe an und baut veraltete (andere Spalten) neu."""
+    for name, (table, _, _) in INDEXES.items():
+        wanted = index_columns(conn, name)
+        if not wanted:
+            continue
+        current = [row[2] for row in conn.execute(f"PRAGMA index_info({_quote(name)})")]
+        if current == wanted:
+            continue
+        if current:
+            conn.execute(f"DROP INDEX {_quote(name)}")
+        cols = ", ".join(_quote(c) for c in wanted)
+        conn.execute(f"CREATE INDEX {_quote(name)} ON {_quote(table)} ({cols})")
+        logger.info(f"Created index {name} on {table}({', '.join(wanted)})")
+
+def rebuild_season_totals(conn: sqlite3.Connection, season: int):
+    """
+    Berechnet player_season_totals nur für eine Saison neu. Beim allerersten
+    Anlegen der Tabelle werden alle Saisons aus gamelogs nachgezogen.
+    Gibt die neu berechneten Saisons zurück.
+    """
+    created = not _table_columns(conn, TOTALS_TABLE)
+    for ddl in TOTALS_DDL:
+        conn.execute(ddl)
+
+    g_cols = _table_columns(conn, "gamelogs")
+    p_cols = _table_columns(conn, "players")
+    if "player_id" not in g_cols or "season" not in g_cols:
+        return []
+
+    seasons = [season]
+    if created:
+        seasons = [r[0] for r in conn.execute("SELECT DISTINCT season FROM gamelogs")]
+
+    sums = ", ".join(
+        f"SUM(COALESCE({_quote(c)}, 0)) AS {c}" if c in g_cols else f"0 AS {c}"
+        for c in ["yards", "td"]
+    )
+    has_roster = "player_id" in p_cols and "season" in p_cols
+    position = "p.position" if has_roster and "position" in p_cols else "NULL"
+    team = "p.team" if has_roster and "team" in p_cols else "NULL"
+    join = "LEFT JOIN players p ON p.player_id = s.player_id AND p.season = s.season" if has_roster else ""
+
+    for totals_season in seasons:
+        conn.execute(f"DELETE FROM {TOTALS_TABLE} WHERE season = ?", (totals_season,))
+        conn.execute(
+            f"""INSERT INTO {TOTALS_TABLE}
+                (season, player_id, position, team, games, yards, td, yards_rank, position_rank)
+            WITH s AS (
+                SELECT season, player_id, COUNT(*) AS games, {sums}
+                FROM gamelogs WHERE season = ? GROUP BY player_id
+            )
+            SELECT s.season, s.player_id, {position}, {team}, s.games, s.yards, s.td,
+                RANK() OVER (ORDER BY s.yards DESC),
+                RANK() OVER (PARTITION BY {position} ORDER BY s.yards DESC)
+            FROM s {join}""",
+            (totals_season,),
+        )
+    logger.info(f"Rebuilt {TOTALS_TABLE} for season(s) {seasons}")
+    return seasons
+
+def rebuild_catalog(conn: sqlite3.Connection, season: int):
+    """
+    Erneuert die Katalog-Zeilen einer Saison aus players + player_season_totals
+    (solange der Katalog leer ist, für alle Saisons mit Daten - auch wenn er
+    angelegt wurde, als players noch fehlte). Gamelog-Zeilen von Spielern ohne
+    Roster-Eintrag landen in einer Zeile mit team/position = NULL, damit die
+    Zeilenzahlen vollständig sind.
+    """
+    for ddl in CATALOG_DDL:
+        conn.execute(ddl)
+
+    p_cols = _table_columns(conn, "players")
+    if "season" not in p_cols or "player_id" not in p_cols:
+        return
+    team = "p.team" if "team" in p_cols else "NULL"
+    position = "p.position" if "position" in p_cols else "NULL"
+    now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    # letzter Ingest laut ingest_files (beim Nachziehen alter Saisons != jetzt)
+    ingested_at = "COALESCE((SELECT MAX(ingested_at) FROM ingest_files WHERE season = ?), ?)"
+
+    seasons = [season]
+    if conn.execute(f"SELECT 1 FROM {CATALOG_TABLE} LIMIT 1").fetchone() is None:
+        seasons = [r[0] for r in conn.execute(
+            f"SELECT season FROM players UNION SELECT season FROM {TOTALS_TABLE}"
+        )]
+
+    for catalog_season in seasons:
+        conn.execute(f"DELETE FROM {CATALOG_TABLE} WHERE season = ?", (catalog_season,))
+        conn.execute(
+            f"""INSERT INTO {CATALOG_TABLE} (season, team, position, n_players, n_gamelogs, ingested_at)
+            SELECT p.season, {team}, {position}, COUNT(*), COALESCE(SUM(t.games), 0), {ingested_at}
+            FROM players p
+            LEFT JOIN {TOTALS_TABLE} t ON t.season = p.season AND t.player_id = p.player_id
+            WHERE p.season = ?
+            GROUP BY {team}, {position}""",
+            (catalog_season, now, catalog_season),
+        )
+        conn.execute(
+            f"""INSERT INTO {CATALOG_TABLE} (season, team, position, n_players, n_gamelogs, ingested_at)
+            SELECT t.season, NULL, NULL, 0, SUM(t.games), {ingested_at}
+            FROM {TOTALS_TABLE} t
+            LEFT JOIN players p ON p.season = t.season AND p.player_id = t.player_id
+            WHERE t.season = ? AND p.player_id IS NULL
+            GROUP BY t.season""",
+            (catalog_season, now, catalog_season),
+        )
+
+def analyze(conn: sqlite3.Connection, tables=("players", "gamelogs", TOTALS_TABLE)):
+    """Aktualisiert die Planer-Statistiken (sqlite_stat1) der geladenen Tabellen."""
+    for table in tables:
+        if _table_columns(conn, table):
+            conn.execute(f"ANALYZE {_quote(table)}")
+    conn.commit()
+
+def _to_records(df: pd.DataFrame):
+    """DataFrame -> Tupel mit sqlite-tauglichen Python-Werten (NaN -> None)."""
+    out = df.copy()
+    for col in out.columns:
+        if pd.api.types.is_datetime64_any_dtype(out[col]):
+            out[col] = out[col].astype(str)
+    out = out.astype(object).where(out.notna(), None)
+    return out.itertuples(index=False, name=None)
+
+def _clean_keys(df: pd.DataFrame, table_name: str) -> pd.DataFrame:
+    """Verwirft Zeilen ohne Schlüssel und doppelte Schlüssel (letzte gewinnt)."""
+    keys = TABLE_KEYS[table_name]
+    missing = [k for k in keys if k not in df.columns]
+    if missing:
+        raise ValueError(f"Table '{table_name}' needs key columns {missing}")
+
+    df = df[df[keys].notna().all(axis=1)]
+    dupes = df.duplicated(subset=keys, keep="last")
+    if dupes.any():
+        logger.warning(f"Dropping {int(dupes.sum())} duplicate {keys} rows for '{table_name}'")
+        df = df[~dupes]
+    return df
+
+def _delete_season(conn: sqlite3.Connection, table_name: str, season: int) -> int:
+    return conn.execute(
+        f"DELETE FROM {_quote(table_name)} WHERE season = ?", (int(season),)
+    ).rowcount
+
+def _insert_rows(df: pd.DataFrame, table_name: str, conn: sqlite3.Connection):
+    cols = ", ".join(_quote(c) for c in df.columns)
+    marks = ", ".join("?" * len(df.columns))
+    conn.executemany(
+        f"INSERT OR REPLACE INTO {_quote(table_name)} ({cols}) VALUES ({marks})",
+        _to_records(df),
+    )
+
+def upsert_table(df: pd.DataFrame, table_name: str, conn: sqlite3.Connection, season: int):
+    """
+    Ersetzt nur die Zeilen der gegebenen Saison (delete-and-insert).
+    Läuft in der Transaktion des Aufrufers; committet selbst nicht.
+    """
+    df = _clean_keys(df, table_name)
+    _prepare_table(df, table_name, conn, TABLE_KEYS[table_name])
+    deleted = _delete_season(conn, table_name, season)
+    _insert_rows(df, table_name, conn)
+    logger.info(f"Wrote {len(df)} rows into table '{table_name}' for season {season} (replaced {deleted})")
+
+def stream_table(path: Path, table_name: str, conn: sqlite3.Connection, season: int,
+                 batch_size: int = DEFAULT_BATCH_SIZE, store: bool = True, stage: PartitionStage = None) -> int:
+    """
+    Streaming-Variante von upsert_table: liest `path` batchweise, normalisiert
+    jeden Batch und schreibt ihn per executemany. Der Speicherbedarf hängt nur
+    von `batch_size` ab, nicht von der Dateigröße. Läuft in der Transaktion
+    des Aufrufers; doppelte Schlüssel über Batches hinweg überschreibt das
+    INSERT OR REPLACE (letzte Zeile gewinnt). Mit store=True landen die Batches
+    zusätzlich in der Parquet-Partition raw/store/<tabelle>/season=<saison>/ -
+    mit `stage` erst bei stage.commit(), also nach dem Commit des Aufrufers.
+    """
+    normalize = NORMALIZERS[table_name]
+    keys = TABLE_KEYS[table_name]
+    start = time.perf_counter()
+    rows = 0
+    deleted = None
+
+    with PartitionWriter(table_name, season, stage=stage) if store else nullcontext() as writer:
+        for batch in _iter_batches(path, batch_size):
+            with profiling.span("ingest.normalize", kind="pandas", table=table_name) as sp:
+                sp.rows_in = len(batch)
+                batch = _clean_keys(apply_schema(normalize(batch, season), table_name), table_name)
+                sp.rows_out = len(batch)
+            with profiling.span("ingest.insert", kind="sql", table=table_name) as sp:
+                sp.rows_in = len(batch)
+                _prepare_table(batch, table_name, conn, keys)
+                if deleted is None:
+                    deleted = _delete_season(conn, table_name, season)
+                _insert_rows(batch, table_name, conn)
+            if writer is not None:
+                with profiling.span("ingest.store", kind="io", table=table_name) as sp:
+                    sp.rows_in = len(batch)
+                    writer.write(batch)
+            rows += len(batch)
+
+    elapsed = time.perf_counter() - start
+    rate = rows / elapsed if elapsed > 0 else 0.0
+    logger.info(
+        f"Streamed {rows} rows into table '{table_name}' for season {season} "
+        f"(replaced {deleted or 0}) in {elapsed:.2f}s ({rate:,.0f} rows/s, batch_size={batch_size})"
+    )
+    return rows
+
+NORMALIZERS = {"players": normalize_players, "gamelogs": normalize_gamelogs}
+
+def _raw_path(dataset: str, season: int) -> Path:
+    path = RAW_DIR / f"{dataset}_{season}.parquet"
+    if not path.exists():
+        # try csv fallback
+        path = path.with_suffix(".csv")
+    return path
+
+def _ingested_checksum(conn: sqlite3.Connection, path: Path):
+    row = conn.execute("SELECT sha256 FROM ingest_files WHERE file = ?", (path.name,)).fetchone()
+    return row[0] if row else None
+
+def _record_ingested(conn: sqlite3.Connection, path: Path, season: int, sha256: str):
+    conn.execute(
+        "INSERT OR REPLACE INTO ingest_files (file, season, sha256, ingested_at) VALUES (?, ?, ?, ?)",
+        (path.name, season, sha256, datetime.now(timezone.utc).isoformat(timespec="seconds")),
+    )
+
+def bump_generation(conn: sqlite3.Connection, seasons=()) -> int:
+    """
+    Zählt die Ingest-Generation (PRAGMA user_version) hoch. Caches in stats.py
+    nehmen sie in ihre Schlüssel auf und verfallen damit genau beim Schreiben.
+    Für `seasons` (alle Saisons, deren Zeilen geschrieben wurden - auch von
+    abgeleiteten Tabellen) wird die neue Generation zusätzlich in
+    season_generations vermerkt; saisonbezogene Caches anderer Saisons bleiben.
+    """
+    generation = conn.execute("PRAGMA user_version").fetchone()[0] + 1
+    conn.execute(f"PRAGMA user_version = {int(generation)}")
+    if seasons:
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        conn.execute(SEASON_GENERATIONS_DDL)
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {SEASON_GENERATIONS_TABLE} (season, generation, updated_at) VALUES (?, ?, ?)",
+            [(int(s), generation, now) for s in sorted(set(seasons))],
+        )
+    return generation
+
+def ingest_season(season: int, stream: bool = False, batch_size: int = DEFAULT_BATCH_SIZE,
+                  force: bool = False, store: bool = True) -> bool:
+    """
+    Lädt players und gamelogs einer Saison in die DB.
+    - stream=True: batchweise lesen/schreiben (begrenzter Speicher, für große Dateien)
+    - force=False: Dateien, deren Prüfsumme schon geladen wurde, werden übersprungen
+    - store=True: zusätzlich die Parquet-Partition im Store (utils.io) ersetzen
+    Gibt True zurück, wenn sich etwas in der DB geändert hat.
+    """
+    with profiling.span("ingest.season", kind="stage", season=season, stream=stream) as stage:
+        changed = _ingest_season(season, stream, batch_size, force, store)
+        stage.attrs["changed"] = changed
+    return changed
+
+def _pending_files(conn: sqlite3.Connection, manifest: Manifest, season: int, force: bool) -> list:
+    """(tabelle, pfad, sha256) der Rohdateien einer Saison, die (neu) geladen werden müssen."""
+    pending = []
+    for table_name in NORMALIZERS:
+        path = _raw_path(table_name, season)
+        if not path.exists():
+            logger.warning(f"No {table_name} file for season {season}: {path}")
+            continue
+        sha256 = manifest.checksum(path)
+        if not force and _ingested_checksum(conn, path) == sha256:
+            logger.info(f"{path.name} unchanged since last ingest -> skipping (use --force to reload)")
+            continue
+        pending.append((table_name, path, sha256))
+    return pending
+
+def _derived(conn: sqlite3.Connection, season: int):
+    """
+    Abgeleitete Tabellen einer Saison neu bauen (in der Transaktion des Aufrufers).
+    Der Index für "Spieler wie X" liegt außerhalb der DB und wird erst nach dem
+    Commit gebaut (_rebuild_similarity), damit ein Rollback keinen Index für
+    nie geschriebene Daten hinterlässt.
+    """
+    with profiling.span("ingest.derived", kind="sql"):
+        ensure_indexes(conn)
+        touched = {season, *rebuild_season_totals(conn, season)}
+        rebuild_catalog(conn, season)
+        refreshed = refresh_weekly_stats(conn, season, STAT_COLUMNS)
+        touched.update(refreshed)  # bei geänderten Stat-Spalten: alle Saisons
+        if refreshed:
+            logger.info(f"Recomputed weekly stats from week(s) {refreshed}")
+        rows = refresh_fantasy_points(conn, season)
+        logger.info(f"Scored fantasy points for season {season} ({rows} player-rulesets)")
+        generation = bump_generation(conn, touched)
+        logger.info(f"Season(s) {sorted(touched)} now at generation {generation}")
+
+def _rebuild_similarity(conn: sqlite3.Connection):
+    """Index aus den committeten Daten bauen, dann die Generation erhöhen (similar_players-Caches)."""
+    rows = build_similarity_index(conn, STAT_COLUMNS)
+    logger.info(f"Rebuilt similarity index ({rows} player-seasons)")
+    with conn:
+        bump_generation(conn)
+
+def _ingest_season(season, stream, batch_size, force, store) -> bool:
+    conn = connect()
+    manifest = Manifest(RAW_DIR)
+
+    try:
+        conn.execute(INGEST_FILES_DDL)
+        pending = _pending_files(conn, manifest, season, force)
+        if not pending:
+            return False
+
+        # Eine Transaktion für die ganze Saison: entweder alles oder nichts.
+        # Die Store-Partitionen werden erst nach dem Commit eingetauscht.
+        with PartitionStage() as stage:
+            with conn:
+                conn.execute("BEGIN")
+
+                for table_name, path, sha256 in pending:
+                    normalize = NORMALIZERS[table_name]
+                    if stream:
+                        stream_table(path, table_name, conn, season, batch_size, store=store, stage=stage)
+                    else:
+                        with profiling.span("ingest.read", kind="io", table=table_name) as sp:
+                            raw = _safe_read(path)
+                            sp.rows_out, sp.bytes_read = len(raw), path.stat().st_size
+                        with profiling.span("ingest.normalize", kind="pandas", table=table_name) as sp:
+                            sp.rows_in = len(raw)
+                            df = normalize(raw, season)
+                            del raw
+                            compact = apply_schema(df, table_name)
+                            report = memory_report(df, compact)
+                            logger.info(
+                                f"Compact dtypes for '{table_name}': {report['bytes_before'] / 1024:,.0f} KB -> "
+                                f"{report['bytes_after'] / 1024:,.0f} KB (-{report['saved_pct']}%)"
+                            )
+                            del df
+                            compact = _clean_keys(compact, table_name)
+                            sp.rows_out = len(compact)
+                        with profiling.span("ingest.upsert", kind="sql", table=table_name) as sp:
+                            sp.rows_in = len(compact)
+                            upsert_table(compact, table_name, conn, season)
+                        if store:
+                            with profiling.span("ingest.store", kind="io", table=table_name) as sp:
+                                sp.rows_in = len(compact)
+                                staged = write_partition(compact, table_name, season, stage=stage)
+                                sp.bytes_written = staged.stat().st_size
+                    _record_ingested(conn, path, season, sha256)
+
+                _derived(conn, season)
+            stage.commit()
+
+        _rebuild_similarity(conn)
+        with profiling.span("ingest.analyze", kind="sql"):
+            analyze(conn)
+        return True
     finally:
         conn.close()
-    
+
+# --- Parallel: N Prozesse parsen, EIN Schreiber (dieser Prozess) hält die DB ---
+
+def _init_parse_worker(profile_path):
+    """Initializer der Parse-Prozesse: Logging wie im Elternprozess, ggf. eigenes Profiling."""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if profile_path:
+        profiling.configure(profile_path)
+
+def _parse_to_ipc(table_name: str, path: str, season: int, out_dir: str, batch_size: int) -> dict:
+    """
+    Läuft in einem Parse-Prozess: Rohdatei lesen, Header reparieren,
+    normalisieren, kompakte dtypes, Schlüssel bereinigen - und das Ergebnis als
+    Arrow-IPC-Datei (Record-Batches zu je batch_size Zeilen) nach out_dir schreiben.
+    Gibt {table, season, ipc, rows, parse_s} zurück.
+    """
+    import pyarrow as pa
+
+    start = time.perf_counter()
+    with profiling.span("ingest.parse", kind="stage", table=table_name, season=season) as sp:
+        raw = _safe_read(Path(path))
+        sp.rows_in = len(raw)
+        df = _clean_keys(apply_schema(NORMALIZERS[table_name](raw, season), table_name), table_name)
+        del raw
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        ipc = Path(out_dir) / f"{table_name}_{season}.arrow"
+        with pa.OSFile(str(ipc), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            for batch in table.to_batches(max_chunksize=batch_size):
+                writer.write_batch(batch)
+        sp.rows_out, sp.bytes_written = len(df), ipc.stat().st_size
+    return {"table": table_name, "season": season, "ipc": str(ipc), "rows": len(df),
+            "parse_s": round(time.perf_counter() - start, 4)}
+
+def _write_parsed(conn: sqlite3.Connection, parsed: dict, stage: PartitionStage = None) -> int:
+    """
+    Schreibt eine geparste Tabelle batchweise aus der IPC-Datei (Transaktion des
+    Aufrufers); mit `stage` zusätzlich die Store-Partition (eingesetzt bei stage.commit()).
+    """
+    import pyarrow as pa
+
+    table_name, season = parsed["table"], parsed["season"]
+    keys = TABLE_KEYS[table_name]
+    rows = 0
+    deleted = None
+    with pa.memory_map(parsed["ipc"]) as source, \
+            (PartitionWriter(table_name, season, stage=stage) if stage is not None else nullcontext()) as writer:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i).to_pandas()
+            with profiling.span("ingest.insert", kind="sql", table=table_name) as sp:
+                sp.rows_in = len(batch)
+                _prepare_table(batch, table_name, conn, keys)
+                if deleted is None:
+                    deleted = _delete_season(conn, table_name, season)
+                _insert_rows(batch, table_name, conn)
+            if writer is not None:
+                with profiling.span("ingest.store", kind="io", table=table_name) as sp:
+                    sp.rows_in = len(batch)
+                    writer.write(batch)
+            rows += len(batch)
+    logger.info(f"Wrote {rows} rows into table '{table_name}' for season {season} (replaced {deleted or 0})")
+    return rows
+
+def _write_season(conn: sqlite3.Connection, season: int, parsed_files: list, store: bool, jobs: int) -> dict:
+    """
+    Schreibt die geparsten Dateien einer Saison in EINER Transaktion; Rollback bei
+    Fehlern. Die Store-Partitionen werden erst nach dem Commit eingetauscht.
+    """
+    start = time.perf_counter()
+    with profiling.span("ingest.season", kind="stage", season=season, jobs=jobs), PartitionStage() as stage:
+        with conn:
+            conn.execute("BEGIN")
+            rows = 0
+            for parsed, path, sha256 in parsed_files:
+                rows += _write_parsed(conn, parsed, stage if store else None)
+                _record_ingested(conn, path, season, sha256)
+                Path(parsed["ipc"]).unlink()
+            _derived(conn, season)
+        stage.commit()
+    result = {
+        "season": season,
+        "rows": rows,
+        "parse_s": round(sum(p["parse_s"] for p, _, _ in parsed_files), 4),
+        "write_s": round(time.perf_counter() - start, 4),
+    }
+    logger.info(
+        f"Season {season}: {rows} rows, parse {result['parse_s']:.2f}s (workers), write {result['write_s']:.2f}s"
+    )
+    return result
+
+def ingest_seasons(seasons, jobs: int = 4, force: bool = False, store: bool = True,
+                   batch_size: int = DEFAULT_BATCH_SIZE) -> list:
+    """
+    Mehrere Saisons parallel: ein Prozess-Pool mit `jobs` Workern liest und
+    normalisiert die Rohdateien (CPU-lastig, pro Saison unabhängig) und legt
+    das Ergebnis als Arrow-IPC in einen Temp-Ordner. Dieser Prozess ist der
+    einzige Schreiber: sobald alle Dateien einer Saison geparst sind, schreibt
+    er sie batchweise in EINER Transaktion (wie ingest_season) und baut die
+    abgeleiteten Tabellen. Index für "Spieler wie X" und ANALYZE einmal am Ende,
+    sobald mindestens eine Saison committet wurde.
+    Scheitert das Parsen oder Schreiben einer Saison, bleibt sie unverändert
+    und die übrigen laufen weiter.
+    Gibt pro Saison {season, rows, parse_s, write_s} bzw. {season, error} zurück.
+    """
+    conn = connect()
+    manifest = Manifest(RAW_DIR)
+    summary = []
+    try:
+        conn.execute(INGEST_FILES_DDL)
+        pending = {s: _pending_files(conn, manifest, s, force) for s in seasons}
+        pending = {s: files for s, files in pending.items() if files}
+        if not pending:
+            return summary
+
+        profile_path = str(profiling.PROFILER.path) if profiling.PROFILER.enabled else None
+        ctx = multiprocessing.get_context("spawn")
+        with tempfile.TemporaryDirectory(prefix=".ingest-", dir=DB_PATH.parent) as tmp, \
+                ProcessPoolExecutor(max_workers=jobs, mp_context=ctx, initializer=_init_parse_worker,
+                                    initargs=(profile_path,)) as pool:
+            futures = {
+                pool.submit(_parse_to_ipc, table_name, str(path), season, tmp, batch_size): (season, path, sha256)
+                for season, files in pending.items() for table_name, path, sha256 in files
+            }
+            done = {s: [] for s in pending}
+            failed = {}
+            for future in as_completed(futures):
+                season, path, sha256 = futures[future]
+                if season in failed:
+                    continue
+                try:
+                    done[season].append((future.result(), path, sha256))
+                except Exception as e:
+                    failed[season] = f"parsing {path.name} failed: {e}"
+                    logger.error(f"Season {season}: {failed[season]} -> season skipped")
+                    continue
+                if len(done[season]) < len(pending[season]):
+                    continue
+
+                # Saison komplett geparst -> schreiben, während die Worker weiterparsen
+                try:
+                    summary.append(_write_season(conn, season, done[season], store, jobs))
+                except Exception as e:
+                    failed[season] = f"writing failed: {e}"
+                    logger.error(f"Season {season}: {failed[season]} -> rolled back")
+            summary.extend({"season": s, "error": error} for s, error in sorted(failed.items()))
+
+        if any("error" not in r for r in summary):
+            _rebuild_similarity(conn)
+            with profiling.span("ingest.analyze", kind="sql"):
+                analyze(conn)
+        return summary
+    finally:
+        conn.close()
+
 
 if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(description="Ingest raw files into sqlite db")
     parser.add_argument("--seasons", "-s", type=int, nargs="+", default=[2023])
+    parser.add_argument("--stream", action="store_true", help="Read and write in batches with bounded memory")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per batch in --stream mode")
+    parser.add_argument("--force", "-f", action="store_true", help="Reload files even if their checksum was already ingested")
+    parser.add_argument("--no-store", action="store_true", help="Skip writing the partitioned Parquet store")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Parse seasons in N processes; one writer commits each season (ignores --stream)")
+    profiling.add_profile_args(parser)
     args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    profiling.configure_from_args(args)
 
-    for s in args.seasons:
-        ingest_season(s)
\ No newline at end of file
+    if args.jobs > 1:
+        start = time.perf_counter()
+        summary = ingest_seasons(args.seasons, jobs=args.jobs, force=args.force, store=not args.no_store,
+                                 batch_size=args.batch_size)
+        for r in sorted(summary, key=lambda r: r["season"]):
+            if "error" in r:
+                logger.error(f"{r['season']}  FAILED: {r['error']}")
+            else:
+                logger.info(f"{r['season']}  rows={r['rows']:<8} parse={r['parse_s']:.2f}s  write={r['write_s']:.2f}s")
+        ok = [r for r in summary if "error" not in r]
+        logger.info(f"Ingested {len(ok)} season(s) with {args.jobs} parse jobs in {time.perf_counter() - start:.2f}s")
+        if len(ok) < len(summary):
+            sys.exit(1)
+    else:
+        for s in args.seasons:
+            ingest_season(s, stream=args.stream, batch_size=args.batch_size, force=args.force, store=not args.no_store)
\ No newline at end of file
@@ -0,0 +1,143 @@
+"""
+src/etl/watch.py
+
+Beobachtet raw/ und lädt neue oder geänderte Saison-Dateien automatisch.
+
+- Pollt alle `--interval` Sekunden (nur os.stat, kein Lesen): eine Datei gilt
+  als geändert, wenn sich Größe oder mtime ändern. Die Fetcher schreiben
+  atomar (utils.io.atomic_write), halbe Dateien sieht der Watcher also nie;
+  Temp-Dateien passen nicht auf das Namensmuster und werden ignoriert.
+- Geladen werden nur die betroffenen Saisons (ingest_season bzw. mit
+  --jobs N ingest_seasons); Dateien mit unveränderter Prüfsumme überspringt
+  der Ingest wie immer.
+- Jeder Ingest zählt die Generation der Saison hoch (season_generations).
+  Die App fragt sie regelmäßig ab und lädt neu; Caches anderer Saisons
+  bleiben dabei gültig (siehe stats.db_generation).
+- Mit --export werden danach die Arrow-Snapshots der geladenen Saisons
+  erneuert (etl/export.py).
+
+    python src/etl/watch.py --interval 2
+    python src/etl/watch.py --once          # ein Durchgang, z.B. per cron
+"""
+
+from pathlib import Path
+import logging
+import re
+import sys
+import time
+
+ROOT = Path(__file__).parents[2] # repo root
+sys.path.insert(0, str(ROOT / "src"))
+
+from etl import ingest
+from utils import profiling
+
+DEFAULT_INTERVAL = 2.0
+# <dataset>_<saison>.parquet (oder .csv, wie ingest._raw_path) für die Tabellen, die der Ingest kennt
+FILE_PATTERN = re.compile(rf"^({'|'.join(ingest.NORMALIZERS)})_(\d{{4}})\.(parquet|csv)$")
+
+logger = logging.getLogger("watch")
+
+
+def scan(raw_dir: Path = None) -> dict:
+    """{dateiname: (größe, mtime_ns)} aller Saison-Dateien in raw/."""
+    raw_dir = Path(raw_dir or ingest.RAW_DIR)
+    if not raw_dir.is_dir():
+        return {}
+    files = {}
+    for path in raw_dir.iterdir():
+        if FILE_PATTERN.match(path.name):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            files[path.name] = (st.st_size, st.st_mtime_ns)
+    return files
+
+
+def _season(name: str) -> int:
+    return int(FILE_PATTERN.match(name).group(2))
+
+
+def changed_seasons(before: dict, after: dict) -> list:
+    """Saisons, deren Dateien neu sind oder sich geändert haben (gelöschte zählen nicht)."""
+    return sorted({_season(name) for name, signature in after.items() if before.get(name) != signature})
+
+
+def ingest_changed(seasons, jobs: int = 1) -> list:
+    """Lädt die Saisons; gibt die zurück, bei denen sich in der DB etwas geändert hat."""
+    if jobs > 1 and len(seasons) > 1:
+        summary = ingest.ingest_seasons(seasons, jobs=jobs)
+        failed = [r for r in summary if "error" in r]
+        if failed:
+            # geschriebene Saisons überspringt der nächste Versuch per Prüfsumme
+            raise RuntimeError("; ".join(f"{r['season']}: {r['error']}" for r in failed))
+        return sorted(r["season"] for r in summary)
+    return [season for season in seasons if ingest.ingest_season(season)]
+
+
+def _generation() -> int:
+    conn = ingest.connect()
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def watch(interval: float = DEFAULT_INTERVAL, jobs: int = 1, once: bool = False, max_polls: int = None,
+          export: bool = False) -> list:
+    """
+    Pollt raw/ und lädt geänderte Saisons. Beim Start werden alle vorhandenen
+    Dateien einmal geprüft (unveränderte überspringt der Ingest per Prüfsumme).
+    Schlägt ein Ingest fehl, wird die Saison beim nächsten Durchgang erneut
+    versucht. Gibt die Liste (generation, [saisons]) aller Ingests zurück.
+    """
+    seen = {}
+    history = []
+    polls = 0
+    while True:
+        current = scan()
+        seasons = changed_seasons(seen, current)
+        if seasons:
+            logger.info(f"Changed raw files for season(s) {seasons}")
+            try:
+                with profiling.span("watch.ingest", kind="stage", seasons=len(seasons)):
+                    ingested = ingest_changed(seasons, jobs)
+            except Exception as e:
+                logger.error(f"Ingest of season(s) {seasons} failed, retrying next poll: {e}")
+                # Signaturen nicht übernehmen -> die Saisons gelten beim nächsten Mal wieder als geändert
+                current = {name: sig for name, sig in current.items() if _season(name) not in seasons}
+            else:
+                if ingested:
+                    generation = _generation()
+                    history.append((generation, ingested))
+                    logger.info(f"Ingested season(s) {ingested} -> generation {generation}")
+                    if export:
+                        from etl import export as snapshot_export
+
+                        snapshot_export.refresh(ingested)
+        seen = current
+
+        polls += 1
+        if once or (max_polls is not None and polls >= max_polls):
+            return history
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Watch raw/ and ingest new or changed season files")
+    parser.add_argument("--interval", "-i", type=float, default=DEFAULT_INTERVAL, help="Seconds between polls")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Parse processes when several seasons change")
+    parser.add_argument("--once", action="store_true", help="Check once and exit")
+    parser.add_argument("--export", action="store_true", help="Refresh the Arrow snapshots of ingested seasons")
+    profiling.add_profile_args(parser)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    profiling.configure_from_args(args)
+
+    try:
+        watch(args.interval, args.jobs, args.once, export=args.export)
+    except KeyboardInterrupt:
+        logger.info("Stopped watching")
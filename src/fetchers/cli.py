@@ -1,35 +1,95 @@
 import argparse
+import logging
 import sys
 from pathlib import Path
 
 ROOT = Path(__file__).parents[2] # repo root
 sys.path.insert(0, str(ROOT / "src"))
 
-from fetchers.nflreadpy_fetch import fetch_gamelogs, fetch_rosters, logger
+from utils import profiling
+from utils.manifest import CURRENT_SEASON_TTL_HOURS as DEFAULT_MAX_AGE_HOURS  # nur stdlib
+
+# Default wie in fetchers/nflreadpy_fetch.py - hier dupliziert, damit `--help`
+# ohne pandas/pyarrow-Import auskommt
+DEFAULT_ROW_GROUP_SIZE = 32768
+
+logger = logging.getLogger("nfl_fetcher")
+
+def run_concurrent(args, seasons):
+  from fetchers.nflreadpy_fetch import fetch_concurrent
+
+  datasets = [d for d in ("rosters", "gamelogs") if getattr(args, d)] or ["rosters", "gamelogs"]
+  logger.info(f"Fetching {datasets} for seasons: {seasons} (jobs={args.jobs}, force={args.force})")
+  summary = fetch_concurrent(
+    datasets=datasets, seasons=seasons, jobs=args.jobs, force=args.force,
+    rate=args.rate, retries=args.retries, max_age_hours=args.max_age_hours,
+  )
+  for r in summary:
+    logger.info(
+      f"{r['dataset']:<9} {r['season']}  {r['source']:<12} rows={r['rows']:<6} "
+      f"attempts={r['attempts']} seconds={r['seconds']}"
+    )
+  return summary
 
 def main(args):
+  # schwere Imports (pandas, pyarrow, Backends) erst, wenn wirklich geladen wird
+  from fetchers import nflreadpy_fetch
+  from fetchers.nflreadpy_fetch import fetch_gamelogs, fetch_pbp, fetch_rosters
+
+  logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s %(message)s",
+    handlers=[logging.StreamHandler(sys.stdout)]
+  )
   seasons = args.seasons if args.seasons else [2023]
   force = args.force
+  max_age_hours = args.max_age_hours
+  profiling.configure_from_args(args)
+
+  if args.pbp:
+    columns = None
+    if args.pbp_columns is not None:
+      columns = args.pbp_columns or nflreadpy_fetch.PBP_CORE_COLUMNS
+    logger.info(f"Fetching play-by-play for seasons: {seasons} (force={force}, columns={len(columns) if columns else 'all'})")
+    fetch_pbp(seasons=seasons, force=force, columns=columns, row_group_size=args.row_group_size,
+              max_age_hours=max_age_hours)
+    if not args.rosters and not args.gamelogs:
+      return
+
+  if args.jobs > 1:
+    run_concurrent(args, seasons)
+    return
   
   if args.rosters:
     logger.info(f"Fetching rosters for seasons: {seasons} (force={force})")
-    fetch_rosters(seasons=seasons, force=force)
+    fetch_rosters(seasons=seasons, force=force, max_age_hours=max_age_hours)
   
   if args.gamelogs:
     logger.info(f"Fetching gamelogs for seasons: {seasons} (force={force})")
-    fetch_gamelogs(seasons=seasons, force=force)
+    fetch_gamelogs(seasons=seasons, force=force, max_age_hours=max_age_hours)
   
   if not args.rosters and not args.gamelogs:
     # default run both
-    fetch_rosters(seasons=seasons, force=force)
-    fetch_gamelogs(seasons=seasons, force=force)
+    fetch_rosters(seasons=seasons, force=force, max_age_hours=max_age_hours)
+    fetch_gamelogs(seasons=seasons, force=force, max_age_hours=max_age_hours)
     
 
 if __name__ == "__main__":
   parser = argparse.ArgumentParser(description="NFL data fetcher (starter).")
   parser.add_argument("--seasons", "-s", type=int, nargs="+", help="Seasons to fetch (e.g. 2023 2022)", default=[2023])
   parser.add_argument("--force", "-f", action="store_true", help="Force re-fetch even if raw files exist")
+  parser.add_argument("--max-age-hours", type=float, default=DEFAULT_MAX_AGE_HOURS,
+                      help="Re-fetch current-season files older than this (past seasons never expire)")
   parser.add_argument("--rosters", action="store_true", help="Fetch rosters")
   parser.add_argument("--gamelogs", action="store_true", help="Fetch gamelogs")
+  parser.add_argument("--pbp", action="store_true", help="Fetch play-by-play (streamed to parquet)")
+  parser.add_argument("--pbp-columns", nargs="*", default=None, metavar="COL",
+                      help="Only keep these play-by-play columns (no names: a core set of ~30)")
+  parser.add_argument("--row-group-size", type=int, default=DEFAULT_ROW_GROUP_SIZE,
+                      help="Rows per parquet row group for play-by-play")
+  parser.add_argument("--jobs", "-j", type=int, default=1, help="Fetch seasons/datasets concurrently with N workers")
+  parser.add_argument("--rate", type=float, default=2.0, help="Max backend calls per second across workers (with --jobs)")
+  parser.add_argument("--retries", type=int, default=3, help="Attempts per season before falling back to demo data (with --jobs)")
+  profiling.add_profile_args(parser)
   args = parser.parse_args()
   main(args)
\ No newline at end of file
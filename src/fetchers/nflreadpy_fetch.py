@@ -6,6 +6,8 @@ Starter-Fetcher für dein NFL-Projekt.
 Funktionen:
 - fetch_rosters(seasons, force=False)
 - fetch_gamelogs(seasons, force=False)
+- fetch_concurrent(datasets, seasons, jobs=4, ...)  (parallel, mit Rate-Limit + Retries)
+- fetch_pbp(seasons, columns=None)  (Play-by-Play, gestreamt in Row-Groups geschrieben)
 
 Verhalten:
 - Versucht, eine installierte nfl-library (z.B. `nflreadpy` oder `nfl_data_py`) zu nutzen.
@@ -14,7 +16,15 @@ Verhalten:
 - Wenn keine passende Bibliothek gefunden oder ein Fehler auftritt, wird ein Demo-CSV / parquet
   erzeugt (sodass du weiterarbeiten kannst).
 - Speichert Rohdaten in `raw/` als Parquet (einfache, effiziente Form).
+  - Schreiben ist atomar (Temp-Datei + rename); jede Datei steht mit Prüfsumme,
+    Zeilenzahl, Schema und Quelle in `raw/manifest.json`.
+  - Vorhandene Dateien werden nur neu geladen, wenn sie laut Manifest nicht mehr
+    frisch sind (laufende Saison: nach `max_age_hours`, Standard
+    utils.manifest.CURRENT_SEASON_TTL_HOURS; alte Saisons nie).
 - CLI: `python src/fetchers/nfl_fetcher.py --seasons 2023 2022 [--force]`
+- Beim Import passiert nichts (kein raw/, kein Logging-Setup); welches Backend
+  installiert ist und welcher Aufruf (z.B. `tidy.read_rosters` vs `load_rosters`)
+  funktioniert, wird pro Prozess gemerkt und in `raw/backends.json` abgelegt.
 
 Anpassung:
 - Wenn du `nflreadpy` installiert hast, öffne dieses Skript und passe die Stelle
@@ -23,45 +33,82 @@ Anpassung:
 
 from pathlib import Path
 import pandas as pd
+import json
 import logging
-import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
 
+from utils import profiling
+from utils.io import atomic_write
+from utils.manifest import CURRENT_SEASON_TTL_HOURS, Manifest, current_season
+
+# wird erst beim ersten Schreiben angelegt (atomic_write)
 RAW_DIR = Path("raw")
-RAW_DIR.mkdir(parents=True, exist_ok=True)
-
-# set up Logging
-logging.basicConfig(
-    level=logging.INFO, 
-    format="%(asctime)s %(levelname)s %(message)s",
-    handlers=[logging.StreamHandler(sys.stdout)]
-)
+
+# Logging konfiguriert der Aufrufer (z.B. fetchers/cli.py), nicht der Import
 logger = logging.getLogger("nfl_fetcher")
 
+_manifests = {}
+_manifests_lock = threading.Lock()
+
+def get_manifest(raw_dir: Path = None) -> Manifest:
+  """Eine gemeinsame Manifest-Instanz pro raw-Ordner (auch über Threads hinweg)."""
+  raw_dir = Path(raw_dir or RAW_DIR)
+  with _manifests_lock:
+    if raw_dir not in _manifests:
+      _manifests[raw_dir] = Manifest(raw_dir)
+    return _manifests[raw_dir]
+
 # small helper: write parquet safely
-def write_parquet(df: pd.DataFrame, path: Path):
+def write_parquet(df: pd.DataFrame, path: Path, source="unknown", season=None, dataset=None) -> Path:
+    """
+    Schreibt atomar (Temp-Datei + rename) und trägt die Datei ins Manifest ein.
+    Gibt den tatsächlich geschriebenen Pfad zurück (.csv beim Fallback).
+    """
     
     # Stelle sicher, dass alle Spaltennamen Strings sind
     df.columns = [str(col) for col in df.columns]
-
-    # Zielordner erstellen, falls nicht vorhanden
-    path.parent.mkdir(parents=True, exist_ok=True)
     
-    try:
-      df.to_parquet(path, index=False)
-      logger.info(f"Wrote {len(df)} rows to {path}")
-    except Exception as e:
-      # fallback to csv if parquet fails for any reason
-      logger.warning(f"Parquet write failed ({e}); wrote CSV to {csv_path}")
-      csv_path = path.with_suffix(".csv")
-      df.to_csv(csv_path, index=False)
-      logger.info(f"Wrote {len(df)} rows to {csv_path}")
+    with profiling.span("fetch.write", kind="io", file=Path(path).name) as sp:
+      sp.rows_in = len(df)
+      try:
+        with atomic_write(path) as tmp:
+          df.to_parquet(tmp, index=False)
+        logger.info(f"Wrote {len(df)} rows to {path}")
+      except Exception as e:
+        # fallback to csv if parquet fails for any reason
+        csv_path = path.with_suffix(".csv")
+        logger.warning(f"Parquet write failed ({e}); writing CSV to {csv_path}")
+        with atomic_write(csv_path) as tmp:
+          df.to_csv(tmp, index=False)
+        logger.info(f"Wrote {len(df)} rows to {csv_path}")
+        path = csv_path
+      sp.bytes_written = path.stat().st_size
+
+    get_manifest(path.parent).record(path, df, source=source, season=season, dataset=dataset)
+    return path
 
-def use_nfl_library_available():
+# Backend-Erkennung und funktionierende Aufrufe, einmal pro Prozess
+BACKENDS_CACHE_NAME = "backends.json"
+_backend_mods = None
+_call_patterns = None  # modul -> {"version": ..., "calls": {dataset: aufruf}}
+_backend_lock = threading.Lock()
+
+def use_nfl_library_available(refresh=False):
   """
   Prüft, ob bekannte nfl-Pakete installiert sind und gibt die importierten Module zurück.
-  Reihenfolge: nflreadpy, nfl_data_py
+  Reihenfolge: nflreadpy, nfl_data_py. Das Ergebnis wird pro Prozess gemerkt
+  (refresh=True sucht neu, z.B. nach einem pip install).
   """
+  global _backend_mods
+  with _backend_lock:
+    if _backend_mods is None or refresh:
+      _backend_mods = _discover_backends()
+    return dict(_backend_mods)
+
+def _discover_backends():
   mods = {}
   try: 
     import nflreadpy as nrp
@@ -79,174 +126,550 @@ def use_nfl_library_available():
 
   return mods
 
-def fetch_rosters(seasons=[2023], force=False, sleep_between=0.5):
+def _backends_cache_path() -> Path:
+  return RAW_DIR / BACKENDS_CACHE_NAME
+
+def _known_calls(module_name, mod) -> dict:
+  """Gemerkte Aufrufe eines Backends (aus raw/backends.json, solange die Version passt)."""
+  global _call_patterns
+  with _backend_lock:
+    if _call_patterns is None:
+      try:
+        _call_patterns = json.loads(_backends_cache_path().read_text())
+      except (FileNotFoundError, ValueError):
+        _call_patterns = {}
+    entry = _call_patterns.get(module_name)
+    if entry is None or entry.get("version") != getattr(mod, "__version__", None):
+      return {}
+    return dict(entry.get("calls", {}))
+
+def _remember_call(module_name, mod, dataset, call_name):
+  with _backend_lock:
+    entry = _call_patterns.setdefault(module_name, {"version": None, "calls": {}})
+    version = getattr(mod, "__version__", None)
+    if entry.get("version") != version:
+      entry.update(version=version, calls={})
+    entry["calls"][dataset] = call_name
+    try:
+      with atomic_write(_backends_cache_path()) as tmp:
+        tmp.write_text(json.dumps(_call_patterns, indent=2, sort_keys=True))
+    except OSError as e:
+      logger.debug(f"Could not persist backend call patterns: {e}")
+
+class BackendError(RuntimeError):
+  """Ein vorhandener Backend-Aufruf ist fehlgeschlagen (z.B. Netzwerk) - ein neuer Versuch kann helfen."""
+
+def _first_working_call(module_name, mod, dataset, calls):
   """
-    Lade Rosters/Players für die gegebenen Seasons.
-    - seasons: Liste von ints
-    - force: True -> überschreibe vorhandene raw-Dateien; False -> skip wenn vorhanden
+  Probiert die Aufrufe `calls` ([(name, fn)]) der Reihe nach und gibt das erste
+  Ergebnis != None zurück. Der zuletzt funktionierende Aufruf wird zuerst
+  probiert, sodass fehlschlagende Varianten nur einmal Zeit kosten.
+  Gibt es keinen der Aufrufe (AttributeError), kommt None zurück; ist
+  mindestens einer daran gescheitert, dass er beim Aufruf eine Exception warf,
+  wird die letzte als BackendError weitergereicht.
   """
+  known = _known_calls(module_name, mod).get(dataset)
+  error = None
+  for name, call in sorted(calls, key=lambda c: c[0] != known):
+    try:
+      got = call()
+    except AttributeError:
+      continue  # diese Variante gibt es in der installierten Version nicht
+    except Exception as e:
+      error = e
+      continue
+    if got is not None:
+      if name != known:
+        _remember_call(module_name, mod, dataset, name)
+      return got
+  if error is not None:
+    raise BackendError(f"{module_name} {dataset}: {error}") from error
+  return None
+
+def _rosters_from_backend(s, mods):
+  """
+  Versucht die installierten Bibliotheken für die Rosters einer Saison.
+  Gibt (df, quelle) zurück, oder (None, None) wenn kein Backend geliefert hat.
+  Ist dabei ein Aufruf mit einer Exception gescheitert, kommt stattdessen ein
+  BackendError (fetch_concurrent versucht es dann erneut).
+  """
+  failed = None
+  # Try nflreadpy first (if available)
+  if 'nflreadpy' in mods:
+    nrp = mods['nflreadpy']
+    try:
+      # === Anpassungspunkt ===
+      # nflreadpy API-Beispiele unterscheiden sich; passe hier an, falls nötig.
+      # Typische Möglichkeiten (je nach Version):
+      # - nrp.tidy.read_rosters(season)
+      # - nrp.load_rosters(season)
+      # - nrp.rosters(season)
+      # Wir probieren mehrere Aufrufe in einer Reihenfolge und verwenden den ersten, der funktioniert
+      # (der zuletzt erfolgreiche kommt zuerst dran, siehe _first_working_call)
+      got = _first_working_call("nflreadpy", nrp, "rosters", [
+        ("tidy.read_rosters", lambda: nrp.tidy.read_rosters(s)),
+        ("load_rosters", lambda: nrp.load_rosters(s)),
+        ("rosters", lambda: nrp.rosters(s)),
+      ])
+
+      if got is not None:
+        return pd.DataFrame(got), "nflreadpy"
+      else:
+        logger.warning("nflreadpy is installed but automatic call paterns failed; falling back.")
+    except Exception as e:
+      failed = e
+      logger.exception("Error while using nflreadpy for rosters (falling back): %s", e)
+  
+  # Try nfl_data_py next (if available)
+  if 'nfl_data_py' in mods:
+    ndp = mods['nfl_data_py']
+    try:
+      got = None
+      if hasattr(ndp, "get_rosters"):
+        got = ndp.get_rosters(s)
+      elif hasattr(ndp, "rosters"):
+        got = ndp.rosters(s)
+      if got is not None:
+        return pd.DataFrame(got), "nfl_data_py"
+    except Exception as e:
+      failed = e
+      logger.exception("Error while using nfl_data_py for rosters (falling back): %s", e)
+
+  if failed is not None:
+    raise BackendError(f"No backend delivered rosters for {s}: {failed}") from failed
+  return None, None
+
+def _demo_rosters(s):
+  return pd.DataFrame([
+    {"player_id": 1, "full_name": "Sean Example", "position": "QB", "team": "KC", "birthdate": "1998-10-14"},
+    {"player_id": 2, "full_name": "Dodo Piss", "position": "FB", "team": "DAL", "birthdate": "1998-11-12"},
+  ])
+
+def _gamelogs_from_backend(s, mods):
+  """Wie _rosters_from_backend, für die Gamelogs einer Saison."""
+  failed = None
+  # Try nflreadpy
+  if 'nflreadpy' in mods:
+    nrp = mods['nflreadpy']
+    try:
+      got = _first_working_call("nflreadpy", nrp, "gamelogs", [
+        ("tidy.read_gamelogs", lambda: nrp.tidy.read_gamelogs(s)),
+        ("load_gamelogs", lambda: nrp.load_gamelogs(s)),
+        ("gamelogs", lambda: nrp.gamelogs(s)),
+      ])
+      if got is not None:
+        return pd.DataFrame(got), "nflreadpy"
+      else:
+        logger.warning("nflreadpy installed but could not auto-fetch gamelogs")
+    except Exception as e:
+      failed = e
+      logger.exception("Error while using nflreadpy for gamelogs (falling back): %s", e)
+
+  # Try nfl_data_py
+  if 'nfl_data_py' in mods:
+    ndp = mods['nfl_data_py']
+    try:
+      # Dies ist der Standard-Befehl für wöchentliche Stats/Gamelogs
+      got = ndp.import_weekly_data([s]) 
+      
+      if got is not None:
+        return pd.DataFrame(got), "nfl_data_py"
+    except Exception as e:
+      failed = e
+      logger.error(f"Error using nfl_data_py: {e}")
+
+  if failed is not None:
+    raise BackendError(f"No backend delivered gamelogs for {s}: {failed}") from failed
+  return None, None
+
+def _demo_gamelogs(s):
+  return pd.DataFrame([
+    {"game_id": 1, "player_id": 1, "season": s, "yards": 5478, "td": 8},
+  ])
+
+# dataset -> (Dateipräfix in raw/, Backend-Funktion, Demo-Funktion)
+DATASETS = {
+  "rosters": ("players", _rosters_from_backend, _demo_rosters),
+  "gamelogs": ("gamelogs", _gamelogs_from_backend, _demo_gamelogs),
+}
+
+def _read_existing(out_path, force, season, dataset=None, max_age_hours=CURRENT_SEASON_TTL_HOURS):
+  """
+  Liest eine vorhandene raw-Datei, solange sie laut Manifest frisch ist
+  (None, wenn neu geladen werden soll; die laufende Saison veraltet nach
+  `max_age_hours`). Dateien aus der Zeit vor dem Manifest werden beim ersten
+  Lesen nachgetragen.
+  """
+  if force or not out_path.exists():
+    return None
+
+  manifest = get_manifest(out_path.parent)
+  try:
+    with profiling.span("fetch.read_existing", kind="io", file=out_path.name) as sp:
+      df = pd.read_parquet(out_path)
+      sp.rows_out, sp.bytes_read = len(df), out_path.stat().st_size
+  except Exception:
+    logger.warning(f"Failed to read existing {out_path}; will re-fetch")
+    return None
+
+  if manifest.entry(out_path) is None:
+    mtime = datetime.fromtimestamp(out_path.stat().st_mtime, tz=timezone.utc)
+    manifest.record(out_path, df, source="unknown", season=season, dataset=dataset, fetched_at=mtime)
+
+  if not manifest.is_fresh(out_path, season, current_season_ttl_hours=max_age_hours):
+    logger.info(f"{out_path} is stale (current season {current_season()}) -> re-fetching")
+    return None
+
+  logger.info(f"{out_path} already exists and is fresh -> skipping (use --force to overwrite)")
+  return df
+
+def _call_backend(from_backend, s, mods, dataset):
+  with profiling.span("fetch.backend", kind="io", dataset=dataset, season=s) as sp:
+    df, source = from_backend(s, mods)
+    sp.rows_out = len(df) if df is not None else 0
+    sp.attrs["source"] = source
+  return df, source
+
+def _fetch_serial(dataset, seasons, force, sleep_between, max_age_hours):
+  prefix, from_backend, demo = DATASETS[dataset]
   mods = use_nfl_library_available()
 
   results = []
   for s in seasons:
-    out_path = RAW_DIR / f"players_{s}.parquet"
-    if out_path.exists() and not force:
-      logger.info(f"{out_path} already exists -> skipping (use --force to overwrite)")
-      try:
-        df = pd.read_parquet(out_path)
+    with profiling.span(f"fetch.{dataset}", kind="stage", season=s) as stage:
+      out_path = RAW_DIR / f"{prefix}_{s}.parquet"
+      df = _read_existing(out_path, force, s, dataset, max_age_hours)
+      if df is not None:
         results.append(df)
+        stage.rows_out, stage.attrs["source"] = len(df), "cached"
         continue
-      except Exception:
-        logger.warning(f"Failed to read existing {out_path}; will re-fetch")
 
-    # Try nflreadpy first (if available)
-    if 'nflreadpy' in mods:
-      nrp = mods['nflreadpy']
-      try:
-        # === Anpassungspunkt ===
-        # nflreadpy API-Beispiele unterscheiden sich; passe hier an, falls nötig.
-        # Typische Möglichkeiten (je nach Version):
-        # - nrp.tidy.read_rosters(season)
-        # - nrp.load_rosters(season)
-        # - nrp.rosters(season)
-        # Wir probieren mehrere Aufrufe in einer Reihenfolge und verwenden den ersten, der funktioniert
-        
-        got = None
-        try:
-          got = nrp.tidy.read_rosters(s)
-        except Exception:
-          pass
-        if got is None and hasattr(nrp, "load_rosters"):
-          try:
-            got = nrp.load_rosters(s)
-          except Exception:
-            pass
-        if got is None and hasattr(nrp, "rosters"):
-          try:
-            got = nrp.rosters(s)
-          except Exception:
-            pass
-
-        if got is not None:
-          df = pd.DataFrame(got)
-          write_parquet(df, out_path)
-          results.append(df)
-          logger.info(f"Fetched rosters ffor {s} via nflreadpy")
-          time.sleep(sleep_between)
-          continue
-        else:
-          logger.warning("nflreadpy is installed but automatic call paterns failed; falling back.")
-      except Exception as e:
-        logger.exception("Error while using nflreadpy for rosters (falling back): %s", e)
-    
-    # Try nfl_data_py next (if available)
-    if 'nfl_data_py' in mods:
-      ndp = mods['nfl_data_py']
       try:
-        got = None
-        if hasattr(ndp, "get_rosters"):
-          got = ndp.get_rosters(s)
-        elif hasattr(ndp, "rosters"):
-          got = ndp.rosters(s)
-        if got is not None:
-          df = pd.DataFrame(got)
-          write_parquet(df, out_path)
-          results.append(df)
-          logger.info(f"Fetched rosters for {s} via nfl_data_py")
-          time.sleep(sleep_between)
-          continue
-      except Exception as e:
-        logger.exception("Error while using nfl_data_py for rosters (falling back): %s", e)
-
-    # Fallback: generate demo data
-    logger.info(f"No fetching library worked for season {s}. Writing demo players file.")
-    demo = pd.DataFrame([
-      {"player_id": 1, "full_name": "Sean Example", "position": "QB", "team": "KC", "birthdate": "1998-10-14"},
-      {"player_id": 2, "full_name": "Dodo Piss", "position": "FB", "team": "DAL", "birthdate": "1998-11-12"},
-    ])
-    write_parquet(demo, out_path)
-    results.append(demo)
-  
+        df, source = _call_backend(from_backend, s, mods, dataset)
+      except BackendError as e:
+        logger.warning(f"Fetching {dataset} for {s} failed: {e}")
+        df = None
+      if df is not None:
+        write_parquet(df, out_path, source=source, season=s, dataset=dataset)
+        results.append(df)
+        stage.rows_out, stage.attrs["source"] = len(df), source
+        logger.info(f"Fetched {dataset} for {s} via {source}")
+        time.sleep(sleep_between)
+        continue
+
+      # Fallback: generate demo data
+      logger.info(f"No fetching library worked for season {s}. Writing demo {prefix} file.")
+      df = demo(s)
+      write_parquet(df, out_path, source="demo", season=s, dataset=dataset)
+      results.append(df)
+      stage.rows_out, stage.attrs["source"] = len(df), "demo"
+
   return pd.concat(results, ignore_index=True)
 
-def fetch_gamelogs(seasons=[2023], force=False, sleep_between=0.5):
+def fetch_rosters(seasons=[2023], force=False, sleep_between=0.5, max_age_hours=CURRENT_SEASON_TTL_HOURS):
+  """
+    Lade Rosters/Players für die gegebenen Seasons.
+    - seasons: Liste von ints
+    - force: True -> überschreibe vorhandene raw-Dateien; False -> skip wenn vorhanden
+    - max_age_hours: ab diesem Alter wird die laufende Saison neu geladen
+  """
+  return _fetch_serial("rosters", seasons, force, sleep_between, max_age_hours)
+
+def fetch_gamelogs(seasons=[2023], force=False, sleep_between=0.5, max_age_hours=CURRENT_SEASON_TTL_HOURS):
   """
     Lade Gamelogs (per-game stats) für gegebene Seasons.
     Verhalten analog zu fetch_rosters.
   """
+  return _fetch_serial("gamelogs", seasons, force, sleep_between, max_age_hours)
 
-  mods = use_nfl_library_available()
-  results = []
+class RateLimiter:
+  """
+  Gemeinsamer Rate-Limiter für alle Worker: höchstens `rate` Backend-Aufrufe
+  pro Sekunde, statt nach jeder Saison fest zu schlafen. rate <= 0 -> kein Limit.
+  """
 
-  for s in seasons:
-    out_path = RAW_DIR / f"gamelogs_{s}.parquet"
-    if out_path.exists() and not force:
-      logger.info(f"{out_path} already exists -> skipping (use --force to overwrite)")
-      try:
-        df = pd.read_parquet(out_path)
-        results.append(df)
-        continue
-      except Exception:
-        logger.warning(f"Failed to read existing {out_path}; will re-fetch")
-        
-    got = None
-
-    # Try nflreadpy
-    if 'nflreadpy' in mods:
-      nrp = mods['nflreadpy']
+  def __init__(self, rate):
+    self.interval = 1.0 / rate if rate > 0 else 0.0
+    self._next = 0.0
+    self._lock = threading.Lock()
+
+  def wait(self):
+    with self._lock:
+      now = time.monotonic()
+      slot = max(now, self._next)
+      self._next = slot + self.interval
+    if slot > now:
+      time.sleep(slot - now)
+
+def _fetch_one(dataset, s, mods, force, limiter, retries, backoff, max_age_hours):
+  """Lädt einen Datensatz für eine Saison mit Retries; gibt eine Zusammenfassung zurück."""
+  with profiling.span(f"fetch.{dataset}", kind="stage", season=s) as stage:
+    summary = _fetch_one_inner(dataset, s, mods, force, limiter, retries, backoff, max_age_hours)
+    stage.rows_out = summary["rows"]
+    stage.attrs.update(source=summary["source"], attempts=summary["attempts"])
+  return summary
+
+def _fetch_one_inner(dataset, s, mods, force, limiter, retries, backoff, max_age_hours):
+  prefix, from_backend, demo = DATASETS[dataset]
+  out_path = RAW_DIR / f"{prefix}_{s}.parquet"
+  start = time.perf_counter()
+  attempts = 0
+
+  df = _read_existing(out_path, force, s, dataset, max_age_hours)
+  source = "cached" if df is not None else None
+
+  # nur gescheiterte Aufrufe (BackendError) werden wiederholt; liefert kein
+  # Backend etwas, weil es keinen passenden Aufruf gibt, hilft auch kein Warten
+  while df is None and mods and attempts < retries:
+    if attempts:
+      # exponentielles Backoff: backoff, 2*backoff, 4*backoff, ...
+      time.sleep(backoff * 2 ** (attempts - 1))
+    attempts += 1
+    limiter.wait()
+    try:
+      df, source = _call_backend(from_backend, s, mods, dataset)
+    except BackendError as e:
+      logger.warning(f"Attempt {attempts}/{retries} for {dataset} {s} failed: {e}")
+      continue
+    break
+
+  if df is None:
+    logger.info(f"No fetching library worked for season {s}. Writing demo {prefix} file.")
+    df, source = demo(s), "demo"
+
+  if source != "cached":
+    write_parquet(df, out_path, source=source, season=s, dataset=dataset)
+
+  return {
+    "dataset": dataset,
+    "season": s,
+    "source": source,
+    "rows": len(df),
+    "attempts": attempts,
+    "seconds": round(time.perf_counter() - start, 3),
+  }
+
+def fetch_concurrent(datasets=("rosters", "gamelogs"), seasons=[2023], jobs=4, force=False,
+                     rate=2.0, retries=3, backoff=1.0, mods=None, max_age_hours=CURRENT_SEASON_TTL_HOURS):
+  """
+    Lädt mehrere Datensätze x Seasons parallel in einem Thread-Pool.
+    - jobs: Anzahl Worker
+    - rate: max. Backend-Aufrufe pro Sekunde über alle Worker (RateLimiter)
+    - retries / backoff: Versuche pro Saison, Wartezeit verdoppelt sich
+    - max_age_hours: ab diesem Alter wird die laufende Saison neu geladen
+    - mods: Backend-Module wie von use_nfl_library_available() (für Tests ersetzbar)
+    Gibt eine Liste von Zusammenfassungen pro (dataset, season) zurück.
+  """
+  if mods is None:
+    mods = use_nfl_library_available()
+  limiter = RateLimiter(rate)
+
+  summary = []
+  with ThreadPoolExecutor(max_workers=jobs) as pool:
+    futures = {
+      pool.submit(_fetch_one, d, s, mods, force, limiter, retries, backoff, max_age_hours): (d, s)
+      for d in datasets for s in seasons
+    }
+    for fut in as_completed(futures):
+      d, s = futures[fut]
       try:
-        got = None
-        try:
-          got = nrp.tidy.read_gamelogs(s)
-        except Exception:
-          pass
-        if got is None and hasattr(nrp, "load_gamelogs"):
-          try:
-            got = nrp.load_gamelogs(s)
-          except Exception:
-            pass
-        if got is None and hasattr(nrp, "gamelogs"):
-          try:
-            got = nrp.gamelogs(s)
-          except Exception:
-            pass
-        
-        if got is not None:
-          df = pd.DataFrame(got)
-          write_parquet(df, out_path)
-          results.append(df)
-          logger.info(f"Fetched gamelogs for {s} via nflreadpy")
-          time.sleep(sleep_between)
-          continue
-        else:
-          logger.warning("nflreadpy installed but could not auto-fetch gamelogs")
+        summary.append(fut.result())
       except Exception as e:
-        logger.exception("Error while using nflreadpy for gamelogs (falling back): %s", e)
+        logger.exception("Fetching %s for %s failed: %s", d, s, e)
+        summary.append({"dataset": d, "season": s, "source": "error", "rows": 0,
+                        "attempts": retries, "seconds": None, "error": str(e)})
+
+  return sorted(summary, key=lambda r: (r["dataset"], r["season"]))
 
-    # Try nfl_data_py
-    if 'nfl_data_py' in mods:
-      ndp = mods['nfl_data_py']
+# --- Play-by-Play ---------------------------------------------------------
+# ~50k Plays x ~370 Spalten pro Saison: nie als ein DataFrame bauen, sondern
+# in Chunks nach Arrow konvertieren und über einen ParquetWriter schreiben.
+
+PBP_ROW_GROUP_SIZE = 32_768   # Zeilen pro Row-Group (Filter/Projektion pro Gruppe)
+PBP_CHUNK_ROWS = 8_192        # so viele Zeilen werden auf einmal konvertiert
+PBP_COMPRESSION = "zstd"
+# Kleine Standard-Auswahl für --pbp-columns ohne Argumente
+PBP_CORE_COLUMNS = [
+  "play_id", "game_id", "season", "week", "season_type", "home_team", "away_team",
+  "posteam", "defteam", "qtr", "down", "ydstogo", "yardline_100", "play_type",
+  "yards_gained", "epa", "wp", "wpa", "passer_player_id", "rusher_player_id",
+  "receiver_player_id", "pass_attempt", "rush_attempt", "complete_pass",
+  "touchdown", "interception", "fumble_lost", "sack",
+]
+
+def _pbp_from_backend(s, mods, columns=None):
+  """
+  Wie _rosters_from_backend, für Play-by-Play. Gibt (daten, quelle) zurück;
+  `daten` kann ein pandas-/polars-DataFrame, eine Arrow-Table oder ein
+  Iterator von Chunks sein (siehe _iter_arrow_chunks).
+  """
+  if 'nflreadpy' in mods:
+    nrp = mods['nflreadpy']
+    try:
+      got = _first_working_call("nflreadpy", nrp, "pbp", [
+        ("load_pbp(season)", lambda: nrp.load_pbp(s)),
+        ("load_pbp([season])", lambda: nrp.load_pbp([s])),
+      ])
+    except BackendError as e:
+      got = None
+      logger.error(f"Error using nflreadpy for play-by-play: {e}")
+    if got is not None:
+      return got, "nflreadpy"
+    logger.warning("nflreadpy installed but could not auto-fetch play-by-play")
+
+  if 'nfl_data_py' in mods:
+    ndp = mods['nfl_data_py']
+    try:
+      # nfl_data_py kann die Spaltenauswahl schon beim Laden anwenden
+      got = ndp.import_pbp_data([s], columns=columns, downcast=True, cache=False)
+      if got is not None:
+        return got, "nfl_data_py"
+    except Exception as e:
+      logger.error(f"Error using nfl_data_py for play-by-play: {e}")
+
+  return None, None
+
+def _demo_pbp(s):
+  return pd.DataFrame([
+    {"play_id": 1, "game_id": f"{s}_01_KC_DAL", "season": s, "week": 1, "posteam": "KC",
+     "play_type": "pass", "yards_gained": 12, "passer_player_id": "1", "touchdown": 0},
+    {"play_id": 2, "game_id": f"{s}_01_KC_DAL", "season": s, "week": 1, "posteam": "KC",
+     "play_type": "run", "yards_gained": 4, "passer_player_id": None, "touchdown": 0},
+  ])
+
+def _iter_arrow_chunks(data, chunk_rows=PBP_CHUNK_ROWS):
+  """Zerlegt Backend-Daten in pyarrow-Tables zu höchstens `chunk_rows` Zeilen."""
+  import pyarrow as pa
+
+  if isinstance(data, pa.Table):
+    for batch in data.to_batches(max_chunksize=chunk_rows):
+      yield pa.Table.from_batches([batch])
+  elif isinstance(data, pd.DataFrame):
+    for start in range(0, len(data), chunk_rows):
+      yield pa.Table.from_pandas(data.iloc[start:start + chunk_rows], preserve_index=False)
+  elif hasattr(data, "iter_slices") and hasattr(data, "to_arrow"):
+    # polars.DataFrame (nflreadpy liefert polars)
+    for part in data.iter_slices(chunk_rows):
+      yield part.to_arrow()
+  else:
+    # Iterator/Generator von Chunks
+    for part in data:
+      yield from _iter_arrow_chunks(part, chunk_rows)
+
+def _conform(table, schema):
+  """Bringt einen Chunk auf das Schema des ersten Chunks (fehlende Spalten = null)."""
+  import pyarrow as pa
+
+  if table.schema.equals(schema, check_metadata=False):
+    return table
+  index = {name: i for i, name in enumerate(table.column_names)}
+  arrays = []
+  for field in schema:
+    if field.name in index:
+      col = table.column(index[field.name])
+      arrays.append(col if col.type == field.type else col.cast(field.type))
+    else:
+      arrays.append(pa.nulls(len(table), field.type))
+  return pa.Table.from_arrays(arrays, schema=schema)
+
+def write_parquet_chunks(chunks, path: Path, columns=None, row_group_size=PBP_ROW_GROUP_SIZE,
+                         compression=PBP_COMPRESSION, source="unknown", season=None, dataset=None) -> int:
+  """
+  Schreibt einen Strom von Arrow-Chunks atomar in eine Parquet-Datei.
+  - columns: Allowlist; alle anderen Spalten werden sofort verworfen
+  - Chunks werden bis `row_group_size` Zeilen gesammelt und als eine Row-Group
+    geschrieben -> Speicher ~ eine Row-Group, egal wie groß die Datei wird
+  - Strings/Ganzzahlen mit Dictionary-Encoding, alles mit `compression`
+  Gibt die Zeilenzahl zurück und trägt die Datei ins Manifest ein.
+  """
+  import pyarrow as pa
+  import pyarrow.parquet as pq
+
+  path = Path(path)
+  writer = None
+  schema = None
+  pending, pending_rows, rows = [], 0, 0
+
+  def flush():
+    nonlocal pending, pending_rows
+    if pending:
+      writer.write_table(pa.concat_tables(pending), row_group_size=row_group_size)
+      pending, pending_rows = [], 0
+
+  with profiling.span("fetch.write", kind="io", file=path.name) as sp:
+    with atomic_write(path) as tmp:
       try:
-        # Dies ist der Standard-Befehl für wöchentliche Stats/Gamelogs
-        got = ndp.import_weekly_data([s]) 
-        
-        if got is not None:
-          df = pd.DataFrame(got)
-          write_parquet(df, out_path)
-          results.append(df)
-          logger.info(f"Fetched gamelogs for {s} via nfl_data_py")
-          time.sleep(sleep_between)
-          continue
-      except Exception as e:
-        logger.error(f"Error using nfl_data_py: {e}")
-    
-    # Fallback demo
-    logger.info(f"No fetching library worked for season {s}. Writing demo gamelogs file.")
-    demo = pd.DataFrame([
-      {"game_id": 1, "player_id": 1, "season": s, "yards": 5478, "td": 8},
-    ])
-    write_parquet(demo, out_path)
-    results.append(demo)
-  
-  return pd.concat(results, ignore_index=True)
+        for table in chunks:
+          if columns:
+            table = table.select([c for c in columns if c in table.column_names])
+          if writer is None:
+            # komplett leere Spalten im ersten Chunk als String anlegen, damit
+            # spätere Chunks mit Werten dazu passen
+            schema = pa.schema([
+              pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f for f in table.schema
+            ])
+            dictionary = [f.name for f in schema
+                          if pa.types.is_string(f.type) or pa.types.is_large_string(f.type)
+                          or pa.types.is_integer(f.type)]
+            writer = pq.ParquetWriter(tmp, schema, compression=compression, use_dictionary=dictionary)
+          pending.append(_conform(table, schema))
+          pending_rows += table.num_rows
+          rows += table.num_rows
+          if pending_rows >= row_group_size:
+            flush()
+        if writer is None:
+          raise ValueError(f"No play-by-play rows to write for {path.name}")
+        flush()
+      finally:
+        if writer is not None:
+          writer.close()
+    sp.rows_in = rows
+    sp.bytes_written = path.stat().st_size
+
+  logger.info(f"Wrote {rows} rows ({len(schema)} columns) to {path} in row groups of {row_group_size}")
+  get_manifest(path.parent).record(path, schema.empty_table().to_pandas(), source=source,
+                                   season=season, dataset=dataset, rows=rows)
+  return rows
+
+def fetch_pbp(seasons=[2023], force=False, columns=None, row_group_size=PBP_ROW_GROUP_SIZE,
+              chunk_rows=PBP_CHUNK_ROWS, mods=None, max_age_hours=CURRENT_SEASON_TTL_HOURS):
+  """
+    Lade Play-by-Play für die gegebenen Seasons nach raw/pbp_<saison>.parquet.
+    - columns: Allowlist (None = alle Spalten), z.B. PBP_CORE_COLUMNS
+    - row_group_size / chunk_rows: Row-Groups der Datei / Konvertierungs-Chunks
+    - max_age_hours: ab diesem Alter wird die laufende Saison neu geladen
+    Die Seasons laufen nacheinander, es liegt nie mehr als eine Saison (bei
+    Backends, die Chunks liefern: eine Row-Group) im Speicher.
+    Gibt eine Liste von Zusammenfassungen pro Saison zurück (wie fetch_concurrent).
+  """
+  if mods is None:
+    mods = use_nfl_library_available()
+
+  summary = []
+  for s in seasons:
+    out_path = RAW_DIR / f"pbp_{s}.parquet"
+    start = time.perf_counter()
+    with profiling.span("fetch.pbp", kind="stage", season=s) as stage:
+      manifest = get_manifest(out_path.parent)
+      entry = manifest.entry(out_path)
+      if (not force and entry is not None
+          and manifest.is_fresh(out_path, s, current_season_ttl_hours=max_age_hours)):
+        logger.info(f"{out_path} already exists and is fresh -> skipping (use --force to overwrite)")
+        source, rows = "cached", entry["rows"]
+      else:
+        data, source = _pbp_from_backend(s, mods, columns)
+        if data is None:
+          logger.info(f"No fetching library worked for season {s}. Writing demo pbp file.")
+          data, source = _demo_pbp(s), "demo"
+        rows = write_parquet_chunks(
+          _iter_arrow_chunks(data, chunk_rows), out_path, columns=columns,
+          row_group_size=row_group_size, source=source, season=s, dataset="pbp",
+        )
+        del data
+      stage.rows_out = rows
+      stage.attrs["source"] = source
 
+    summary.append({"dataset": "pbp", "season": s, "source": source, "rows": rows,
+                    "attempts": 0 if source == "cached" else 1,
+                    "seconds": round(time.perf_counter() - start, 3)})
+  return summary
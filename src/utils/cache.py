@@ -0,0 +1,162 @@
+"""
+src/utils/cache.py
+
+Wiederverwendbarer In-Process-Cache für Query-Ergebnisse.
+
+- LRU: bei mehr als `maxsize` Einträgen fliegt der am längsten ungenutzte raus
+- TTL: Einträge verfallen nach `ttl` Sekunden
+- Größenlimit: Summe der geschätzten Bytes (DataFrames: memory_usage(deep=True))
+  bleibt unter `max_bytes`
+- Zähler für hits / misses / evictions / expirations
+
+Der Decorator `cached(cache, version=...)` nimmt einen Versions-Stempel mit in
+den Schlüssel (z.B. die Ingest-Generation der DB). Schreibt der Ingest, ändert
+sich der Stempel und alte Einträge werden nie wieder getroffen. Mit `scope=`
+bekommt version() die Saison(s) des Aufrufs, z.B. scope="season": dann
+verfallen nur die Einträge der Saisons, die sich wirklich geändert haben.
+"""
+
+from collections import OrderedDict
+from functools import wraps
+import inspect
+import sys
+import threading
+import time
+
+import pandas as pd
+
+
+def estimate_size(value) -> int:
+    """Grobe Größe eines Cache-Werts in Bytes."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+def _freeze(value):
+    """Macht Listen/Sets/Dicts hashbar, damit sie Teil des Schlüssels sein können."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_freeze(v) for v in value))
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+class QueryCache:
+    """Thread-sicherer LRU+TTL-Cache mit Byte-Limit."""
+
+    def __init__(self, maxsize: int = 128, ttl: float = 300.0, max_bytes: int = 64 * 1024 * 1024):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # key -> (value, size, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Gibt (True, wert) bei einem Treffer zurück, sonst (False, None)."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return False, None
+            value, size, expires_at = item
+            if expires_at is not None and time.monotonic() >= expires_at:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def set(self, key, value):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            # passt nie rein -> gar nicht erst cachen
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, size, expires_at)
+            self._bytes += size
+            while len(self._data) > self.maxsize or self._bytes > self.max_bytes:
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "entries": len(self._data),
+                "bytes": self._bytes,
+            }
+
+
+def cached(cache: QueryCache, version=None, scope=None):
+    """
+    Decorator: cached das Ergebnis pro (funktion, version(), args, kwargs).
+    DataFrames werden bei einem Treffer kopiert, damit Aufrufer den Cache
+    nicht versehentlich verändern.
+    scope: Name eines Parameters oder Funktion (gebundene Argumente -> Wert);
+    dessen Wert wird an version() übergeben (version(wert) statt version()).
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn) if scope else None
+
+        def stamp(args, kwargs):
+            if not version:
+                return None
+            if not scope:
+                return version()
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = bound.arguments
+            return version(arguments[scope] if isinstance(scope, str) else scope(arguments))
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (
+                fn.__module__,
+                fn.__qualname__,
+                stamp(args, kwargs),
+                _freeze(args),
+                _freeze(kwargs),
+            )
+            hit, value = cache.get(key)
+            if not hit:
+                value = fn(*args, **kwargs)
+                cache.set(key, value)
+            return value.copy() if isinstance(value, pd.DataFrame) else value
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
@@ -0,0 +1,148 @@
+"""
+src/utils/db.py
+
+Pool von Nur-Lese-Verbindungen zur SQLite-DB für die Stats-Queries.
+
+- Verbindungen werden über die URI `file:...?mode=ro` geöffnet: Leser können
+  nie schreiben und halten nie einen Schreib-Lock. Zusammen mit WAL (setzt der
+  Ingest, siehe etl/ingest.py WRITE_PRAGMAS) blockieren sie nie hinter einem
+  laufenden Ingest.
+- Jede Verbindung bekommt READ_PRAGMAS (Page-Cache, mmap) und behält ihren
+  Statement-Cache: dasselbe parametrisierte SQL wird nur einmal kompiliert.
+- Thread-sicher: eine Verbindung gehört immer nur einem Thread gleichzeitig
+  (z.B. einer Streamlit-Session); ist der Pool ausgeschöpft, wird gewartet.
+- Wird die DB-Datei ersetzt (neue inode), baut get_pool() einen neuen Pool.
+
+    with get_pool(DB_PATH).connection() as conn:
+        df = pd.read_sql("SELECT ... WHERE season = ?", conn, params=[2023])
+"""
+
+from contextlib import contextmanager
+from pathlib import Path
+import sqlite3
+import threading
+
+DEFAULT_POOL_SIZE = 8
+# Pragmas pro Lese-Verbindung: ~32 MB Page-Cache, bis 256 MB per mmap lesen,
+# kurz warten statt SQLITE_BUSY (nur relevant für DBs ohne WAL)
+READ_PRAGMAS = {
+    "query_only": "ON",
+    "cache_size": -32000,
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+}
+STATEMENT_CACHE_SIZE = 256
+
+_pools = {}  # (pfad, inode) -> ConnectionPool
+_pools_lock = threading.Lock()
+
+
+def connect_readonly(path: Path, pragmas=None) -> sqlite3.Connection:
+    """Eine Nur-Lese-Verbindung (URI mode=ro) mit den READ_PRAGMAS."""
+    uri = f"{Path(path).resolve().as_uri()}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+    for name, value in (READ_PRAGMAS if pragmas is None else pragmas).items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+class ConnectionPool:
+    """Bis zu `size` wiederverwendete Nur-Lese-Verbindungen zu einer DB-Datei."""
+
+    def __init__(self, path: Path, size: int = DEFAULT_POOL_SIZE, pragmas=None):
+        self.path = Path(path)
+        self.size = size
+        self.pragmas = pragmas
+        self._idle = []  # Stapel: zuletzt benutzte zuerst, deren Cache ist warm
+        # schützt _idle/_opened; weckt Wartende bei Rückgabe UND beim Verwerfen einer Verbindung
+        self._lock = threading.Condition()
+        self._opened = 0
+        self._closed = False
+        self.checkouts = 0
+        self.waits = 0
+
+    def _acquire(self) -> sqlite3.Connection:
+        with self._lock:
+            waited = False
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._opened < self.size:
+                    self._opened += 1  # Platz reservieren, geöffnet wird außerhalb des Locks
+                    break
+                if not waited:
+                    self.waits += 1
+                    waited = True
+                self._lock.wait()
+        try:
+            return connect_readonly(self.path, self.pragmas)
+        except Exception:
+            self._discard(None)
+            raise
+
+    def _discard(self, conn):
+        """Verbindung schließen und ihren Platz freigeben - ein Wartender öffnet dann eine neue."""
+        if conn is not None:
+            conn.close()
+        with self._lock:
+            self._opened -= 1
+            self._lock.notify()
+
+    @contextmanager
+    def connection(self):
+        """Leiht eine Verbindung aus; bei einem Fehler wird sie verworfen statt zurückgelegt."""
+        conn = self._acquire()
+        with self._lock:
+            self.checkouts += 1
+        try:
+            yield conn
+        except Exception:
+            self._discard(conn)
+            raise
+        else:
+            if conn.in_transaction:
+                conn.rollback()  # keinen Lese-Snapshot offen halten
+            if self._closed:
+                self._discard(conn)
+            else:
+                with self._lock:
+                    self._idle.append(conn)
+                    self._lock.notify()
+
+    def close(self):
+        """Schließt alle freien Verbindungen; ausgeliehene werden bei Rückgabe geschlossen."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._opened -= len(idle)
+            self._lock.notify_all()
+        for conn in idle:
+            conn.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"open": self._opened, "idle": len(self._idle), "size": self.size,
+                    "checkouts": self.checkouts, "waits": self.waits}
+
+
+def get_pool(path: Path, size: int = DEFAULT_POOL_SIZE) -> ConnectionPool:
+    """Der Pool für `path` (pro Datei-Version einer); die DB-Datei muss existieren."""
+    path = Path(path)
+    key = (str(path.resolve()), path.stat().st_ino)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            # alte Pools derselben Datei (ersetzt/gelöscht) schließen
+            for old_key in [k for k in _pools if k[0] == key[0]]:
+                _pools.pop(old_key).close()
+            pool = _pools[key] = ConnectionPool(path, size)
+        return pool
+
+
+def close_pools():
+    """Alle Pools schließen (z.B. in Tests oder vor dem Löschen der DB)."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
@@ -0,0 +1,175 @@
+"""
+src/utils/images.py
+
+Lokaler Cache für Spieler-Headshots.
+
+- Jede URL wird genau einmal geladen; daraus entstehen Pillow-Thumbnails in
+  festen Größen (SIZES), abgelegt unter db/headshots/<größe>/<sha256(url)>.png
+- LRU nach Größe: überschreitet der Ordner `max_bytes`, fliegen die am
+  längsten nicht benutzten Bilder raus (Zugriff = mtime wird aktualisiert)
+- prefetch(urls): lädt fehlende Bilder parallel, z.B. für die aktuelle Top-N
+- Das HTTP-Holen ist austauschbar (`fetcher=`), z.B. für einen lokalen
+  Test-Server oder einen Offline-Betrieb
+
+    cache = ImageCache()
+    path = cache.get(url, size="card")   # Path oder None (Fehler/kein Bild)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from utils.io import atomic_write
+
+IMAGE_DIR = Path("db") / "headshots"
+SIZES = {"thumb": (64, 64), "card": (150, 150)}
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# fehlgeschlagene URLs so lange nicht erneut versuchen
+FAILED_RETRY_SECONDS = 300
+
+logger = logging.getLogger("images")
+
+
+def http_fetch(url: str, timeout: float = 10.0) -> bytes:
+    """Standard-Fetcher: lädt `url` per HTTP(S) und gibt die Bytes zurück."""
+    import requests
+
+    resp = requests.get(url, timeout=timeout)
+    resp.raise_for_status()
+    return resp.content
+
+
+def url_key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+
+
+def make_thumbnail(data: bytes, size):
+    """Bild auf genau `size` zuschneiden/skalieren (mittig, Seitenverhältnis bleibt)."""
+    from PIL import Image, ImageOps
+
+    with Image.open(BytesIO(data)) as img:
+        img = img.convert("RGBA")
+        return ImageOps.fit(img, size, method=Image.Resampling.LANCZOS)
+
+
+class ImageCache:
+    """Thread-sicherer Thumbnail-Cache auf der Platte mit Byte-Limit (LRU)."""
+
+    def __init__(self, root: Path = IMAGE_DIR, max_bytes: int = DEFAULT_MAX_BYTES, fetcher=http_fetch,
+                 sizes=None):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.fetcher = fetcher
+        self.sizes = dict(sizes or SIZES)
+        self._lock = threading.Lock()
+        self._bytes = None     # wird beim ersten Zugriff aus dem Ordner ermittelt
+        self._failed = {}      # url -> zeitpunkt des letzten Fehlschlags
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def path(self, url: str, size: str = "card") -> Path:
+        if size not in self.sizes:
+            raise ValueError(f"Unknown size: {size!r} (expected one of {list(self.sizes)})")
+        return self.root / size / f"{url_key(url)}.png"
+
+    def _files(self):
+        return list(self.root.glob("*/*.png")) if self.root.exists() else []
+
+    def _total_bytes(self) -> int:
+        if self._bytes is None:
+            self._bytes = sum(p.stat().st_size for p in self._files())
+        return self._bytes
+
+    def get(self, url: str, size: str = "card"):
+        """Lokaler Pfad des Thumbnails; lädt beim ersten Mal. None bei Fehlern."""
+        if not isinstance(url, str) or not url.startswith(("http://", "https://")):
+            return None
+        path = self.path(url, size)
+        if path.exists():
+            try:
+                os.utime(path)  # "zuletzt benutzt" für die LRU-Verdrängung
+            except FileNotFoundError:
+                pass
+            else:
+                with self._lock:
+                    self.hits += 1
+                return path
+
+        with self._lock:
+            self.misses += 1
+            failed_at = self._failed.get(url)
+        if failed_at is not None and time.monotonic() - failed_at < FAILED_RETRY_SECONDS:
+            return None
+
+        try:
+            data = self.fetcher(url)
+            self._store(url, data)
+        except Exception as e:
+            logger.warning(f"Could not cache headshot {url}: {e}")
+            with self._lock:
+                self._failed[url] = time.monotonic()
+            return None
+        return path if path.exists() else None
+
+    def _store(self, url: str, data: bytes):
+        """Alle Größen aus einem Download erzeugen, atomar schreiben, dann verdrängen."""
+        with self._lock:
+            self._total_bytes()  # Bestand zählen, bevor neue Dateien dazukommen
+        written = 0
+        for size, dims in self.sizes.items():
+            thumb = make_thumbnail(data, dims)
+            path = self.path(url, size)
+            with atomic_write(path) as tmp:
+                thumb.save(tmp, format="PNG", optimize=True)
+            written += path.stat().st_size
+        with self._lock:
+            self._bytes = self._total_bytes() + written
+            self._failed.pop(url, None)
+        self.evict()
+
+    def evict(self):
+        """Älteste (am längsten ungenutzte) Bilder löschen, bis max_bytes eingehalten ist."""
+        with self._lock:
+            if self._total_bytes() <= self.max_bytes:
+                return
+            files = []
+            for p in self._files():
+                try:
+                    st = p.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((st.st_mtime_ns, st.st_size, p))
+            files.sort()
+            total = sum(size for _, size, _ in files)
+            for _, size, p in files:
+                if total <= self.max_bytes:
+                    break
+                p.unlink(missing_ok=True)
+                total -= size
+                self.evictions += 1
+            self._bytes = total
+
+    def prefetch(self, urls, size: str = "card", jobs: int = 8) -> dict:
+        """Mehrere URLs auf einmal (fehlende parallel laden). Gibt {url: Pfad oder None} zurück."""
+        urls = [u for u in dict.fromkeys(urls) if isinstance(u, str)]
+        missing = [u for u in urls if not self.path(u, size).exists()] if urls else []
+        if missing:
+            with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(missing)))) as pool:
+                list(pool.map(lambda u: self.get(u, size), missing))
+        return {u: self.get(u, size) for u in urls}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "bytes": self._total_bytes(),
+                "max_bytes": self.max_bytes,
+            }
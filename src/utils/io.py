@@ -0,0 +1,223 @@
+"""
+src/utils/io.py
+
+Kleine Datei-Helfer, die Fetcher und Ingest gemeinsam nutzen.
+
+- atomic_write(path): schreibt über eine Temp-Datei + rename, sodass ein
+  Absturz nie eine halb geschriebene Datei hinterlässt
+- file_sha256(path): Prüfsumme einer Datei, blockweise gelesen
+
+Dazu ein partitionierter Parquet-Store für analytische Reads ohne SQLite:
+
+    raw/store/<dataset>/season=<saison>/part-0.parquet
+
+- write_partition / PartitionWriter: eine Saison eines Datensatzes (er)setzen
+- PartitionStage: Partitionen erst nach dem DB-Commit einsetzen (Ingest)
+- read_dataset: liest über `pyarrow.dataset` nur die angefragten Spalten und
+  schiebt Filter (z.B. season == 2023) bis auf Partitionen/Row-Groups herunter
+"""
+
+from contextlib import contextmanager
+from pathlib import Path
+import hashlib
+import os
+import uuid
+
+STORE_DIR = Path("raw") / "store"
+PARTITION_KEY = "season"
+
+
+@contextmanager
+def atomic_write(path: Path):
+    """
+    Liefert einen Temp-Pfad im Zielordner. Nach erfolgreichem Block wird er per
+    os.replace an `path` verschoben (atomar auf demselben Dateisystem), bei einem
+    Fehler gelöscht.
+
+        with atomic_write(out_path) as tmp:
+            df.to_parquet(tmp)
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # eindeutiger Name statt mkstemp, damit die Datei normale (umask-)Rechte bekommt
+    tmp = path.parent / f".{path.name}.{uuid.uuid4().hex}.tmp"
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def partition_path(dataset: str, season: int, root: Path = STORE_DIR) -> Path:
+    return Path(root) / dataset / f"{PARTITION_KEY}={int(season)}" / "part-0.parquet"
+
+
+def _to_arrow(df, schema=None):
+    """DataFrame -> Arrow-Table ohne Partitionsspalte; Kategorien als Strings,
+    damit alle Partitionen dasselbe Schema haben."""
+    import pyarrow as pa
+
+    df = df.drop(columns=[PARTITION_KEY], errors="ignore")
+    df = df.astype({c: "str" for c in df.columns if str(df[c].dtype) == "category"})
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+
+class PartitionStage:
+    """
+    Sammelt neue Partitionen als Temp-Dateien, statt sie sofort einzusetzen:
+    commit() tauscht alle per os.replace ein - der Ingest ruft es erst nach dem
+    Commit der DB-Transaktion auf. Ohne commit() (z.B. nach einem Rollback)
+    werden die Temp-Dateien beim Verlassen gelöscht, der Store bleibt wie er war.
+
+        with PartitionStage() as stage:
+            with conn:
+                write_partition(df, "gamelogs", 2023, stage=stage)
+            stage.commit()
+    """
+
+    def __init__(self):
+        self._pending = []  # (temp-datei, ziel)
+
+    @contextmanager
+    def atomic_write(self, path: Path):
+        """Wie atomic_write, nur dass das Ersetzen bis commit() wartet."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.parent / f".{path.name}.{uuid.uuid4().hex}.tmp"
+        try:
+            yield tmp
+        except BaseException:
+            if tmp.exists():
+                tmp.unlink()
+            raise
+        self._pending.append((tmp, path))
+
+    def commit(self):
+        for tmp, path in self._pending:
+            os.replace(tmp, path)
+        self._pending.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        for tmp, _ in self._pending:
+            if tmp.exists():
+                tmp.unlink()
+        self._pending.clear()
+        return False
+
+
+def write_partition(df, dataset: str, season: int, root: Path = STORE_DIR, stage: PartitionStage = None) -> Path:
+    """
+    Ersetzt die Partition `season` von `dataset` atomar durch `df`. Mit `stage`
+    erst bei stage.commit(); zurück kommt dann die Temp-Datei statt des Ziels.
+    """
+    import pyarrow.parquet as pq
+
+    path = partition_path(dataset, season, root)
+    with (stage.atomic_write if stage is not None else atomic_write)(path) as tmp:
+        pq.write_table(_to_arrow(df), tmp)
+    return tmp if stage is not None else path
+
+
+class PartitionWriter:
+    """
+    Streaming-Variante von write_partition: Batches werden nacheinander in
+    dieselbe Parquet-Datei geschrieben, erst das Verlassen des Blocks ersetzt
+    die Partition (mit `stage` erst stage.commit()).
+
+        with PartitionWriter("gamelogs", 2023) as w:
+            for batch in batches:
+                w.write(batch)
+    """
+
+    def __init__(self, dataset: str, season: int, root: Path = STORE_DIR, stage: PartitionStage = None):
+        self.path = partition_path(dataset, season, root)
+        self._atomic = (stage.atomic_write if stage is not None else atomic_write)(self.path)
+        self._tmp = None
+        self._writer = None
+
+    def __enter__(self):
+        self._tmp = self._atomic.__enter__()
+        return self
+
+    def write(self, df):
+        import pyarrow.parquet as pq
+
+        table = _to_arrow(df, schema=self._writer.schema if self._writer else None)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self._tmp, table.schema)
+        self._writer.write_table(table)
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._writer is not None:
+            self._writer.close()
+            return self._atomic.__exit__(exc_type, exc, tb)
+        # keine Batches -> bestehende Partition unverändert lassen
+        abort = exc or RuntimeError("no batches written")
+        self._atomic.__exit__(type(abort), abort, None)
+        return False
+
+
+def _filter_expression(where):
+    """{"season": 2023, "position": ["QB", "WR"]} -> pyarrow-Expression (UND-verknüpft)."""
+    import pyarrow.dataset as ds
+
+    expr = None
+    for col, value in where.items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            cond = ds.field(col).isin(list(value))
+        else:
+            cond = ds.field(col) == value
+        expr = cond if expr is None else expr & cond
+    return expr
+
+
+def dataset_columns(dataset: str, root: Path = STORE_DIR) -> list:
+    """Spalten eines Store-Datensatzes inkl. Partitionsspalte (leer, wenn es ihn nicht gibt)."""
+    dset = _open_dataset(dataset, root)
+    return dset.schema.names if dset is not None else []
+
+
+def _open_dataset(dataset: str, root: Path = STORE_DIR):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    files = sorted((Path(root) / dataset).glob(f"{PARTITION_KEY}=*/*.parquet"))
+    if not files:
+        return None
+    # Schema über alle Partitionen vereinen (neue Spalten in späteren Saisons)
+    key = pa.schema([(PARTITION_KEY, pa.int16())])
+    schema = pa.unify_schemas([pq.read_schema(f) for f in files] + [key], promote_options="permissive")
+    partitioning = ds.partitioning(key, flavor="hive")
+    return ds.dataset(files, schema=schema, format="parquet", partitioning=partitioning,
+                      partition_base_dir=str(Path(root) / dataset))
+
+
+def read_dataset(dataset: str, columns=None, where=None, root: Path = STORE_DIR):
+    """
+    Liest einen Store-Datensatz als Arrow-Table.
+    - columns: nur diese Spalten lesen (Projektion); unbekannte werden ignoriert
+    - where: dict Spalte -> Wert oder Liste (isin), oder eine fertige pyarrow-Expression
+    Gibt None zurück, wenn es den Datensatz nicht gibt.
+    """
+    dset = _open_dataset(dataset, root)
+    if dset is None:
+        return None
+    if columns is not None:
+        columns = [c for c in columns if c in dset.schema.names]
+    expr = _filter_expression(where) if isinstance(where, dict) else where
+    return dset.to_table(columns=columns, filter=expr)
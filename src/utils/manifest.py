@@ -0,0 +1,116 @@
+"""
+src/utils/manifest.py
+
+Manifest der Rohdaten in `raw/manifest.json`.
+
+Pro Datei wird festgehalten: sha256, Größe, mtime, Zeilenzahl, Schema-Fingerprint,
+Quelle (Backend) und Abrufzeit. Damit können
+- Fetcher entscheiden, ob eine Datei noch frisch ist (statt nur `exists()`),
+- Ingest Dateien überspringen, deren Prüfsumme sich nicht geändert hat.
+
+Freshness-Policy: die laufende Saison (und zukünftige) läuft nach
+`current_season_ttl_hours` ab, vergangene Saisons nie. Demo-Platzhalter
+gelten nie als frisch.
+"""
+
+from datetime import datetime, timezone
+from pathlib import Path
+import hashlib
+import json
+import threading
+
+from utils.io import atomic_write, file_sha256
+
+MANIFEST_NAME = "manifest.json"
+CURRENT_SEASON_TTL_HOURS = 12
+
+
+def current_season(now: datetime = None) -> int:
+    """NFL-Saison, die gerade läuft: ab März zählt das neue Kalenderjahr."""
+    now = now or datetime.now(timezone.utc)
+    return now.year if now.month >= 3 else now.year - 1
+
+
+def schema_fingerprint(df) -> str:
+    """Kurzer Hash über Spaltennamen + dtypes (ändert sich, wenn das Schema kippt)."""
+    spec = ";".join(f"{c}:{t}" for c, t in zip(df.columns, df.dtypes.astype(str)))
+    return hashlib.sha256(spec.encode()).hexdigest()[:16]
+
+
+class Manifest:
+    """Thread-sicherer Zugriff auf raw/manifest.json (eine Instanz pro raw-Ordner)."""
+
+    def __init__(self, raw_dir: Path):
+        self.raw_dir = Path(raw_dir)
+        self.path = self.raw_dir / MANIFEST_NAME
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        try:
+            return json.loads(self.path.read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save(self, data: dict):
+        with atomic_write(self.path) as tmp:
+            tmp.write_text(json.dumps(data, indent=2, sort_keys=True))
+
+    def entry(self, path: Path):
+        with self._lock:
+            return self._load().get(Path(path).name)
+
+    def record(self, path: Path, df, source: str, season: int = None, dataset: str = None,
+               fetched_at: datetime = None, rows: int = None) -> dict:
+        """
+        Trägt eine (bereits vollständig geschriebene) Datei ins Manifest ein.
+        Bei gestreamt geschriebenen Dateien ist `df` nur ein leerer Frame mit dem
+        Schema und `rows` die tatsächliche Zeilenzahl.
+        """
+        path = Path(path)
+        stat = path.stat()
+        entry = {
+            "sha256": file_sha256(path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "rows": int(len(df) if rows is None else rows),
+            "schema": schema_fingerprint(df),
+            "source": source,
+            "season": season,
+            "dataset": dataset,
+            "fetched_at": (fetched_at or datetime.now(timezone.utc)).isoformat(timespec="seconds"),
+        }
+        with self._lock:
+            data = self._load()
+            data[path.name] = entry
+            self._save(data)
+        return entry
+
+    def checksum(self, path: Path) -> str:
+        """sha256 aus dem Manifest, falls Größe und mtime passen; sonst neu berechnet."""
+        path = Path(path)
+        entry = self.entry(path)
+        stat = path.stat()
+        if entry and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+            return entry["sha256"]
+        return file_sha256(path)
+
+    def is_fresh(self, path: Path, season: int, now: datetime = None,
+                 current_season_ttl_hours: float = CURRENT_SEASON_TTL_HOURS) -> bool:
+        """
+        True, wenn die Datei existiert, zum Manifest passt (Größe) und laut
+        Freshness-Policy nicht abgelaufen ist.
+        """
+        path = Path(path)
+        entry = self.entry(path)
+        if entry is None or not path.exists() or path.stat().st_size != entry.get("size"):
+            return False
+        # Demo-Daten sind nur ein Platzhalter -> beim nächsten Lauf echte Daten versuchen
+        if entry.get("source") == "demo":
+            return False
+
+        now = now or datetime.now(timezone.utc)
+        if season < current_season(now):
+            return True
+        fetched_at = datetime.fromisoformat(entry["fetched_at"])
+        age_hours = (now - fetched_at).total_seconds() / 3600
+        return age_hours < current_season_ttl_hours
@@ -0,0 +1,273 @@
+"""
+src/utils/profiling.py
+
+Leichtgewichtige Spans/Metriken für fetch -> ingest -> stats.
+
+    from utils import profiling
+
+    with profiling.span("ingest.read", kind="io", season=2023) as sp:
+        df = pd.read_parquet(path)
+        sp.rows_out = len(df)
+        sp.bytes_read = path.stat().st_size
+
+Jeder Span misst Dauer plus rows_in / rows_out / bytes_read / bytes_written
+und hat eine Art (`kind`): "sql", "pandas", "io" oder "stage". Spans dürfen
+verschachtelt sein; am Ende (profiling.close / atexit) kommt eine
+Zusammenfassung mit der Eigenzeit pro Art (SQL vs. pandas, ohne Doppelzählung
+verschachtelter Spans) und dem langsamsten Stage-Span dazu.
+
+Ausgabe: eine JSON-Zeile pro Span in eine Datei (Standard: profile.jsonl).
+Aus, bis es eingeschaltet wird - dann kostet ein Span nur ein paar
+Attribut-Zugriffe:
+- CLIs: --profile [PFAD]
+- Streamlit: Umgebungsvariable NFL_PROFILE=1 (oder =pfad/zur/datei.jsonl)
+
+Mit capture="cprofile" bzw. "tracemalloc" wird jeder Stage-Span zusätzlich
+profiliert; behalten und ausgegeben wird nur der langsamste
+(.prof-Datei bzw. die Top-Allokationen als JSON-Zeile).
+"""
+
+from contextlib import contextmanager
+from functools import wraps
+import atexit
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+import time
+
+ENV_VAR = "NFL_PROFILE"
+ENV_CAPTURE = "NFL_PROFILE_CAPTURE"
+DEFAULT_PATH = Path("profile.jsonl")
+CAPTURE_MODES = ("cprofile", "tracemalloc")
+# Zähler, die ein Span mitbringt (None = nicht gesetzt, landet nicht im JSON)
+COUNTERS = ("rows_in", "rows_out", "bytes_read", "bytes_written")
+
+logger = logging.getLogger("profiling")
+
+
+class Span:
+    """Ein laufender Messabschnitt; Zähler können im with-Block gesetzt werden."""
+
+    __slots__ = ("name", "kind", "attrs", "parent", "depth", "start", "seconds", "child_seconds") + COUNTERS
+
+    def __init__(self, name, kind, attrs, parent=None, depth=0):
+        self.name = name
+        self.kind = kind
+        self.attrs = attrs
+        self.parent = parent
+        self.depth = depth
+        self.start = None
+        self.seconds = None
+        self.child_seconds = 0.0
+        self.rows_in = self.rows_out = self.bytes_read = self.bytes_written = None
+
+    def record(self) -> dict:
+        rec = {"span": self.name, "kind": self.kind, "seconds": round(self.seconds, 6),
+               "self_seconds": round(self.seconds - self.child_seconds, 6),
+               "parent": self.parent, "depth": self.depth}
+        for counter in COUNTERS:
+            value = getattr(self, counter)
+            if value is not None:
+                rec[counter] = int(value)
+        rec.update(self.attrs)
+        return rec
+
+
+class Profiler:
+    """Sammelt Spans (thread-sicher) und schreibt sie als JSON-Zeilen."""
+
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.capture = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._file = None
+        self._totals = {}      # kind -> Eigenzeit (ohne verschachtelte Spans) in Sekunden
+        self._slowest = None   # (sekunden, name, capture-ergebnis)
+
+    # --- ein/aus ---
+    def configure(self, path=DEFAULT_PATH, capture=None):
+        if capture not in (None,) + CAPTURE_MODES:
+            raise ValueError(f"Unknown capture mode: {capture!r} (expected one of {CAPTURE_MODES})")
+        self.close()
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self.capture = capture
+        self._totals = {}
+        self._slowest = None
+        self.enabled = True
+        if capture == "tracemalloc":
+            import tracemalloc
+            tracemalloc.start()
+        self.emit({"event": "start", "pid": os.getpid(), "capture": capture})
+        logger.info(f"Profiling to {self.path}" + (f" (capture={capture})" if capture else ""))
+
+    def close(self):
+        if not self.enabled:
+            return
+        self.emit({"event": "summary", **self.summary()})
+        self._dump_capture()
+        self.enabled = False
+        with self._lock:
+            self._file.close()
+            self._file = None
+
+    # --- spans ---
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, name, kind="pandas", **attrs):
+        if not self.enabled:
+            # gleiche Schnittstelle, aber nichts messen
+            yield Span(name, kind, attrs)
+            return
+
+        stack = self._stack()
+        sp = Span(name, kind, attrs, parent=stack[-1].name if stack else None, depth=len(stack))
+        stack.append(sp)
+        capture = self._start_capture() if kind == "stage" and sp.depth == 0 else None
+        sp.start = time.perf_counter()
+        error = None
+        try:
+            yield sp
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            sp.seconds = time.perf_counter() - sp.start
+            stack.pop()
+            if stack:
+                stack[-1].child_seconds += sp.seconds
+            captured = self._stop_capture(capture)
+            rec = sp.record()
+            if error is not None:
+                rec["error"] = repr(error)
+            self.emit(rec)
+            with self._lock:
+                self._totals[kind] = self._totals.get(kind, 0.0) + sp.seconds - sp.child_seconds
+                if captured is not None and (self._slowest is None or sp.seconds > self._slowest[0]):
+                    self._slowest = (sp.seconds, name, captured)
+
+    def emit(self, record: dict):
+        record = {"ts": round(time.time(), 3), "thread": threading.current_thread().name, **record}
+        line = json.dumps(record, default=str)
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line + "\n")
+                self._file.flush()
+
+    def summary(self) -> dict:
+        with self._lock:
+            out = {f"{kind}_seconds": round(sec, 6) for kind, sec in sorted(self._totals.items())}
+            if self._slowest is not None:
+                out["slowest_stage"] = self._slowest[1]
+                out["slowest_seconds"] = round(self._slowest[0], 6)
+            return out
+
+    # --- cProfile / tracemalloc für Stage-Spans ---
+    def _start_capture(self):
+        if self.capture == "cprofile" and threading.current_thread() is threading.main_thread():
+            import cProfile
+            prof = cProfile.Profile()
+            prof.enable()
+            return prof
+        if self.capture == "tracemalloc":
+            import tracemalloc
+            tracemalloc.reset_peak()
+            return "tracemalloc"
+        return None
+
+    def _stop_capture(self, capture):
+        if capture is None:
+            return None
+        if capture == "tracemalloc":
+            import tracemalloc
+            snapshot = tracemalloc.take_snapshot()
+            top = snapshot.statistics("lineno")[:15]
+            return {
+                "peak_bytes": tracemalloc.get_traced_memory()[1],
+                "top": [{"where": str(s.traceback), "bytes": s.size, "count": s.count} for s in top],
+            }
+        capture.disable()
+        return capture
+
+    def _dump_capture(self):
+        if self._slowest is None:
+            return
+        seconds, name, captured = self._slowest
+        if self.capture == "cprofile":
+            prof_path = self.path.with_suffix(".prof")
+            captured.dump_stats(prof_path)
+            self.emit({"event": "cprofile", "span": name, "seconds": round(seconds, 6), "path": str(prof_path)})
+        else:
+            self.emit({"event": "tracemalloc", "span": name, "seconds": round(seconds, 6), **captured})
+
+
+PROFILER = Profiler()
+atexit.register(PROFILER.close)
+
+
+def configure(path=DEFAULT_PATH, capture=None):
+    """Schaltet das Profiling für diesen Prozess ein (path = JSON-Lines-Datei)."""
+    PROFILER.configure(path, capture)
+
+
+def configure_from_env():
+    """
+    Für Prozesse ohne CLI (Streamlit): NFL_PROFILE=1 -> profile.jsonl,
+    NFL_PROFILE=<pfad> -> dorthin. NFL_PROFILE_CAPTURE=cprofile|tracemalloc.
+    Gibt True zurück, wenn Profiling an ist.
+    """
+    value = os.environ.get(ENV_VAR, "").strip()
+    if PROFILER.enabled or value.lower() in ("", "0", "false", "no"):
+        return PROFILER.enabled
+    path = DEFAULT_PATH if value.lower() in ("1", "true", "yes") else Path(value)
+    configure(path, os.environ.get(ENV_CAPTURE) or None)
+    return True
+
+
+def close():
+    PROFILER.close()
+
+
+def span(name, kind="pandas", **attrs):
+    """Kontextmanager für einen Messabschnitt (siehe Modul-Doku)."""
+    return PROFILER.span(name, kind, **attrs)
+
+
+def profiled(name=None, kind="pandas"):
+    """Decorator-Variante von span(); Name ist standardmäßig modul.funktion."""
+    def decorator(fn):
+        label = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return fn(*args, **kwargs)
+            with PROFILER.span(label, kind):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def add_profile_args(parser):
+    """Gemeinsame CLI-Flags: --profile [PFAD] und --profile-capture."""
+    parser.add_argument("--profile", nargs="?", const=str(DEFAULT_PATH), default=None, metavar="PATH",
+                        help=f"Write timing spans as JSON lines (default: {DEFAULT_PATH})")
+    parser.add_argument("--profile-capture", choices=CAPTURE_MODES, default=None,
+                        help="Also cProfile/tracemalloc the slowest stage (with --profile)")
+
+
+def configure_from_args(args):
+    if getattr(args, "profile", None):
+        configure(args.profile, args.profile_capture)
+    else:
+        configure_from_env()
@@ -0,0 +1,118 @@
+"""
+src/utils/schema.py
+
+Kompakte dtypes für players / gamelogs (und die daraus abgeleiteten Frames).
+
+- Team, Position, Status & Co. als `category` statt Python-Strings
+- season/week als int16, Stat-Spalten als int32
+- Spalten mit fehlenden Werten bekommen die nullable-Variante (Int16/Int32)
+
+`apply_schema` wird einmal beim Ingest und wieder beim Zurücklesen aus SQLite
+angewendet; `memory_report` zeigt, wie viel das pro Frame spart.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Stat-Spalten der Gamelogs, die normalize_gamelogs in Ganzzahlen umwandelt und
+# die die Wochen-Auswertung (analysis.stats.refresh_weekly_stats) fortschreibt.
+# Ab receiving_yards: was die Fantasy-Regelwerke (analysis.scoring) brauchen.
+STAT_COLUMNS = [
+    "yards", "rushing_yards", "passing_yards", "td", "touchdowns",
+    "receiving_yards", "receptions", "passing_tds", "rushing_tds", "receiving_tds",
+    "interceptions", "fumbles_lost",
+]
+
+SCHEMA = {
+    "players": {
+        "season": "int16",
+        "team": "category",
+        "position": "category",
+        "pos_detail": "category",
+        "status": "category",
+        "college": "category",
+        "depth": "int16",
+        "weight": "int16",
+        "years_exp": "int16",
+    },
+    "gamelogs": {
+        "season": "int16",
+        "week": "int16",
+        "season_type": "category",
+        "recent_team": "category",
+        "position": "category",
+        "yards": "int32",
+        "rushing_yards": "int32",
+        "passing_yards": "int32",
+        "td": "int32",
+        "touchdowns": "int32",
+        "receiving_yards": "int32",
+        "receptions": "int32",
+        "passing_tds": "int32",
+        "rushing_tds": "int32",
+        "receiving_tds": "int32",
+        "interceptions": "int32",
+        "fumbles_lost": "int32",
+    },
+    "player_season_totals": {
+        "season": "int16",
+        "team": "category",
+        "position": "category",
+        "games": "int16",
+        "yards": "int32",
+        "td": "int32",
+        "yards_rank": "int32",
+        "position_rank": "int32",
+    },
+}
+
+
+def _fits(values: pd.Series, dtype: str) -> bool:
+    info = np.iinfo(dtype)
+    vmin, vmax = values.min(), values.max()
+    return pd.isna(vmin) or (info.min <= vmin and vmax <= info.max)
+
+
+def _cast_int(series: pd.Series, dtype: str) -> pd.Series:
+    values = pd.to_numeric(series, errors="coerce")
+    if values.isna().sum() > series.isna().sum():
+        # Text, der keine Zahl ist (z.B. "6-2") -> Spalte nicht anfassen
+        return series
+    if not _fits(values, dtype):
+        # passt nicht in den kleinen Typ -> lieber breit lassen als überlaufen
+        dtype = "int64"
+    # nur ganze Zahlen (oder NaN) verlustfrei umwandeln
+    non_null = values.dropna()
+    if not non_null.empty and not (non_null == np.floor(non_null)).all():
+        return values
+    if values.isna().any():
+        return values.astype(dtype.capitalize())  # nullable Int16/Int32/Int64
+    return values.astype(dtype)
+
+
+def apply_schema(df: pd.DataFrame, *tables: str) -> pd.DataFrame:
+    """
+    Wandelt die bekannten Spalten in die kompakten dtypes aus SCHEMA um.
+    Bei mehreren Tabellen gewinnt die erste, die eine Spalte kennt.
+    Unbekannte Spalten bleiben unverändert.
+    """
+    spec = {}
+    for table in reversed(tables):
+        spec.update(SCHEMA.get(table, {}))
+
+    out = df.copy()
+    for col, dtype in spec.items():
+        if col not in out.columns or str(out[col].dtype) == dtype:
+            continue
+        if dtype == "category":
+            out[col] = out[col].astype("category")
+        else:
+            out[col] = _cast_int(out[col], dtype)
+    return out
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> dict:
+    """Speicherbedarf vorher/nachher (deep) in Bytes plus Ersparnis in Prozent."""
+    b = int(before.memory_usage(deep=True).sum())
+    a = int(after.memory_usage(deep=True).sum())
+    return {"bytes_before": b, "bytes_after": a, "saved_pct": round(100 * (b - a) / b, 1) if b else 0.0}
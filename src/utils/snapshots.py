@@ -0,0 +1,98 @@
+"""
+src/utils/snapshots.py
+
+Ergebnis-Snapshots als Arrow-IPC-Dateien (Feather v2, unkomprimiert):
+
+    db/snapshots/<name>/season=<saison>.arrow    # pro Saison
+    db/snapshots/<name>.arrow                    # ohne Saison (z.B. catalog)
+
+- write_snapshot: DataFrame -> IPC-Datei in Record-Batches, atomar ersetzt
+  (utils.io.atomic_write); beliebige Metadaten (z.B. die DB-Generation)
+  landen als JSON in den Schema-Metadaten
+- load_snapshot: öffnet die Datei per pa.memory_map - die Arrow-Puffer zeigen
+  direkt in die gemappte Datei, gelesen wird erst beim Zugriff (Zero-Copy).
+  Das Öffnen kostet damit praktisch nichts, egal wie groß der Snapshot ist.
+  Unkomprimiert ist Absicht: komprimierte Puffer müssten erst entpackt werden.
+- Wird ein Snapshot ersetzt, behalten bereits geladene Tabellen die alte
+  (gemappte) Datei, bis sie freigegeben werden.
+
+    table = load_snapshot("leaderboard", 2023)              # pyarrow.Table
+    df = load_snapshot("gamelogs", 2023, columns=["player_id", "yards"]).to_pandas()
+"""
+
+from pathlib import Path
+import json
+
+from utils.io import atomic_write
+
+SNAPSHOT_DIR = Path("db") / "snapshots"
+SNAPSHOT_SUFFIX = ".arrow"
+METADATA_KEY = b"snapshot"
+DEFAULT_BATCH_ROWS = 64 * 1024
+
+
+def snapshot_path(name: str, season: int = None, root: Path = SNAPSHOT_DIR) -> Path:
+    if season is None:
+        return Path(root) / f"{name}{SNAPSHOT_SUFFIX}"
+    return Path(root) / name / f"season={int(season)}{SNAPSHOT_SUFFIX}"
+
+
+def write_snapshot(df, name: str, season: int = None, metadata: dict = None, root: Path = SNAPSHOT_DIR,
+                   batch_rows: int = DEFAULT_BATCH_ROWS) -> Path:
+    """Ersetzt den Snapshot atomar durch `df` (Index wird verworfen)."""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    meta = {"name": name, "season": season, "rows": table.num_rows, **(metadata or {})}
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), METADATA_KEY: json.dumps(meta)})
+
+    path = snapshot_path(name, season, root)
+    with atomic_write(path) as tmp:
+        with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            for batch in table.to_batches(max_chunksize=batch_rows):
+                writer.write_batch(batch)
+    return path
+
+
+def _open(path: Path):
+    import pyarrow as pa
+
+    return pa.ipc.open_file(pa.memory_map(str(path), "r"))
+
+
+def load_snapshot(name: str, season: int = None, columns=None, root: Path = SNAPSHOT_DIR):
+    """
+    Der Snapshot als pyarrow.Table, per memory_map ohne Kopie gelesen
+    (optional nur `columns`). FileNotFoundError, wenn er fehlt.
+    """
+    path = snapshot_path(name, season, root)
+    if not path.exists():
+        raise FileNotFoundError(f"No snapshot {name!r}" + (f" for season {season}" if season is not None else "")
+                                + f": {path}")
+    table = _open(path).read_all()
+    return table.select(list(columns)) if columns is not None else table
+
+
+def snapshot_metadata(name: str, season: int = None, root: Path = SNAPSHOT_DIR):
+    """Die beim Schreiben mitgegebenen Metadaten (liest nur den Footer); None ohne Snapshot."""
+    path = snapshot_path(name, season, root)
+    if not path.exists():
+        return None
+    import pyarrow as pa
+
+    # nur der Footer wird gebraucht -> Map gleich wieder schließen (sonst bleibt
+    # pro Aufruf ein Handle offen, bis der GC es findet)
+    with pa.memory_map(str(path), "r") as source:
+        metadata = pa.ipc.open_file(source).schema.metadata or {}
+    return json.loads(metadata.get(METADATA_KEY, b"{}"))
+
+
+def list_snapshots(root: Path = SNAPSHOT_DIR) -> list:
+    """(name, saison oder None, pfad) aller vorhandenen Snapshots."""
+    root = Path(root)
+    if not root.is_dir():
+        return []
+    found = [(p.stem, None, p) for p in root.glob(f"*{SNAPSHOT_SUFFIX}")]
+    for p in root.glob(f"*/season=*{SNAPSHOT_SUFFIX}"):
+        found.append((p.parent.name, int(p.stem.split("=", 1)[1]), p))
+    return sorted(found, key=lambda s: (s[0], s[1] if s[1] is not None else -1))
@@ -0,0 +1,227 @@
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).parents[1] # repo root
+sys.path.insert(0, str(ROOT / "src"))
+
+from fetchers import nflreadpy_fetch
+
+
+def make_fake_backend(fail_first=0):
+  """Fake `nflreadpy`-Modul: tidy.read_rosters / tidy.read_gamelogs, optional erst fehlschlagend."""
+  calls = {"rosters": 0, "gamelogs": 0}
+
+  def read(dataset, season):
+    calls[dataset] += 1
+    if calls[dataset] <= fail_first:
+      raise ConnectionError("temporary outage")
+    if dataset == "rosters":
+      return pd.DataFrame({"player_id": ["a", "b"], "season": season, "team": "KC"})
+    return pd.DataFrame({"player_id": ["a"], "season": season, "week": 1, "yards": 10})
+
+  tidy = SimpleNamespace(
+    read_rosters=lambda s: read("rosters", s),
+    read_gamelogs=lambda s: read("gamelogs", s),
+  )
+  return SimpleNamespace(tidy=tidy), calls
+
+
+def test_fetch_concurrent_uses_backend(tmp_path, monkeypatch):
+  monkeypatch.setattr(nflreadpy_fetch, "RAW_DIR", tmp_path)
+  fake, _ = make_fake_backend()
+
+  summary = nflreadpy_fetch.fetch_concurrent(
+    seasons=[2021, 2022, 2023], jobs=3, rate=0, mods={"nflreadpy": fake},
+  )
+
+  assert [(r["dataset"], r["season"]) for r in summary] == [
+    ("gamelogs", 2021), ("gamelogs", 2022), ("gamelogs", 2023),
+    ("rosters", 2021), ("rosters", 2022), ("rosters", 2023),
+  ]
+  assert {r["source"] for r in summary} == {"nflreadpy"}
+  assert pd.read_parquet(tmp_path / "players_2022.parquet")["season"].tolist() == [2022, 2022]
+  assert (tmp_path / "gamelogs_2023.parquet").exists()
+
+
+def test_fetch_concurrent_retries_then_falls_back(tmp_path, monkeypatch):
+  monkeypatch.setattr(nflreadpy_fetch, "RAW_DIR", tmp_path)
+
+  flaky, calls = make_fake_backend(fail_first=1)
+  summary = nflreadpy_fetch.fetch_concurrent(
+    datasets=["rosters"], seasons=[2023], jobs=1, rate=0, backoff=0, mods={"nflreadpy": flaky},
+  )
+  assert summary[0]["source"] == "nflreadpy"
+  assert summary[0]["attempts"] == 2
+  assert calls["rosters"] == 2
+
+  broken, _ = make_fake_backend(fail_first=99)
+  summary = nflreadpy_fetch.fetch_concurrent(
+    datasets=["gamelogs"], seasons=[2023], jobs=1, rate=0, retries=2, backoff=0,
+    mods={"nflreadpy": broken},
+  )
+  assert summary[0]["source"] == "demo"
+  assert summary[0]["attempts"] == 2
+
+
+def test_fetch_concurrent_does_not_retry_backend_without_call_pattern(tmp_path, monkeypatch):
+  monkeypatch.setattr(nflreadpy_fetch, "RAW_DIR", tmp_path)
+  monkeypatch.setattr(nflreadpy_fetch.time, "sleep", lambda _: pytest.fail("backed off without a failed call"))
+
+  # installiert, aber keiner der bekannten Aufrufe existiert -> kein Retry, direkt Demo
+  summary = nflreadpy_fetch.fetch_concurrent(
+    datasets=["rosters", "gamelogs"], seasons=[2023], jobs=1, rate=0, retries=3, backoff=1,
+    mods={"nflreadpy": SimpleNamespace(tidy=SimpleNamespace())},
+  )
+  assert [(r["source"], r["attempts"]) for r in summary] == [("demo", 1), ("demo", 1)]
+
+
+def test_fetch_concurrent_skips_existing_files(tmp_path, monkeypatch):
+  monkeypatch.setattr(nflreadpy_fetch, "RAW_DIR", tmp_path)
+  fake, calls = make_fake_backend()
+  kwargs = dict(datasets=["rosters"], seasons=[2023], rate=0, mods={"nflreadpy": fake})
+
+  nflreadpy_fetch.fetch_concurrent(**kwargs)
+  summary = nflreadpy_fetch.fetch_concurrent(**kwargs)
+
+  assert summary[0]["source"] == "cached"
+  assert calls["rosters"] == 1
+
+
+def test_max_age_hours_is_a_parameter_not_a_global(tmp_path, monkeypatch):
+  from utils.manifest import CURRENT_SEASON_TTL_HOURS, current_season
+
+  monkeypatch.setattr(nflreadpy_fetch, "RAW_DIR", tmp_path)
+  fake, calls = make_fake_backend()
+  kwargs = dict(datasets=["rosters"], seasons=[current_season()], rate=0, mods={"nflreadpy": fake})
+
+  nflreadpy_fetch.fetch_concurrent(**kwargs)
+  assert nflreadpy_fetch.fetch_concurrent(**kwargs)[0]["source"] == "cached"
+  # max_age_hours=0: die laufende Saison ist sofort veraltet -> neu laden
+  assert nflreadpy_fetch.fetch_concurrent(max_age_hours=0, **kwargs)[0]["source"] == "nflreadpy"
+  assert calls["rosters"] == 2
+  assert nflreadpy_fetch.CURRENT_SEASON_TTL_HOURS == CURRENT_SEASON_TTL_HOURS
+
+
+def test_manifest_freshness_policy(tmp_path, monkeypatch):
+  from datetime import datetime, timedelta, timezone
+  from utils.manifest import current_season
+
+  monkeypatch.setattr(nflreadpy_fetch, "RAW_DIR", tmp_path)
+  now = datetime.now(timezone.utc)
+  current, past = current_season(now), current_season(now) - 1
+  df = pd.DataFrame({"player_id": ["a"], "season": [past]})
+  for season in (past, current):
+    nflreadpy_fetch.write_parquet(df, tmp_path / f"players_{season}.parquet", source="nflreadpy", season=season)
+  nflreadpy_fetch.write_parquet(df, tmp_path / "players_1999.parquet", source="demo", season=1999)
+
+  manifest = nflreadpy_fetch.get_manifest(tmp_path)
+  entry = manifest.entry(tmp_path / f"players_{past}.parquet")
+  assert entry["rows"] == 1 and entry["source"] == "nflreadpy"
+  assert not list(tmp_path.glob("*.tmp"))
+
+  current_path = tmp_path / f"players_{current}.parquet"
+  assert manifest.is_fresh(current_path, current, now=now)
+  assert not manifest.is_fresh(current_path, current, now=now + timedelta(hours=13))
+  assert manifest.is_fresh(tmp_path / f"players_{past}.parquet", past, now=now + timedelta(days=1000))
+  assert not manifest.is_fresh(tmp_path / "players_1999.parquet", 1999)
+
+
+def test_synthetic_backend_is_deterministic(tmp_path, monkeypatch):
+  from bench.synthetic import FakeBackend, generate_gamelogs
+
+  monkeypatch.setattr(nflreadpy_fetch, "RAW_DIR", tmp_path)
+  assert generate_gamelogs(2023, seed=1, players_per_team=10).equals(generate_gamelogs(2023, seed=1, players_per_team=10))
+
+  summary = nflreadpy_fetch.fetch_concurrent(
+    seasons=[2022, 2023], jobs=2, rate=0, mods={"nflreadpy": FakeBackend(seed=1, players_per_team=10)},
+  )
+  assert {r["source"] for r in summary} == {"nflreadpy"}
+  players = pd.read_parquet(tmp_path / "players_2023.parquet")
+  gamelogs = pd.read_parquet(tmp_path / "gamelogs_2023.parquet")
+  # Roster wie nflreadpy: gsis_id, kein player_id
+  assert "player_id" not in players.columns
+  assert set(gamelogs["player_id"]) <= set(players["gsis_id"])
+  assert (gamelogs["yards"] == gamelogs[["passing_yards", "rushing_yards", "receiving_yards"]].sum(axis=1)).all()
+
+
+def test_profile_spans_for_concurrent_fetch(tmp_path, monkeypatch):
+  import json
+  from utils import profiling
+
+  monkeypatch.setattr(nflreadpy_fetch, "RAW_DIR", tmp_path / "raw")
+  fake, _ = make_fake_backend()
+  profiling.configure(tmp_path / "profile.jsonl")
+  try:
+    nflreadpy_fetch.fetch_concurrent(datasets=["rosters"], seasons=[2023], rate=0, mods={"nflreadpy": fake})
+  finally:
+    profiling.close()
+
+  records = [json.loads(line) for line in (tmp_path / "profile.jsonl").read_text().splitlines()]
+  spans = {r["span"]: r for r in records if "span" in r and "event" not in r}
+  assert spans["fetch.rosters"]["rows_out"] == 2 and spans["fetch.rosters"]["kind"] == "stage"
+  assert spans["fetch.write"]["parent"] == "fetch.rosters" and spans["fetch.write"]["bytes_written"] > 0
+  assert records[-1]["event"] == "summary" and "io_seconds" in records[-1]
+
+
+def test_fetch_pbp_streams_row_groups_with_allowlist(tmp_path, monkeypatch):
+  import pyarrow.parquet as pq
+
+  monkeypatch.setattr(nflreadpy_fetch, "RAW_DIR", tmp_path)
+  # erste 1000 Plays ohne passer -> Spalte im ersten Chunk komplett leer
+  pbp = pd.DataFrame({
+    "play_id": range(2500),
+    "season": 2023,
+    "passer_player_id": [None] * 1000 + ["00-1"] * 1500,
+    "desc": "play",
+  })
+  fake = SimpleNamespace(load_pbp=lambda s: pbp)
+
+  summary = nflreadpy_fetch.fetch_pbp(
+    seasons=[2023], columns=["play_id", "passer_player_id"], row_group_size=1000, chunk_rows=500,
+    mods={"nflreadpy": fake},
+  )
+  assert summary[0]["rows"] == 2500 and summary[0]["source"] == "nflreadpy"
+
+  meta = pq.ParquetFile(tmp_path / "pbp_2023.parquet").metadata
+  assert meta.num_row_groups == 3 and meta.schema.names == ["play_id", "passer_player_id"]
+  assert pd.read_parquet(tmp_path / "pbp_2023.parquet")["passer_player_id"].notna().sum() == 1500
+  assert nflreadpy_fetch.get_manifest(tmp_path).entry(tmp_path / "pbp_2023.parquet")["rows"] == 2500
+  assert nflreadpy_fetch.fetch_pbp(seasons=[2023], mods={"nflreadpy": fake})[0]["source"] == "cached"
+
+def test_import_has_no_side_effects_and_backend_calls_are_memoized(tmp_path, monkeypatch):
+  import subprocess
+  import sys
+  from fetchers import cli
+  from bench.synthetic import FakeBackend
+
+  # Import legt weder raw/ an noch konfiguriert er das Logging
+  code = ("import logging, sys; sys.path.insert(0, sys.argv[1]); import fetchers.nflreadpy_fetch, etl.ingest; "
+          "assert not logging.getLogger().handlers")
+  subprocess.run([sys.executable, "-c", code, str(ROOT / "src")], cwd=tmp_path, check=True)
+  assert list(tmp_path.iterdir()) == []
+  from utils import manifest
+  assert cli.DEFAULT_MAX_AGE_HOURS == nflreadpy_fetch.CURRENT_SEASON_TTL_HOURS == manifest.CURRENT_SEASON_TTL_HOURS
+  assert cli.DEFAULT_ROW_GROUP_SIZE == nflreadpy_fetch.PBP_ROW_GROUP_SIZE
+
+  class BrokenTidy:
+    calls = 0
+
+    def read_rosters(self, season):
+      BrokenTidy.calls += 1
+      raise RuntimeError("tidy API not available in this version")
+
+  monkeypatch.setattr(nflreadpy_fetch, "RAW_DIR", tmp_path)
+  monkeypatch.setattr(nflreadpy_fetch, "_call_patterns", None)
+  fake = FakeBackend(seed=0, players_per_team=5)
+  fake.tidy = BrokenTidy()
+  nflreadpy_fetch.fetch_concurrent(datasets=["rosters"], seasons=[2021, 2022, 2023], jobs=1, rate=0,
+                                   mods={"nflreadpy": fake})
+  # nur die erste Saison probiert tidy.read_rosters, danach direkt load_rosters
+  assert BrokenTidy.calls == 1
+  saved = json.loads((tmp_path / "backends.json").read_text())
+  assert saved["nflreadpy"]["calls"] == {"rosters": "load_rosters"}
@@ -0,0 +1,72 @@
+import functools
+import sys
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+ROOT = Path(__file__).parents[1] # repo root
+sys.path.insert(0, str(ROOT / "src"))
+
+from utils.images import ImageCache
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def image_server(tmp_path):
+    """Lokaler Ersatz für den Headshot-CDN: liefert PNGs aus tmp_path/www."""
+    www = tmp_path / "www"
+    www.mkdir()
+    for i, color in enumerate(["red", "green", "blue"]):
+        Image.new("RGB", (300, 200), color).save(www / f"p{i}.png")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=str(www)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_prefetch_thumbnails_from_local_server(tmp_path, image_server):
+    cache = ImageCache(tmp_path / "cache")
+    urls = [f"{image_server}/p{i}.png" for i in range(3)] + [f"{image_server}/missing.png"]
+
+    paths = cache.prefetch(urls, size="card")
+    assert paths[urls[3]] is None
+    for url in urls[:3]:
+        with Image.open(paths[url]) as img:
+            assert img.size == (150, 150)
+    with Image.open(cache.get(urls[0], size="thumb")) as img:
+        assert img.size == (64, 64)
+    # zweiter Durchlauf in prefetch + "thumb" kommen aus dem Cache, ohne neuen Download
+    assert cache.stats()["hits"] == 4
+
+
+def test_lru_eviction_and_pluggable_fetcher(tmp_path):
+    from io import BytesIO
+
+    calls = []
+
+    def fake_fetch(url):
+        calls.append(url)
+        buf = BytesIO()
+        Image.effect_noise((200, 200), 64).save(buf, format="PNG")
+        return buf.getvalue()
+
+    cache = ImageCache(tmp_path / "cache", fetcher=fake_fetch, sizes={"card": (150, 150)})
+    one = cache.get("https://cdn.example/1.png")
+    cache.max_bytes = int(one.stat().st_size * 2.5)
+
+    cache.get("https://cdn.example/2.png")
+    cache.get("https://cdn.example/1.png")  # 1 wieder benutzt -> 2 ist jetzt am ältesten
+    cache.get("https://cdn.example/3.png")
+
+    assert cache.stats()["evictions"] == 1
+    assert not cache.path("https://cdn.example/2.png").exists()
+    assert cache.path("https://cdn.example/1.png").exists()
+    assert calls == ["https://cdn.example/1.png", "https://cdn.example/2.png", "https://cdn.example/3.png"]
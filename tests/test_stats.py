@@ -0,0 +1,758 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).parents[1] # repo root
+sys.path.insert(0, str(ROOT / "src"))
+
+from analysis import stats
+
+
+def make_gamelogs(weeks, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = [
+        {"season": 2023, "week": w, "player_id": f"p{p}", "yards": int(rng.integers(0, 150)), "td": int(rng.integers(0, 3))}
+        for w in weeks for p in range(5) if not (p == 4 and w % 2)  # p4 spielt nur gerade Wochen
+    ]
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def synthetic_fetch(tmp_path, monkeypatch):
+    """Arbeitsordner = tmp_path (raw/ und db/ relativ) und fetch(seasons, seed) gegen das FakeBackend."""
+    from bench.synthetic import FakeBackend
+    from fetchers import nflreadpy_fetch
+    from utils.db import close_pools
+
+    monkeypatch.chdir(tmp_path)
+
+    def fetch(seasons, seed=1):
+        return nflreadpy_fetch.fetch_concurrent(
+            seasons=seasons, rate=0, force=True, mods={"nflreadpy": FakeBackend(seed=seed, players_per_team=10)},
+        )
+
+    yield fetch
+    close_pools()
+
+
+def weekly_table(conn):
+    return pd.read_sql("SELECT * FROM weekly_stats ORDER BY season, player_id, week", conn)
+
+
+def test_weekly_stats_incremental_matches_full_recompute():
+    conn = sqlite3.connect(":memory:")
+    gamelogs = make_gamelogs(range(1, 7))
+    gamelogs.to_sql("gamelogs", conn, index=False)
+    assert stats.refresh_weekly_stats(conn, 2023, ["yards", "td"]) == {2023: 1}
+    assert stats.refresh_weekly_stats(conn, 2023, ["yards", "td"]) == {}
+
+    # Woche 5 korrigiert, Woche 7 neu -> ab Woche 5 neu rechnen
+    gamelogs.loc[gamelogs["week"] == 5, "yards"] += 10
+    gamelogs = pd.concat([gamelogs, make_gamelogs([7], seed=1)], ignore_index=True)
+    gamelogs.to_sql("gamelogs", conn, index=False, if_exists="replace")
+    assert stats.refresh_weekly_stats(conn, 2023, ["yards", "td"]) == {2023: 5}
+
+    full = stats.compute_weekly_stats(gamelogs, ["yards", "td"])
+    incremental = weekly_table(conn)
+    assert incremental["player_id"].tolist() == full["player_id"].tolist()
+    numeric = [c for c in incremental.columns if c != "player_id"]
+    np.testing.assert_allclose(incremental[numeric].astype(float), full[numeric].astype(float))
+
+    p4 = incremental[incremental["player_id"] == "p4"]
+    assert p4["games"].tolist() == [1, 2, 3]
+    assert p4["yards_cum"].tolist() == p4["yards"].cumsum().tolist()
+
+
+def test_upsert_replaces_one_season_and_migrates_legacy_table():
+    from etl.ingest import _table_keys, upsert_table
+
+    conn = sqlite3.connect(":memory:")
+    # Alt-Tabelle wie früher per to_sql(if_exists="replace"): ohne Primärschlüssel, mit Dubletten
+    legacy = make_gamelogs(range(1, 3)).assign(season=2021)
+    pd.concat([legacy, legacy.head(1)]).to_sql("gamelogs", conn, index=False, if_exists="replace")
+
+    a, b = make_gamelogs(range(1, 5), seed=1), make_gamelogs(range(1, 4), seed=2).assign(season=2022)
+    upsert_table(a, "gamelogs", conn, 2023)
+    assert _table_keys(conn, "gamelogs") == ["season", "week", "player_id"]
+    upsert_table(b, "gamelogs", conn, 2022)
+    counts = dict(conn.execute("SELECT season, COUNT(*) FROM gamelogs GROUP BY season").fetchall())
+    assert counts == {2021: len(legacy), 2022: len(b), 2023: len(a)}
+
+    # Re-Ingest von 2023 mit neuen Werten: gleiche Zeilenzahl, 2022 und 2021 unberührt
+    b_rows = conn.execute("SELECT * FROM gamelogs WHERE season = 2022 ORDER BY week, player_id").fetchall()
+    upsert_table(a.assign(yards=a["yards"] + 1), "gamelogs", conn, 2023)
+    assert dict(conn.execute("SELECT season, COUNT(*) FROM gamelogs GROUP BY season").fetchall()) == counts
+    assert conn.execute("SELECT * FROM gamelogs WHERE season = 2022 ORDER BY week, player_id").fetchall() == b_rows
+    assert conn.execute("SELECT SUM(yards) FROM gamelogs WHERE season = 2023").fetchone()[0] == a["yards"].sum() + len(a)
+
+
+def test_ingest_accepts_nflreadpy_roster_with_gsis_id(tmp_path, monkeypatch):
+    from etl import ingest
+
+    monkeypatch.chdir(tmp_path)
+    Path("raw").mkdir()
+    pd.DataFrame({
+        "season": [2023, 2023], "gsis_id": ["00-0000001", "00-0000002"],
+        "full_name": ["A One", "B Two"], "team": ["KC", "DAL"], "position": ["QB", "WR"],
+    }).to_parquet("raw/players_2023.parquet")
+    pd.DataFrame({
+        "player_id": ["00-0000001", "00-0000002"], "season": [2023, 2023], "week": [1, 1],
+        "passing_yards": [300, 0], "receiving_yards": [0, 80],
+    }).to_parquet("raw/gamelogs_2023.parquet")
+
+    assert ingest.ingest_season(2023)
+    conn = sqlite3.connect(ingest.DB_PATH)
+    rows = conn.execute("SELECT player_id, team FROM players ORDER BY player_id").fetchall()
+    conn.close()
+    assert rows == [("00-0000001", "KC"), ("00-0000002", "DAL")]
+    monkeypatch.setattr(stats, "DB_PATH", ingest.DB_PATH)
+    top = stats.get_top_offensive_players(2023)
+    assert sorted(top["full_name"]) == ["A One", "B Two"]
+
+
+@pytest.mark.parametrize("drop", [[], ["td"], ["yards", "td"]])
+def test_top_players_sql_matches_pandas_fallback(tmp_path, monkeypatch, drop):
+    db = tmp_path / "nfl.db"
+    conn = sqlite3.connect(db)
+    gamelogs = pd.concat([make_gamelogs(range(1, 7), seed=0), make_gamelogs(range(1, 4), seed=1).assign(season=2022)])
+    gamelogs.drop(columns=drop).to_sql("gamelogs", conn, index=False)
+    pd.DataFrame({
+        "season": 2023, "player_id": [f"p{p}" for p in range(5)],
+        "team": ["KC", "KC", "PHI", "PHI", "BUF"], "position": ["QB", "WR", "WR", "RB", "WR"],
+    }).to_sql("players", conn, index=False)
+    conn.close()
+    monkeypatch.setattr(stats, "DB_PATH", db)
+    assert stats._is_sql_compatible(stats.get_table_columns("players"), stats.get_table_columns("gamelogs"))
+
+    def rows(df):
+        return sorted(zip(df["player_id"].astype(str), df["yards"].astype(int), df["td"].astype(int)))
+
+    for positions, teams in [(None, None), (["WR"], None), (None, ["KC", "PHI"]), (["WR"], ["PHI"])]:
+        sql = stats.get_top_offensive_players(2023, top_n=None, positions=positions, teams=teams)
+        fallback = stats._top_offensive_players_pandas(2023, None, positions, teams)
+        assert rows(sql) == rows(fallback), (positions, teams)
+        top = stats.get_top_offensive_players(2023, top_n=2, positions=positions, teams=teams)
+        assert top["yards"].tolist() == fallback["yards"].head(2).astype(int).tolist()
+
+
+def test_apply_schema_downcasts_and_falls_back_to_nullable_or_wide():
+    from utils.schema import apply_schema, memory_report
+
+    n = 1000
+    players = pd.DataFrame({
+        "season": [2023] * n,
+        "team": ["KC", "DAL"] * (n // 2),
+        "position": ["QB", "WR", "RB", "TE"] * (n // 4),
+        "status": ["ACT"] * n,
+        "weight": ["6-2"] * n,  # Text, keine Zahl -> unverändert
+    })
+    compact = apply_schema(players, "players")
+    assert {c: str(compact[c].dtype) for c in ["team", "position", "status"]} == dict.fromkeys(
+        ["team", "position", "status"], "category")
+    assert compact["season"].dtype == "int16"
+    assert compact["weight"].dtype == players["weight"].dtype and compact["weight"].equals(players["weight"])
+
+    gamelogs = pd.DataFrame({
+        "season": [2023, 2023, 2023],
+        "week": [1, 2, 3],
+        "yards": [10.0, np.nan, 30.0],          # fehlender Wert -> nullable Int32
+        "td": [1, 2, 5_000_000_000],            # passt nicht in int32 -> breit
+        "receptions": [1.5, 2.0, 3.0],          # keine ganzen Zahlen -> float bleibt
+    })
+    compact = apply_schema(gamelogs, "gamelogs")
+    assert compact["season"].dtype == "int16" and compact["week"].dtype == "int16"
+    assert str(compact["yards"].dtype) == "Int32"
+    assert compact["yards"].isna().tolist() == [False, True, False]
+    assert compact["td"].dtype == "int64" and compact["td"].iloc[2] == 5_000_000_000
+    assert compact["receptions"].dtype == "float64"
+
+    report = memory_report(players, apply_schema(players, "players"))
+    assert report["bytes_after"] < report["bytes_before"] and report["saved_pct"] > 0
+
+
+def test_similarity_index_matches_brute_force(tmp_path):
+    from analysis.similarity import SimilarityIndex, build_index
+
+    conn = sqlite3.connect(":memory:")
+    gamelogs = make_gamelogs(range(1, 7))
+    gamelogs.to_sql("gamelogs", conn, index=False)
+    pd.DataFrame({
+        "season": 2023, "player_id": [f"p{p}" for p in range(5)], "position": ["QB", "WR", "WR", "RB", "WR"],
+    }).to_sql("players", conn, index=False)
+    assert build_index(conn, tmp_path / "similarity", ["yards", "td"]) == 5
+
+    index = SimilarityIndex(tmp_path / "similarity")
+    assert isinstance(index.features, np.memmap)
+    row = index.row("p1")
+    X = np.asarray(index.features, dtype=np.float64)
+
+    rows, scores = index.query(row, k=2, metric="euclidean")
+    dist = np.linalg.norm(X - X[row], axis=1)
+    dist[row] = np.inf
+    assert rows.tolist() == np.argsort(dist)[:2].tolist()
+    np.testing.assert_allclose(scores, np.sort(dist)[:2], rtol=1e-5)
+
+    rows, _ = index.query(row, k=5, metric="cosine", positions=["WR"])
+    assert sorted(index.player_id[rows].tolist()) == ["p2", "p4"]
+
+    # Rest eines abgebrochenen Tauschs blockiert den nächsten Build nicht
+    leftover = tmp_path / ".similarity.old"
+    leftover.mkdir()
+    (leftover / "features.npy").write_bytes(b"stale")
+    assert build_index(conn, tmp_path / "similarity", ["yards", "td"]) == 5
+    assert not list(tmp_path.glob(".similarity*"))
+
+
+def test_failed_ingest_leaves_similarity_index_untouched(synthetic_fetch, monkeypatch):
+    from etl import ingest
+
+    synthetic_fetch([2022])
+    ingest.ingest_season(2022)
+    meta = (stats.SIMILARITY_DIR / "meta.json").read_text()
+
+    synthetic_fetch([2023])
+    def boom(conn, seasons=()):
+        raise RuntimeError("failed at the end of the season transaction")
+    monkeypatch.setattr(ingest, "bump_generation", boom)
+    with pytest.raises(RuntimeError):
+        ingest.ingest_season(2023)
+    assert (stats.SIMILARITY_DIR / "meta.json").read_text() == meta
+    conn = sqlite3.connect(ingest.DB_PATH)
+    assert conn.execute("SELECT COUNT(*) FROM gamelogs WHERE season = 2023").fetchone()[0] == 0
+    conn.close()
+
+
+def test_player_page_keyset_walks_every_row_once(tmp_path, monkeypatch):
+    from etl.ingest import TOTALS_DDL
+
+    db = tmp_path / "nfl.db"
+    conn = sqlite3.connect(db)
+    for ddl in TOTALS_DDL:
+        conn.execute(ddl)
+    rng = np.random.default_rng(0)
+    totals = pd.DataFrame({
+        "season": np.repeat([2022, 2023], 60),
+        "player_id": [f"p{i:03d}" for i in range(60)] * 2,
+        "position": rng.choice(["QB", "WR"], 120),
+        "games": rng.integers(1, 18, 120),
+        "yards": rng.integers(0, 20, 120),  # viele Gleichstände -> Tie-Breaker muss greifen
+        "td": rng.integers(0, 5, 120),
+    })
+    totals.to_sql("player_season_totals", conn, index=False, if_exists="append")
+    totals[["season", "player_id"]].assign(full_name=totals["player_id"].str.upper()).to_sql("players", conn, index=False)
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(stats, "DB_PATH", db)
+
+    expected = totals[totals["position"] == "WR"].sort_values(
+        ["yards", "season", "player_id"], ascending=False)[["season", "player_id"]]
+    seen, after = [], None
+    while True:
+        page, after = stats.get_player_page(sort="yards", after=after, page_size=7, positions=["WR"])
+        assert len(page) <= 7
+        seen.extend(zip(page["season"], page["player_id"]))
+        if after is None:
+            break
+    assert seen == list(expected.itertuples(index=False, name=None))
+    assert stats.count_players(positions=["WR"]) == len(expected)
+
+    with pytest.raises(ValueError):
+        stats.build_player_page_query(sort="yards; DROP TABLE players")
+
+
+def test_player_seasons_and_career_leaderboard(tmp_path, monkeypatch):
+    db = tmp_path / "nfl.db"
+    conn = sqlite3.connect(db)
+    gamelogs = pd.concat([
+        make_gamelogs(range(1, 7), seed=0),
+        make_gamelogs(range(1, 5), seed=1).assign(season=2022),
+    ], ignore_index=True)
+    gamelogs.to_sql("gamelogs", conn, index=False)
+    pd.DataFrame({
+        "season": np.repeat([2022, 2023], 5), "player_id": [f"p{p}" for p in range(5)] * 2,
+        "full_name": [f"Player {p}" for p in range(5)] * 2, "team": "KC", "position": "WR",
+    }).to_sql("players", conn, index=False)
+    conn.close()
+    monkeypatch.setattr(stats, "DB_PATH", db)
+
+    seasons = stats.get_player_seasons(2022, 2023)
+    expected = gamelogs.groupby(["player_id", "season"]).agg(games=("week", "size"), yards=("yards", "sum"))
+    got = seasons.set_index(["player_id", "season"]).sort_index()
+    assert got["games"].tolist() == expected["games"].tolist()
+    assert got["yards"].tolist() == expected["yards"].tolist()
+    np.testing.assert_allclose(got["yards_per_game"], expected["yards"] / expected["games"])
+
+    career = gamelogs.groupby("player_id").agg(games=("week", "size"), td=("td", "sum"))
+    board = stats.get_leaderboard(2022, 2023, stat="td", per_game=True, top_n=3)
+    best = (career["td"] / career["games"]).sort_values(ascending=False, kind="stable")
+    assert board["player_id"].tolist() == best.index[:3].tolist()
+    assert board["seasons"].tolist() == [2, 2, 2]
+
+    with pytest.raises(ValueError):
+        stats.get_leaderboard(2022, 2023, stat="full_name")
+
+
+def test_readers_use_readonly_pool_and_never_block_behind_writer(tmp_path, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from etl.ingest import connect
+    from utils.db import close_pools, get_pool
+
+    db = tmp_path / "nfl.db"
+    writer = connect(db)  # WAL wie beim Ingest
+    writer.execute("CREATE TABLE players (season INTEGER, player_id TEXT)")
+    writer.execute("INSERT INTO players VALUES (2023, 'p0')")
+    writer.commit()
+    monkeypatch.setattr(stats, "DB_PATH", db)
+
+    # offener Schreib-Transaktion zum Trotz: Leser sehen sofort den letzten Commit
+    writer.execute("BEGIN IMMEDIATE")
+    writer.execute("INSERT INTO players VALUES (2023, 'p1')")
+    query = "SELECT COUNT(*) AS n FROM players WHERE season = ?"
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        counts = list(pool.map(lambda _: int(stats.get_data_from_db(query, [2023])["n"].iloc[0]), range(32)))
+    assert counts == [1] * 32
+    writer.commit()
+    assert int(stats.get_data_from_db(query, [2023])["n"].iloc[0]) == 2
+
+    read_pool = get_pool(db)
+    assert read_pool.stats()["open"] <= read_pool.size
+    with pytest.raises(sqlite3.OperationalError):
+        with read_pool.connection() as conn:
+            conn.execute("INSERT INTO players VALUES (2023, 'p2')")
+    writer.close()
+    close_pools()
+
+
+def test_pool_wakes_waiter_when_a_failed_connection_is_discarded(tmp_path):
+    import threading
+    import time
+    from utils.db import ConnectionPool
+
+    db = tmp_path / "nfl.db"
+    sqlite3.connect(db).close()
+    pool = ConnectionPool(db, size=1)
+    got = []
+
+    def waiter():
+        with pool.connection() as conn:
+            got.append(conn.execute("SELECT 1").fetchone()[0])
+
+    with pytest.raises(sqlite3.OperationalError):
+        with pool.connection() as conn:
+            thread = threading.Thread(target=waiter, daemon=True)
+            thread.start()
+            while pool.stats()["waits"] < 1:
+                time.sleep(0.01)
+            conn.execute("SELECT * FROM missing_table")  # Verbindung wird verworfen
+    thread.join(timeout=5)
+    assert not thread.is_alive() and got == [1]
+    assert pool.stats()["open"] == 1 and pool.stats()["idle"] == 1
+    pool.close()
+
+
+def test_fantasy_scoring_matches_rowwise_and_db_cache(tmp_path, monkeypatch):
+    from analysis import scoring
+
+    rng = np.random.default_rng(3)
+    n = 400
+    gamelogs = pd.DataFrame({
+        "season": 2023, "week": rng.integers(1, 18, n), "player_id": rng.choice([f"p{i}" for i in range(20)], n),
+        "passing_yards": rng.integers(0, 400, n), "passing_tds": rng.integers(0, 4, n),
+        "interceptions": rng.integers(0, 3, n), "rushing_yards": rng.integers(0, 120, n),
+        "rushing_tds": rng.integers(0, 2, n), "receptions": rng.integers(0, 10, n),
+        "receiving_yards": rng.integers(0, 150, n), "receiving_tds": rng.integers(0, 2, n),
+        "fumbles_lost": rng.integers(0, 2, n),
+    }).drop_duplicates(["season", "week", "player_id"])
+
+    rulesets = {name: scoring.load_rules(name) for name in scoring.RULESETS}
+    points = scoring.points_by_player(gamelogs, rulesets).set_index("player_id")
+    for name, rules in rulesets.items():
+        rowwise = gamelogs.apply(lambda r: sum(r[c] * v for c, v in rules.items()), axis=1)
+        expected = rowwise.groupby(gamelogs["player_id"]).sum()
+        np.testing.assert_allclose(points.loc[expected.index, name], expected)
+
+    # vom Ingest vorberechnet (DB) == on the fly gerechnet (eigenes Regelwerk)
+    db = tmp_path / "nfl.db"
+    conn = sqlite3.connect(db)
+    gamelogs.to_sql("gamelogs", conn, index=False)
+    assert stats.refresh_fantasy_points(conn, 2023) == 3 * gamelogs["player_id"].nunique()
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(stats, "DB_PATH", db)
+
+    stored = stats.get_fantasy_points(2023, "half_ppr").set_index("player_id")["fantasy_points"]
+    custom = stats.get_fantasy_points(2023, '{"receptions": 0.5, "receiving_yards": 0.1, "receiving_tds": 6}')
+    np.testing.assert_allclose(stored.loc[points.index], points["half_ppr"])
+    assert custom["fantasy_points"].sum() == pytest.approx(
+        (0.5 * gamelogs["receptions"] + 0.1 * gamelogs["receiving_yards"] + 6 * gamelogs["receiving_tds"]).sum()
+    )
+
+    with pytest.raises(ValueError):
+        scoring.load_rules({"receptions": "one"})
+    with pytest.raises(ValueError, match="recieving_yards"):
+        scoring.load_rules('{"recieving_yards": 0.1}')  # Tippfehler statt still 0 Punkte
+    with pytest.raises(ValueError):
+        stats.get_top_offensive_players(2023, sort_by="birth_date")
+
+
+def test_parallel_ingest_matches_serial(synthetic_fetch, tmp_path, monkeypatch):
+    import shutil
+    from etl import ingest
+
+    seasons = [2022, 2023, 2024]
+    synthetic_fetch(seasons)
+    for name in ("serial", "parallel"):
+        shutil.copytree("raw", tmp_path / name / "raw")
+    monkeypatch.chdir(tmp_path / "serial")
+    for season in seasons:
+        ingest.ingest_season(season)
+    serial = sqlite3.connect(ingest.DB_PATH)
+
+    # zwei Parse-Prozesse, ein Schreiber
+    monkeypatch.chdir(tmp_path / "parallel")
+    summary = ingest.ingest_seasons(seasons, jobs=2, batch_size=500)
+    assert sorted(r["season"] for r in summary) == seasons
+    assert all(r["rows"] > 0 and r["parse_s"] >= 0 for r in summary)
+    assert not [p for p in ingest.DB_DIR.iterdir() if p.name.startswith(".ingest-")]
+    parallel = sqlite3.connect(ingest.DB_PATH)
+
+    for table in ("players", "gamelogs", "player_season_totals", "weekly_stats", "fantasy_points"):
+        query = f"SELECT * FROM {table}"
+        assert sorted(serial.execute(query).fetchall()) == sorted(parallel.execute(query).fetchall()), table
+    query = "SELECT season, team, position, n_players, n_gamelogs FROM catalog"
+    assert sorted(serial.execute(query).fetchall(), key=repr) == sorted(parallel.execute(query).fetchall(), key=repr)
+
+    # unveränderte Rohdateien -> nichts zu tun
+    assert ingest.ingest_seasons(seasons, jobs=2) == []
+    serial.close()
+    parallel.close()
+
+
+@pytest.mark.parametrize("mode", ["default", "stream", "parallel"])
+def test_parquet_store_matches_db_and_survives_rollback(synthetic_fetch, monkeypatch, mode):
+    import pyarrow.compute as pc
+
+    from etl import ingest
+    from utils import io as store
+
+    def run(season):
+        if mode == "parallel":
+            (result,) = ingest.ingest_seasons([season], jobs=2)
+            if "error" in result:
+                raise RuntimeError(result["error"])
+        else:
+            ingest.ingest_season(season, stream=mode == "stream", batch_size=100)
+
+    def stored(season):
+        gamelogs = store.read_dataset("gamelogs", columns=["yards"], where={"season": season})
+        return gamelogs.num_rows, pc.sum(gamelogs["yards"]).as_py()
+
+    def in_db(season):
+        conn = sqlite3.connect(ingest.DB_PATH)
+        try:
+            return conn.execute("SELECT COUNT(*), SUM(yards) FROM gamelogs WHERE season = ?", (season,)).fetchone()
+        finally:
+            conn.close()
+
+    def top(season, backend):
+        df = stats.get_top_offensive_players(season, top_n=None, backend=backend)[["player_id", "yards", "td"]]
+        return sorted(map(tuple, df.astype({"player_id": str}).values.tolist()))
+
+    synthetic_fetch([2022, 2023], seed=1)
+    for season in (2022, 2023):
+        run(season)
+    for season in (2022, 2023):
+        assert top(season, "sqlite") == top(season, "parquet")
+        assert stored(season) == in_db(season)
+
+    # Rollback am Ende der Transaktion -> Store bleibt bei den committeten Daten
+    before = in_db(2023)
+    synthetic_fetch([2023], seed=2)
+    def boom(conn, seasons=()):
+        raise RuntimeError("failed at the end of the season transaction")
+    bump_generation = ingest.bump_generation
+    monkeypatch.setattr(ingest, "bump_generation", boom)
+    with pytest.raises(RuntimeError):
+        run(2023)
+    assert in_db(2023) == before and stored(2023) == before
+    assert not list(store.STORE_DIR.rglob("*.tmp"))
+
+    monkeypatch.setattr(ingest, "bump_generation", bump_generation)
+    run(2023)
+    assert in_db(2023) != before and stored(2023) == in_db(2023)
+
+
+def test_season_aggregation_reads_only_the_covering_index(synthetic_fetch):
+    from etl import ingest
+
+    synthetic_fetch([2023])
+    ingest.ingest_season(2023)
+    conn = sqlite3.connect(ingest.DB_PATH)
+    indexed = [row[2] for row in conn.execute("PRAGMA index_info(idx_gamelogs_season_player)")]
+    assert indexed == ["season", "player_id", "yards", "td"]
+    sql, params = stats.build_top_players_query(
+        2023, 10, None, None, player_cols=stats.get_table_columns("players"),
+        gamelog_cols=stats.get_table_columns("gamelogs"), from_totals=False,
+    )
+    plan = " ".join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+    conn.close()
+    assert "COVERING INDEX idx_gamelogs_season_player" in plan
+
+
+def test_doctor_reports_indexes_statistics_and_plans(synthetic_fetch):
+    from etl import doctor, ingest
+
+    synthetic_fetch([2023])
+    ingest.ingest_season(2023)
+    conn = sqlite3.connect(ingest.DB_PATH)
+    try:
+        report = {name: status for name, _, _, status in doctor.check_indexes(conn)}
+        assert report == {name: "ok" for name in ingest.INDEXES}
+        assert doctor.has_statistics(conn)
+        plan = " ".join(doctor.query_plans(conn, 2023)["get_top_offensive_players"])
+        assert "idx_gamelogs_season_player" in plan
+
+        conn.execute("DROP INDEX idx_players_team_position")
+        report = {name: status for name, _, _, status in doctor.check_indexes(conn)}
+        assert report["idx_players_team_position"] == "MISSING"
+        assert report["idx_gamelogs_season_player"] == "ok"
+    finally:
+        conn.close()
+
+
+def test_catalog_backfills_seasons_ingested_before_players(synthetic_fetch):
+    from etl import ingest
+
+    fetch = synthetic_fetch
+    fetch([2022, 2023], seed=1)
+    roster_2022 = next(ingest.RAW_DIR.glob("players_2022.*"))
+    hidden = roster_2022.rename(roster_2022.with_name("hidden_" + roster_2022.name))
+
+    # 2022 ohne players -> Katalog wird angelegt, bleibt aber leer
+    ingest.ingest_season(2022)
+    assert stats.available_seasons() == []
+
+    # erster Ingest mit players zieht alle Saisons mit Daten nach
+    ingest.ingest_season(2023)
+    assert stats.available_seasons() == [2023, 2022]
+    assert stats.available_teams(2022) == []
+    teams = stats.available_teams(2023)
+    assert teams and teams == stats.available_teams()
+
+    hidden.rename(roster_2022)
+    ingest.ingest_season(2022)
+    assert stats.available_teams(2022) == teams
+    catalog = stats.get_catalog()
+    players = stats.get_data_from_db("SELECT season, COUNT(*) AS n FROM players GROUP BY season")
+    assert catalog.groupby("season")["n_players"].sum().to_dict() == dict(zip(players["season"], players["n"]))
+
+
+def test_watcher_ingests_changed_season_and_keeps_other_caches(synthetic_fetch):
+    from etl import watch
+
+    fetch = synthetic_fetch
+    fetch([2022, 2023], seed=1)
+    (first,) = watch.watch(once=True)
+    assert first[1] == [2022, 2023]
+
+    before = {s: stats.get_top_offensive_players(s, top_n=5) for s in (2022, 2023)}
+    generations = {s: stats.db_generation(s) for s in (2022, 2023)}
+
+    # neue Daten nur für 2023 -> nur 2023 wird geladen, nur dessen Caches verfallen
+    fetch([2023], seed=2)
+    (second,) = watch.watch(once=True)
+    assert second[1] == [2023] and second[0] > first[0]
+    assert stats.db_generation(2022) == generations[2022]
+    assert stats.db_generation(2023) != generations[2023]
+
+    misses = stats.QUERY_CACHE.stats()["misses"]
+    assert stats.get_top_offensive_players(2022, top_n=5).equals(before[2022])
+    assert stats.QUERY_CACHE.stats()["misses"] == misses
+    assert not stats.get_top_offensive_players(2023, top_n=5).equals(before[2023])
+    assert stats.QUERY_CACHE.stats()["misses"] == misses + 1
+
+    assert watch.watch(once=True) == []  # nichts geändert
+
+    # CSV-Dateien (Fallback von ingest._raw_path) werden ebenso erkannt
+    Path("raw/players_2021.csv").write_text("player_id,season\np1,2021\n")
+    assert watch.changed_seasons({}, watch.scan()) == [2021, 2022, 2023]
+
+
+def test_arrow_snapshots_match_db_and_refresh_only_stale(synthetic_fetch):
+    from etl import export, ingest
+    from utils import snapshots
+
+    fetch = synthetic_fetch
+    fetch([2022, 2023], seed=1)
+    for season in (2022, 2023):
+        ingest.ingest_season(season)
+
+    written = export.refresh()
+    assert len(written) == len(export.SEASONLESS) + 2 * len(export.SNAPSHOTS)
+    assert export.refresh() == []
+
+    gamelogs = snapshots.load_snapshot("gamelogs", 2023).to_pandas()
+    from_db = stats.get_data_from_db("SELECT * FROM gamelogs WHERE season = 2023")
+    assert len(gamelogs) == len(from_db)
+    assert gamelogs["yards"].sum() == from_db["yards"].sum()
+    board = snapshots.load_snapshot("leaderboard", 2023, columns=["player_id", "yards"]).to_pandas()
+    top = stats.get_top_offensive_players(2023, top_n=5)
+    assert board.head(5)["player_id"].tolist() == top["player_id"].astype(str).tolist()
+
+    # neue Daten für 2022 -> nur dessen Snapshots plus die saisonlosen werden neu geschrieben
+    fetch([2022], seed=2)
+    ingest.ingest_season(2022)
+    assert not export.is_fresh("gamelogs", 2022) and export.is_fresh("gamelogs", 2023)
+    refreshed = {(r["name"], r["season"]) for r in export.refresh()}
+    assert refreshed == {(n, None) for n in export.SEASONLESS} | {(n, 2022) for n in export.SNAPSHOTS}
+
+    with pytest.raises(FileNotFoundError):
+        snapshots.load_snapshot("gamelogs", 1999)
+
+
+def test_snapshot_metadata_closes_its_memory_map(tmp_path, monkeypatch):
+    import pyarrow as pa
+
+    from utils import snapshots
+
+    snapshots.write_snapshot(pd.DataFrame({"x": range(10)}), "demo", 2023, metadata={"generation": "1"}, root=tmp_path)
+    opened = []
+    memory_map = pa.memory_map
+    def tracking(*args, **kwargs):
+        opened.append(memory_map(*args, **kwargs))
+        return opened[-1]
+    monkeypatch.setattr(pa, "memory_map", tracking)
+
+    assert snapshots.snapshot_metadata("demo", 2023, root=tmp_path)["generation"] == "1"
+    assert opened and all(source.closed for source in opened)
+
+
+def test_cross_season_rebuild_bumps_every_touched_season(synthetic_fetch, monkeypatch):
+    from etl import ingest
+
+    synthetic_fetch([2022, 2023])
+    for season in (2022, 2023):
+        ingest.ingest_season(season)
+    before = stats.get_weekly_stats(2023)
+    generation = stats.db_generation(2023)
+    assert "td" in before.columns
+
+    # weniger Stat-Spalten (wie nach einem Upgrade, nur umgekehrt) -> weekly_stats aller Saisons neu
+    monkeypatch.setattr(ingest, "STAT_COLUMNS", [c for c in ingest.STAT_COLUMNS if c != "td"])
+    assert ingest.ingest_season(2022, force=True)
+    assert stats.db_generation(2023) != generation
+    after = stats.get_weekly_stats(2023)
+    assert "td" not in after.columns and len(after) == len(before)
+
+
+def test_snapshot_of_other_season_goes_stale_after_cross_season_rebuild(synthetic_fetch, monkeypatch):
+    from etl import export, ingest
+    from utils import snapshots
+
+    synthetic_fetch([2022, 2023])
+    for season in (2022, 2023):
+        ingest.ingest_season(season)
+    export.refresh(names=["weekly_stats"])
+    assert "td" in snapshots.load_snapshot("weekly_stats", 2023).column_names
+
+    # nur 2022 wird geladen, aber weekly_stats von 2023 ändert sich mit
+    monkeypatch.setattr(ingest, "STAT_COLUMNS", [c for c in ingest.STAT_COLUMNS if c != "td"])
+    ingest.ingest_season(2022, force=True)
+    assert not export.is_fresh("weekly_stats", 2023)
+    assert {r["season"] for r in export.refresh(names=["weekly_stats"])} == {2022, 2023}
+    assert "td" not in snapshots.load_snapshot("weekly_stats", 2023).column_names
+
+
+def test_parallel_ingest_reports_failed_season_and_finishes_the_rest(synthetic_fetch):
+    from etl import ingest
+
+    synthetic_fetch([2022, 2023])
+    Path("raw/gamelogs_2023.parquet").write_bytes(b"not a parquet file")
+
+    summary = {r["season"]: r for r in ingest.ingest_seasons([2022, 2023], jobs=2)}
+    assert summary[2022]["rows"] > 0 and "error" not in summary[2022]
+    assert "gamelogs_2023.parquet" in summary[2023]["error"]
+
+    conn = sqlite3.connect(ingest.DB_PATH)
+    assert conn.execute("SELECT COUNT(*) FROM players WHERE season = 2023").fetchone()[0] == 0
+    conn.close()
+    # der Schlussschritt lief trotzdem: der Index passt zur committeten Saison 2022
+    index = stats.similarity.SimilarityIndex(stats.SIMILARITY_DIR)
+    assert set(index.season.tolist()) == {2022}
+
+
+def test_fantasy_ranking_without_top_n_returns_every_player(synthetic_fetch):
+    from etl import ingest
+
+    synthetic_fetch([2023])
+    ingest.ingest_season(2023)
+    everyone = stats.get_top_offensive_players(2023, top_n=None, sort_by="fantasy_points", scoring="ppr")
+    top = stats.get_top_offensive_players(2023, top_n=5, sort_by="fantasy_points", scoring="ppr")
+    assert len(everyone) == len(stats.get_top_offensive_players(2023, top_n=None)) > 5
+    assert everyone["fantasy_points"].is_monotonic_decreasing
+    assert everyone.head(5)["player_id"].tolist() == top["player_id"].tolist()
+
+
+def test_season_totals_and_ranks_match_gamelogs_after_reingest(synthetic_fetch):
+    from etl import ingest
+
+    def check(conn, season):
+        totals = pd.read_sql("SELECT * FROM player_season_totals WHERE season = ?", conn, params=[season])
+        g = pd.read_sql("SELECT player_id, yards, td FROM gamelogs WHERE season = ?", conn, params=[season])
+        expected = g.groupby("player_id").agg(games=("yards", "size"), yards=("yards", "sum"), td=("td", "sum"))
+        totals = totals.set_index("player_id").sort_index()
+        assert totals[["games", "yards", "td"]].astype(int).equals(expected.astype(int))
+        assert totals["yards_rank"].tolist() == totals["yards"].rank(method="min", ascending=False).astype(int).tolist()
+        by_position = totals.groupby(totals["position"].fillna(""))["yards"].rank(method="min", ascending=False)
+        assert totals["position_rank"].tolist() == by_position.astype(int).tolist()
+        return totals
+
+    synthetic_fetch([2022, 2023])
+    for season in (2022, 2023):
+        ingest.ingest_season(season)
+    conn = sqlite3.connect(ingest.DB_PATH)
+    before_2022 = check(conn, 2022)
+    before_2023 = check(conn, 2023)
+
+    # nur 2023 mit neuen Daten -> 2023 neu gerankt, 2022 unverändert
+    synthetic_fetch([2023], seed=2)
+    ingest.ingest_season(2023)
+    assert check(conn, 2022).equals(before_2022)
+    assert not check(conn, 2023)["yards"].equals(before_2023["yards"])
+    conn.close()
+
+
+def test_query_cache_follows_generation_and_db_identity(tmp_path, monkeypatch):
+    from etl.ingest import bump_generation
+
+    def make_db(yards):
+        db = tmp_path / "nfl.db"
+        db.unlink(missing_ok=True)
+        conn = sqlite3.connect(db)
+        pd.DataFrame({"season": 2023, "week": 1, "player_id": ["p0"], "yards": [yards], "td": [0]}).to_sql(
+            "gamelogs", conn, index=False)
+        pd.DataFrame({"season": [2023], "player_id": ["p0"]}).to_sql("players", conn, index=False)
+        conn.commit()
+        return conn
+
+    conn = make_db(10)
+    monkeypatch.setattr(stats, "DB_PATH", tmp_path / "nfl.db")
+    assert stats.get_top_offensive_players(2023)["yards"].tolist() == [10]
+
+    # Ingest-Schreiben (neue Generation) -> neu gelesen
+    with conn:
+        conn.execute("UPDATE gamelogs SET yards = 20")
+        bump_generation(conn)
+    assert stats.get_top_offensive_players(2023)["yards"].tolist() == [20]
+    conn.close()
+
+    # neu angelegte DB am selben Pfad startet wieder bei Generation 0 -> trotzdem kein alter Eintrag
+    from utils.db import close_pools
+    close_pools()
+    make_db(30).close()
+    assert stats.get_top_offensive_players(2023)["yards"].tolist() == [30]
+    close_pools()